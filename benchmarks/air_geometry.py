@@ -0,0 +1,54 @@
+# Simone Mencarelli
+# October 2026
+# Theta phi mesh of the deformedAntennaAIR geometry (steps 1 to 7 of the script) for the interpolation benchmarks.
+# The script uses 1000001 Doppler samples x 101 incidence samples, the benchmarks default to fewer Doppler samples
+# to fit small machines.
+
+# %% includes
+import numpy as np
+
+from radartools.spherical_earth_geometry_radar import *
+from radartools.design_functions import *
+
+
+# %% function
+def air_mesh(doppler_samples=1000001, incidence_samples=101, start=0, stop=None, doppler_span=400, cartesian=False):
+    """
+    :param doppler_samples: Doppler samples (rows of the mesh)
+    :param incidence_samples: incidence samples (columns of the mesh)
+    :param start: first row, for tiles of the mesh
+    :param stop: end row, default the last one
+    :param doppler_span: Doppler axis from -doppler_span to doppler_span Doppler bandwidths (0.5 the main beam)
+    :param cartesian: True to return the LCS cartesian coordinates (step 7 skipped)
+    :return: T, P (stop - start, incidence_samples) theta phi meshgrids of the antenna LCS [rad], or Xl, Yl, Zl
+    """
+    incidence_broadside = 25 * np.pi / 180
+    squint = -66.1 * np.pi / 180
+    altitude = 500e3
+    f = 10e9
+    La = 0.3
+    c = 299792458.0
+    swath = 100e3
+    radarGeo = RadarGeometry()
+    looking_angle = incidence_angle_to_looking_angle(incidence_broadside, altitude)
+    radarGeo.set_rotation(looking_angle, 0, squint)
+    radarGeo.set_initial_position(0, 0, altitude)
+    v_s = radarGeo.orbital_speed()
+    radarGeo.set_speed(v_s)
+    Bd = nominal_doppler_bandwidth(La, incidence_broadside, c / f, v_s, altitude)
+    doppler = np.linspace(-Bd * doppler_span, Bd * doppler_span, doppler_samples)
+    r0, rg0 = range_from_theta(incidence_broadside * 180 / np.pi, altitude)
+    rgNF = np.array((rg0 - swath / 2, rg0 + swath / 2))
+    rNF = range_ground_to_slant(rgNF, altitude)
+    rgNF, incNF = range_slant_to_ground(rNF, altitude)
+    incidence = np.linspace(incNF[0], incNF[1], incidence_samples)
+    I, D = np.meshgrid(incidence, doppler[start:stop])
+    I, A, Tk = mesh_doppler_to_azimuth(I, D, c / f, v_s, altitude)
+    X, Y, Z = mesh_incidence_azimuth_to_gcs(I, A, c / f, v_s, altitude)
+    Xl, Yl, Zl = mesh_gcs_to_lcs(X, Y, Z, radarGeo.Bc2s, radarGeo.S_0)
+    if cartesian:
+        return Xl, Yl, Zl
+    R, T, P = meshCart2sph(Xl, Yl, Zl)
+    T[np.isnan(T)] = 0
+    P[np.isnan(P)] = 0
+    return T, P
@@ -0,0 +1,55 @@
+# Simone Mencarelli
+# October 2026
+# Time to resample the normal displacement of many modes from the shell nodes to the lambda/3 aperture grid, with
+# scipy griddata per mode (two triangulations per mode, as before) and with the ApertureResampler matrix built once.
+# run from the repository root with: python -m benchmarks.aperture_resampling
+
+# %% includes
+import time
+
+import numpy as np
+from scipy.interpolate import griddata
+
+from dummyModalApertureField import ApertureResampler
+
+# %% User input
+# shell mesh of 3312 nodes, 2 m x 0.3 m
+rows, columns = 144, 23
+modes = 50
+wavelength = 3e8 / 10e9
+
+# %% synthetic node layout and mode shapes
+rng = np.random.default_rng(0)
+nodes_y, nodes_x = np.meshgrid(np.linspace(0.2, 2.2, rows), np.linspace(-0.15, 0.15, columns), indexing='ij')
+# slightly irregular, like a deformed mesh
+nodes_x = nodes_x.reshape(-1) + rng.normal(0, 1e-4, rows * columns)
+nodes_y = nodes_y.reshape(-1) + rng.normal(0, 1e-4, rows * columns)
+shapes = np.array([np.sin(np.pi * (mode + 1) * (nodes_y - 0.2) / 2) * np.cos(np.pi * mode * nodes_x / 0.3) * 1e-3
+                   for mode in range(modes)]).T  # (nodes, modes)
+print('{} nodes, {} modes'.format(rows * columns, modes))
+
+# %% benchmark
+t0 = time.perf_counter()
+resampler = ApertureResampler(nodes_x, nodes_y, wavelength)
+t_build = time.perf_counter() - t0
+X, Y = np.meshgrid(resampler.x, resampler.y)
+print('aperture grid {} x {}'.format(len(resampler.y), len(resampler.x)))
+
+t0 = time.perf_counter()
+reference = []
+for mode in range(modes):
+    Z = griddata((nodes_x, nodes_y), shapes[:, mode], (X, Y))
+    Z[np.isnan(Z)] = 0
+    A = griddata((nodes_x, nodes_y), np.ones_like(nodes_x), (X, Y), 'nearest')
+    reference.append(A * np.exp(1j * Z / wavelength * 2 * np.pi))
+t_griddata = (time.perf_counter() - t0) / modes
+
+t0 = time.perf_counter()
+E = np.exp(1j * resampler.resample(shapes) / wavelength * 2 * np.pi)
+t_matrix = (time.perf_counter() - t0) / modes
+
+print('{:30s} {:12.3f} ms'.format('griddata per mode', t_griddata * 1e3))
+print('{:30s} {:12.3f} ms'.format('resampler build (once)', t_build * 1e3))
+print('{:30s} {:12.3f} ms'.format('resampler per mode', t_matrix * 1e3))
+print('speedup per mode {:.0f}, max field difference {:.2e}'.format(t_griddata / t_matrix,
+                                                                      np.max(np.abs(E - np.array(reference)))))
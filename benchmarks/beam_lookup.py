@@ -0,0 +1,80 @@
+# Simone Mencarelli
+# October 2026
+# Main beam gain from the LCS cartesian directions of the deformedAntennaAIR geometry (Doppler within the processed
+# bandwidth): meshCart2sph and mesh_gain_pattern (the script chain) against Aperture.direction_gain_pattern without
+# and with the beam cone table (direction cosines lookup, no inverse trigonometry).
+# run from the repository root with: python -m benchmarks.beam_lookup
+
+# %% includes
+import time
+
+import numpy as np
+
+from benchmarks.air_geometry import air_mesh
+from farFieldCST import Aperture
+from radartools.utils import meshCart2sph
+
+# %% User input
+reference_pattern = 'farfield.ffs'
+doppler_samples = 50001
+# margin of the beam cone around the mesh [rad]
+margin = 2 * np.pi / 180
+repetitions = 3
+
+
+# %% functions
+def best_time(function):
+    """
+    :param function: callable without arguments
+    :return: best time of repetitions calls, last result
+    """
+    best = np.inf
+    for ii in range(repetitions):
+        t0 = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def spherical_chain(antenna, X, Y, Z):
+    """
+    :return: gain at the directions through meshCart2sph, as in the scripts
+    """
+    R, T, P = meshCart2sph(X, Y, Z)
+    T[np.isnan(T)] = 0
+    P[np.isnan(P)] = 0
+    return antenna.mesh_gain_pattern(T, P)
+
+
+# %% benchmark
+if __name__ == '__main__':
+    X, Y, Z = air_mesh(doppler_samples, doppler_span=0.5, cartesian=True)
+    print('mesh {} x {}, {:.1f} M points'.format(*X.shape, X.size / 1e6))
+    # cone about the mean direction of the mesh
+    directions = np.stack((X, Y, Z)) / np.sqrt(X ** 2 + Y ** 2 + Z ** 2)
+    axis = np.mean(directions, axis=(1, 2))
+    axis /= np.linalg.norm(axis)
+    half_angle = np.max(np.arccos(np.clip(np.tensordot(axis, directions, 1), -1, 1))) + margin
+    cone = (np.arccos(axis[2]), np.arctan2(axis[1], axis[0]), half_angle)
+    print('beam cone theta {:.2f} deg, phi {:.2f} deg, half angle {:.2f} deg'.format(*np.degrees(cone)))
+
+    plain = Aperture(reference_pattern, cache=False)
+    t0 = time.perf_counter()
+    coned = Aperture(reference_pattern, cache=False, beam_cone=cone)
+    t_build = time.perf_counter() - t0
+    # warm up
+    for antenna in (plain, coned):
+        spherical_chain(antenna, X[:3], Y[:3], Z[:3])
+        antenna.direction_gain_pattern(X[:3], Y[:3], Z[:3])
+
+    t_chain, reference = best_time(lambda: spherical_chain(plain, X, Y, Z))
+    t_direction, direction = best_time(lambda: plain.direction_gain_pattern(X, Y, Z))
+    t_beam, beam = best_time(lambda: coned.direction_gain_pattern(X, Y, Z))
+    peak = np.max(reference)
+    print('{:45s} {:10.3f} s'.format('meshCart2sph + mesh_gain_pattern', t_chain))
+    print('{:45s} {:10.3f} s {:10.2e}'.format('direction_gain_pattern', t_direction,
+                                              np.max(np.abs(direction - reference)) / peak))
+    print('{:45s} {:10.3f} s {:10.2e}'.format('direction_gain_pattern, beam table', t_beam,
+                                              np.max(np.abs(beam - reference)) / peak))
+    print('beam table {} x {} ({:.3f} s, with the Aperture load), max relative differences to the chain'.format(
+        *coned.beam[2].shape, t_build))
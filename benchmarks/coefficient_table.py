@@ -0,0 +1,52 @@
+# Simone Mencarelli
+# October 2026
+# Bicubic gain on the deformedAntennaAIR mesh from the precomputed coefficient table (interpolator_v3.table_interp,
+# a cell lookup and a 2d Horner evaluation per point) against the stencil path (interpolator_v3.fused_interp, the
+# 4 x 4 Catmull-Rom stencil rebuilt per point). The mesh is generated by tiles so that the script size fits in
+# memory, the interpolation time only is accumulated.
+# run from the repository root with: python -m benchmarks.coefficient_table
+
+# %% includes
+import time
+
+import numpy as np
+
+from benchmarks.air_geometry import air_mesh
+from farFieldCST import Aperture
+from interpolator_v3 import coefficient_table, sphere_interp_fused, sphere_interp_table
+
+# %% User input
+reference_pattern = 'farfield.ffs'
+# deformedAntennaAIR size, 101 M points
+doppler_samples = 1000001
+tile_rows = 50000
+
+# %% benchmark
+antenna = Aperture(reference_pattern, cache=False, coefficients=False)
+theta, phi, G = antenna.Theta[0, :], antenna.Phi[:, 0], antenna.G
+t0 = time.perf_counter()
+table = coefficient_table(G, theta, phi)
+t_table = time.perf_counter() - t0
+print('pattern {} x {}, table {:.3f} s, {:.2f} MB'.format(*G.shape, t_table, table.nbytes / 1e6))
+# warm up
+sphere_interp_table(theta[:3], phi[:3], theta, phi, G, table)
+sphere_interp_fused(theta[:3], phi[:3], theta, phi, G)
+
+t_stencil = 0
+t_lookup = 0
+error = 0
+for start in range(0, doppler_samples, tile_rows):
+    T, P = air_mesh(doppler_samples, 101, start, start + tile_rows)
+    t0 = time.perf_counter()
+    stencil = sphere_interp_fused(T, P, theta, phi, G)
+    t_stencil += time.perf_counter() - t0
+    t0 = time.perf_counter()
+    lookup = sphere_interp_table(T, P, theta, phi, G, table)
+    t_lookup += time.perf_counter() - t0
+    error = max(error, np.max(np.abs(lookup - stencil)))
+
+points = doppler_samples * 101
+print('mesh {} x 101, {:.1f} M points'.format(doppler_samples, points / 1e6))
+print('{:30s} {:10.3f} s {:10.1f} M points/s'.format('stencil (fused_interp)', t_stencil, points / t_stencil / 1e6))
+print('{:30s} {:10.3f} s {:10.1f} M points/s'.format('coefficient table', t_lookup, points / t_lookup / 1e6))
+print('speed up {:.2f} x, max relative difference {:.2e}'.format(t_stencil / t_lookup, error / np.max(G)))
@@ -0,0 +1,106 @@
+# Simone Mencarelli
+# October 2026
+# Memory footprint and precision report of the compact pattern store (patternStore, float32 / complex64) against
+# the float64 Aperture path, for the interpolated gain and for the core SNR of deformedAntennaSNR.
+# run from the repository root with: python -m benchmarks.compact_store
+
+# %% includes
+import os
+import tempfile
+
+import numpy as np
+from scipy import integrate
+
+from farFieldCST import Aperture
+from patternStore import pattern_to_store, CompactPattern
+from radartools.spherical_earth_geometry_radar import *
+from radartools.design_functions import *
+
+# %% User input
+reference_pattern = 'farfield.ffs'
+distorted_pattern = 'farfield.ffs'
+# same geometry of deformedAntennaSNR
+incidence_broadside = 25 * np.pi / 180
+squint = 0
+altitude = 500e3
+f = 10e9
+La = .2
+c = 299792458.0
+swath = 100e3
+
+# %% patterns, float64 path and compact stores
+folder = tempfile.mkdtemp()
+ant_ref = Aperture(reference_pattern, cache=False)
+ant_dist = Aperture(distorted_pattern, cache=False)
+compact_ref = CompactPattern(pattern_to_store(reference_pattern, os.path.join(folder, 'ref.pst')))
+compact_dist = CompactPattern(pattern_to_store(distorted_pattern, os.path.join(folder, 'dist.pst')))
+
+print('float64 G, Theta, Phi meshgrids: {:10.3f} MB'.format((ant_ref.G.nbytes + ant_ref.Theta.nbytes +
+                                                             ant_ref.Phi.nbytes) / 1e6))
+print('compact G and axes: {:10.3f} MB'.format((compact_ref.G.nbytes + compact_ref.theta.nbytes +
+                                                compact_ref.phi.nbytes) / 1e6))
+print('compact store (G, E_Theta, E_Phi, axes): {:10.3f} MB'.format(compact_ref.nbytes() / 1e6))
+print('compact store file: {:10.3f} MB'.format(os.path.getsize(compact_ref.filename) / 1e6))
+
+# %% gain precision on a dense mesh
+theta = np.linspace(0, np.pi / 2, 501)
+phi = np.linspace(0, 2 * np.pi, 500)
+T, P = np.meshgrid(theta, phi)
+g64 = ant_ref.mesh_gain_pattern(T, P)
+g32 = compact_ref.mesh_gain_pattern(T, P)
+mask = g64 > g64.max() * 1e-5  # above -50 dB
+print('gain, max error relative to the peak : {:10.3e}'.format(np.max(np.abs(g32 - g64)) / g64.max()))
+print('gain, max relative error above -50 dB: {:10.3e}'.format(np.max(np.abs(g32[mask] / g64[mask] - 1))))
+print('gain, max error above -50 dB [dB]    : {:10.3e}'.format(np.max(np.abs(10 * np.log10(g32[mask] / g64[mask])))))
+
+
+# %% core SNR (deformedAntennaSNR steps)
+def core_snr(ref, dist):
+    radarGeo = RadarGeometry()
+    looking_angle = incidence_angle_to_looking_angle(incidence_broadside, altitude)
+    radarGeo.set_rotation(looking_angle, 0, squint)
+    radarGeo.set_initial_position(0, 0, altitude)
+    v_s = radarGeo.orbital_speed()
+    radarGeo.set_speed(v_s)
+    Bd = nominal_doppler_bandwidth(La, incidence_broadside, c / f, v_s, altitude)
+    doppler = np.linspace(-Bd / 2, Bd / 2, 10001)
+    r0, rg0 = range_from_theta(incidence_broadside * 180 / np.pi, altitude)
+    rgNF = np.array((rg0 - swath / 2, rg0 + swath / 2))
+    rNF = range_ground_to_slant(rgNF, altitude)
+    rgNF, incNF = range_slant_to_ground(rNF, altitude)
+    incidence = np.linspace(incNF[0], incNF[1], 101)
+    I, D = np.meshgrid(incidence, doppler)
+    I, A, Tk = mesh_doppler_to_azimuth(I, D, c / f, v_s, altitude)
+    X, Y, Z = mesh_incidence_azimuth_to_gcs(I, A, c / f, v_s, altitude)
+    Xl, Yl, Zl = mesh_gcs_to_lcs(X, Y, Z, radarGeo.Bc2s, radarGeo.S_0)
+    R, T, P = meshCart2sph(Xl, Yl, Zl)
+    T[np.isnan(T)] = 0
+    P[np.isnan(P)] = 0
+    G_ref = ref.mesh_gain_pattern(T, P) / ref.max_gain()
+    G_dist = dist.mesh_gain_pattern(T, P) / ref.max_gain()
+    H = 1 / (stationary_phase_amplitude_multiplier(I, Tk, c / f, v_s, altitude) * G_ref)
+    denom = integrate.simpson(H ** 2, x=D, axis=0)
+    Wa = stationary_phase_amplitude_multiplier(I, Tk, c / f, v_s, altitude) * G_dist
+    numer = integrate.simpson(H * Wa, x=D, axis=0) ** 2
+    k_boltz = 1.380649E-23
+    sin_theta_i = sin(incidence)
+    re = 6371e3
+    r0 = re * (np.sqrt(cos(incidence) ** 2 + 2 * altitude / re + altitude ** 2 / re ** 2) - cos(incidence))
+    max_gain = ref.max_gain()
+    R0_mesh = re * (np.sqrt(cos(I) ** 2 + 2 * altitude / re + altitude ** 2 / re ** 2) - cos(I))
+    cos_theta_e = (re + R0_mesh * cos(I)) / (re + altitude)
+    vg = v_s / (re + altitude) * re * cos_theta_e[0, :]
+    SNR_core_ref = (c / f) ** 2 * max_gain ** 2 * c * Bd * vg / (
+            128 * np.pi ** 3 * r0 ** 4 * k_boltz * sin_theta_i * denom)
+    SNR_core = (c / f) ** 2 * max_gain ** 2 * c * vg * numer / (
+            128 * np.pi ** 3 * r0 ** 4 * k_boltz * sin_theta_i * Bd * denom)
+    return SNR_core_ref, SNR_core
+
+
+snr_ref64, snr64 = core_snr(ant_ref, ant_dist)
+snr_ref32, snr32 = core_snr(compact_ref, compact_dist)
+print('core SNR reference, max error [dB]: {:10.3e}'.format(np.max(np.abs(10 * np.log10(snr_ref32 / snr_ref64)))))
+print('core SNR distorted, max error [dB]: {:10.3e}'.format(np.max(np.abs(10 * np.log10(snr32 / snr64)))))
+for name in os.listdir(folder):
+    os.remove(os.path.join(folder, name))
+os.rmdir(folder)
@@ -0,0 +1,90 @@
+# Simone Mencarelli
+# October 2026
+# Cold page cache load time of a pattern file stored uncompressed and .gz, .bz2, .xz, .zst compressed.
+# The pages of the file are dropped from the page cache (posix_fadvise) before every load, so the time includes
+# reading the file from disk. On slow (shared) disks the smaller compressed files load faster.
+# run from the repository root with: python -m benchmarks.compressed_loading
+
+# %% includes
+import bz2
+import gzip
+import lzma
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from ffsFileWriter import ffsWrite
+from patternReader import read_pattern, zstandard
+
+# %% User input
+phiSamples = 721
+thetaSamples = 361
+repetitions = 3
+# bandwidth of the slow shared disk for the load time estimate [B/s]
+disk_bandwidth = 50e6
+
+
+# %% page cache
+def drop_cache(filename):
+    """
+    drops the pages of filename from the page cache (linux), the next read comes from the disk
+    """
+    with open(filename, 'rb') as file:
+        os.fsync(file.fileno())  # dirty pages of a fresh file cannot be dropped
+        os.posix_fadvise(file.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+
+
+# %% synthetic pattern, smooth fields like an antenna pattern
+theta = np.linspace(0, 180, thetaSamples)
+phi = np.linspace(0, 360, phiSamples)
+T, P = np.meshgrid(theta, phi)
+u = np.sin(T * np.pi / 180) * np.cos(P * np.pi / 180)
+v = np.sin(T * np.pi / 180) * np.sin(P * np.pi / 180)
+F = np.sinc(20 * u) * np.sinc(10 * v) * np.exp(1j * np.pi * 3 * u)
+e_theta = F * np.cos(P * np.pi / 180)
+e_phi = -F * np.cos(T * np.pi / 180) * np.sin(P * np.pi / 180)
+folder = tempfile.mkdtemp()
+filename = os.path.join(folder, 'bench.ffs')
+ffsWrite(T.reshape(-1), P.reshape(-1), e_theta.reshape(-1), e_phi.reshape(-1), phiSamples, thetaSamples, filename)
+with open(filename, 'rb') as file:
+    content = file.read()
+files = {'': filename}
+for extension, compress in (('.gz', gzip.compress), ('.bz2', bz2.compress), ('.xz', lzma.compress)):
+    files[extension] = filename + extension
+    with open(files[extension], 'wb') as file:
+        file.write(compress(content))
+if zstandard is not None:
+    files['.zst'] = filename + '.zst'
+    with open(files['.zst'], 'wb') as file:
+        file.write(zstandard.ZstdCompressor().compress(content))
+else:
+    print('zstandard not installed, .zst skipped')
+del content
+
+# %% benchmark
+reference = read_pattern(filename)[1]  # jit warm up
+print('{:6s} {:>10s} {:>8s} {:>10s} {:>10s} {:>12s}'.format('format', 'size [MB]', 'ratio', 'cold [s]', 'warm [s]',
+                                                           'disk [s]'))
+for extension, name in files.items():
+    cold, warm = [], []
+    for repetition in range(repetitions):
+        drop_cache(name)
+        t0 = time.perf_counter()
+        header, dataMatrix, found = read_pattern(name)
+        cold.append(time.perf_counter() - t0)
+        t0 = time.perf_counter()
+        read_pattern(name)
+        warm.append(time.perf_counter() - t0)
+    if not np.array_equal(dataMatrix, reference):
+        print(extension, 'differs from the uncompressed file')
+    size = os.path.getsize(name)
+    # decoding (warm) plus reading the file at the disk bandwidth
+    print('{:6s} {:10.2f} {:8.2f} {:10.3f} {:10.3f} {:12.3f}'.format(extension or 'ffs', size / 1e6,
+                                                                     os.path.getsize(filename) / size, min(cold),
+                                                                     min(warm), min(warm) + size / disk_bandwidth))
+print('disk [s]: estimated load time on a {:.0f} MB/s disk'.format(disk_bandwidth / 1e6))
+for name in files.values():
+    os.remove(name)
+os.rmdir(folder)
@@ -0,0 +1,82 @@
+# Simone Mencarelli
+# October 2026
+# Benchmark of the block formatting ffsWrite (serial and parallel) against the original row by row writer,
+# the output files must be byte identical.
+# run from the repository root with: python -m benchmarks.ffs_writer
+
+# %% includes
+import filecmp
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from ffsFileWriter import ffsWrite
+
+# %% User input
+phiSamples = 1801
+thetaSamples = 601
+workers = os.cpu_count()
+
+
+# %% original writer (the loop that was in ffsFileWriter.ffsWrite)
+def legacy_ffs_write(theta, phi, e_theta, e_phi, num_phi, num_theta, filename, radiated_power=1,
+                     accepted_power=1, stimulated_power=1, frequency=10e9):
+    pre = '// CST Farfield Source File\n \n// Version:\n3.0 \n\n// Data Type\nFarfield \n\n// #Frequencies\n1 \n\n// Position\n0.000000e+00 0.000000e+00 0.000000e+00 \n\n// zAxis\n0.000000e+00 0.000000e+00 1.000000e+00 \n\n// xAxis\n1.000000e+00 0.000000e+00 0.000000e+00 \n'
+    power = '\n// Radiated/Accepted/Stimulated Power , Frequency \n'
+    samples = '\n\n// >> Total #phi samples, total #theta samples \n'
+    pattern = '\n// >> Phi, Theta, Re(E_Theta), Im(E_Theta), Re(E_Phi), Im(E_Phi): \n'
+    with open(filename, 'w') as file:
+        file.write(pre)
+        file.write(power)
+        file.write("{:.6e}".format(radiated_power) + '\n')
+        file.write("{:.6e}".format(accepted_power) + '\n')
+        file.write("{:.6e}".format(stimulated_power) + '\n')
+        file.write("{:.6e}".format(frequency) + '\n')
+        file.write(samples)
+        file.write(str(num_phi) + ' ' + str(num_theta) + '\n')
+        file.write(pattern)
+        for i in range(len(theta)):
+            file.write("{0:10.4f} {1:10.4f} {2:16.8e} {3:16.8e} {4:16.8e} {5:16.8e} \n".format(phi[i],
+                                                                                               theta[i],
+                                                                                               np.real(e_theta[i]),
+                                                                                               np.imag(e_theta[i]),
+                                                                                               np.real(e_phi[i]),
+                                                                                               np.imag(e_phi[i])))
+
+
+if __name__ == '__main__':
+    # %% synthetic pattern (same layout as dummyPatterns.py)
+    theta = np.linspace(0, 90, thetaSamples)
+    phi = np.linspace(0, 360, phiSamples)
+    T, P = np.meshgrid(theta, phi)
+    rng = np.random.default_rng(0)
+    e_theta = rng.standard_normal(T.size) * 1e3 + 1j * rng.standard_normal(T.size)
+    e_phi = rng.standard_normal(T.size) * 1e-3 + 1j * rng.standard_normal(T.size)
+    e_phi[::97] = 0
+    folder = tempfile.mkdtemp()
+    rows = T.size
+    arguments = (T.reshape(-1), P.reshape(-1), e_theta, e_phi, phiSamples, thetaSamples)
+
+    # %% benchmark
+    t0 = time.perf_counter()
+    legacy_ffs_write(*arguments, os.path.join(folder, 'legacy.ffs'), 1.5, 2.5, 3.5, 1e10)
+    t_legacy = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    ffsWrite(*arguments, os.path.join(folder, 'serial.ffs'), 1.5, 2.5, 3.5, 1e10)
+    t_serial = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    ffsWrite(*arguments, os.path.join(folder, 'parallel.ffs'), 1.5, 2.5, 3.5, 1e10, workers=workers)
+    t_parallel = time.perf_counter() - t0
+
+    print('{} rows, {:.1f} MB'.format(rows, os.path.getsize(os.path.join(folder, 'legacy.ffs')) / 1e6))
+    print('row by row       : {:10.0f} rows/s'.format(rows / t_legacy))
+    print('blocks           : {:10.0f} rows/s ({:.1f} x)'.format(rows / t_serial, t_legacy / t_serial))
+    print('blocks, {:2d} procs: {:10.0f} rows/s ({:.1f} x)'.format(workers, rows / t_parallel, t_legacy / t_parallel))
+    print('serial identical  :', filecmp.cmp(os.path.join(folder, 'legacy.ffs'), os.path.join(folder, 'serial.ffs'),
+                                             shallow=False))
+    print('parallel identical:', filecmp.cmp(os.path.join(folder, 'legacy.ffs'),
+                                             os.path.join(folder, 'parallel.ffs'), shallow=False))
+    for name in ('legacy.ffs', 'serial.ffs', 'parallel.ffs'):
+        os.remove(os.path.join(folder, name))
@@ -0,0 +1,55 @@
+# Simone Mencarelli
+# October 2026
+# Time of the complex field interpolation on the deformedAntennaAIR mesh: Aperture.mesh_field_pattern (one stencil
+# for the real and imaginary parts of E_Theta and E_Phi, Ludwig 3 projection and gain in the same pass) against four
+# separate real interpolations and the four channels as a stack (interpolator_v3.sphere_interp_stack).
+# run from the repository root with: python -m benchmarks.field_interpolation
+
+# %% includes
+import time
+
+import numpy as np
+
+from benchmarks.air_geometry import air_mesh
+from farFieldCST import Aperture
+from interpolator_v3 import sphere_interp_fused, sphere_interp_stack
+
+# %% User input
+reference_pattern = 'farfield.ffs'
+# deformedAntennaAIR uses 1000001
+doppler_samples = 50001
+
+# %% benchmark
+T, P = air_mesh(doppler_samples)
+print('mesh {} x {}, {:.1f} M points'.format(*T.shape, T.size / 1e6))
+antenna = Aperture(reference_pattern, cache=False)
+theta, phi = antenna.Theta[0, :], antenna.Phi[:, 0]
+fields = antenna.fields(0)
+channels = np.stack((fields[:, :, 0].real, fields[:, :, 0].imag, fields[:, :, 1].real, fields[:, :, 1].imag))
+# warm up
+antenna.mesh_field_pattern(T[:10], P[:10], polarization='y')
+sphere_interp_stack(T[:10], P[:10], theta, phi, channels)
+
+t0 = time.perf_counter()
+co, cross, gain = antenna.mesh_field_pattern(T, P, polarization='y')
+t_fields = time.perf_counter() - t0
+
+t0 = time.perf_counter()
+separate = [sphere_interp_fused(T, P, theta, phi, np.ascontiguousarray(channel)) for channel in channels]
+t_separate = time.perf_counter() - t0
+
+t0 = time.perf_counter()
+stack = sphere_interp_stack(T, P, theta, phi, channels)
+t_stack = time.perf_counter() - t0
+
+print('{:40s} {:10.3f} s'.format('mesh_field_pattern (co, cross, gain)', t_fields))
+print('{:40s} {:10.3f} s'.format('4 real passes (E_Theta, E_Phi only)', t_separate))
+print('{:40s} {:10.3f} s'.format('4 channel stack (E_Theta, E_Phi only)', t_stack))
+# the same fields from the separate passes, projected
+e_theta, e_phi = separate[0] + 1j * separate[1], separate[2] + 1j * separate[3]
+co_separate = e_theta * np.sin(P) + e_phi * np.cos(P)
+# the separate passes do not reverse the samples folded across the pole (theta within two steps of it)
+error = np.abs(co - co_separate)
+pole = T < 2 * (theta[1] - theta[0])
+print('max difference co-polar field {:.2e}, {:.2e} away from the pole (peak {:.2f})'.format(
+    np.max(error), np.max(error[~pole]), np.max(np.abs(co))))
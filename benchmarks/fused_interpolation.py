@@ -0,0 +1,106 @@
+# Simone Mencarelli
+# October 2026
+# Peak memory and time of sphere_interp (eight full size index arrays and np.where copies) against the fused kernel
+# of interpolator_v3 (stencils computed per point) on the deformedAntennaAIR mesh. Each kernel runs in a fresh
+# process on the same mesh, the peak resident memory above the loaded inputs is reported.
+# run from the repository root with: python -m benchmarks.fused_interpolation
+
+# %% includes
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+# %% User input
+reference_pattern = 'farfield.ffs'
+# deformedAntennaAIR uses 1000001 (101 M points), sphere_interp needs more than 16 GB there
+doppler_samples = 100001
+KERNELS = ('sphere_interp', 'fused')
+
+
+# %% functions
+def resident(name='VmRSS'):
+    """
+    :param name: VmRSS current, VmHWM peak resident memory
+    :return: resident memory [B] (linux)
+    """
+    with open('/proc/self/status') as file:
+        for line in file:
+            if line.startswith(name + ':'):
+                return int(line.split()[1]) * 1024
+
+
+def reset_peak():
+    """
+    resets the peak resident memory (VmHWM) to the current one, the compilation peaks are not counted (linux)
+    """
+    with open('/proc/self/clear_refs', 'w') as file:
+        file.write('5')
+
+
+def run(kernel, folder):
+    """
+    evaluates the gain with one kernel and saves it in folder, prints time and peak memory
+    :param kernel: 'sphere_interp' or 'fused'
+    :param folder: folder with the T.npy, P.npy mesh
+    :return:
+    """
+    from farFieldCST import Aperture
+    from interpolator_v2 import sphere_interp
+    from interpolator_v3 import sphere_interp_fused
+
+    T, P = np.load(os.path.join(folder, 'T.npy')), np.load(os.path.join(folder, 'P.npy'))
+    antenna = Aperture(reference_pattern, cache=False)
+    theta, phi, G = np.ascontiguousarray(antenna.Theta[0, :]), np.ascontiguousarray(antenna.Phi[:, 0]), antenna.G
+    if kernel == 'sphere_interp':
+        def gain(T, P):
+            return sphere_interp(T.reshape(-1), P.reshape(-1), theta, phi, G.T, np.zeros(T.size), True)
+    else:
+        def gain(T, P):
+            return sphere_interp_fused(T, P, theta, phi, G, True)
+    gain(T[:10], P[:10])  # warm up
+    reset_peak()
+    before = resident()
+    t0 = time.perf_counter()
+    out = gain(T, P)
+    elapsed = time.perf_counter() - t0
+    peak = resident('VmHWM') - before
+    np.save(os.path.join(folder, kernel + '.npy'), out.reshape(-1))
+    print('{:16s} {:10.3f} {:16.1f} {:16.1f}'.format(kernel, elapsed, peak / 1e6, out.nbytes / 1e6), flush=True)
+
+
+# %% benchmark
+if __name__ == '__main__':
+    if len(sys.argv) > 2:
+        run(sys.argv[1], sys.argv[2])
+        sys.exit()
+    from benchmarks.air_geometry import air_mesh
+
+    folder = tempfile.mkdtemp()
+    T, P = air_mesh(doppler_samples)
+    np.save(os.path.join(folder, 'T.npy'), T)
+    np.save(os.path.join(folder, 'P.npy'), P)
+    print('mesh {} x {}, {:.1f} M points, inputs {:.1f} MB'.format(*T.shape, T.size / 1e6,
+                                                                   (T.nbytes + P.nbytes) / 1e6))
+    del T, P
+    print('{:16s} {:>10s} {:>16s} {:>16s}'.format('kernel', 'time [s]', 'peak extra [MB]', 'output [MB]'))
+    for kernel in KERNELS:
+        # sphere_interp prints its edge case, the timing is the last line
+        print(subprocess.run([sys.executable, '-m', 'benchmarks.fused_interpolation', kernel, folder],
+                             stdout=subprocess.PIPE, text=True, check=True).stdout.splitlines()[-1])
+    reference, fused = [np.load(os.path.join(folder, kernel + '.npy')) for kernel in KERNELS]
+    # sphere_interp wraps to the wrong sample in the last phi cell when the last phi sample repeats the first, and
+    # misplaces points lying exactly on a phi sample (the cell offset wraps to 2 pi)
+    from farFieldCST import Aperture
+
+    antenna = Aperture(reference_pattern, cache=False)
+    P = np.load(os.path.join(folder, 'P.npy')).reshape(-1)
+    last = P % (2 * np.pi) > antenna.Phi[-2, 0]
+    error = np.abs(fused - reference) / antenna.max_gain()
+    print('max relative difference {:.2e}, {:.2e} outside the last phi cell'.format(np.max(error),
+                                                                                   np.max(error[~last])))
+    shutil.rmtree(folder)
@@ -0,0 +1,63 @@
+# Simone Mencarelli
+# October 2026
+# Reference and distorted gain on the deformedAntennaAIR mesh: two sphere_interp calls (the stencils are computed
+# twice), two mesh_gain_pattern calls (coefficient table lookups per point) and one interpolation plan applied to both
+# patterns, also reused over a batch.
+# run from the repository root with: python -m benchmarks.interpolation_plan
+
+# %% includes
+import time
+
+import numpy as np
+
+from benchmarks.air_geometry import air_mesh
+from farFieldCST import Aperture
+from interpolator_v2 import sphere_interp
+
+# %% User input
+reference_pattern = 'farfield.ffs'
+# deformedAntennaAIR uses 1000001
+doppler_samples = 100001
+batch = 8
+
+# %% benchmark
+T, P = air_mesh(doppler_samples)
+print('mesh {} x {}, {:.1f} M points'.format(*T.shape, T.size / 1e6))
+ant_ref = Aperture(reference_pattern, cache=False, coefficients=True)
+ant_dist = Aperture(reference_pattern, cache=False, coefficients=True)
+# warm up of the plan kernels
+ant_ref.plan_gain_pattern(ant_ref.interpolation_plan(T[:10], P[:10]))
+
+theta, phi = np.ascontiguousarray(ant_ref.Theta[0, :]), np.ascontiguousarray(ant_ref.Phi[:, 0])
+sphere_interp(T[:10].reshape(-1), P[:10].reshape(-1), theta, phi, ant_ref.G.T, np.zeros(T[:10].size), True)
+t0 = time.perf_counter()
+G_ref = sphere_interp(T.reshape(-1), P.reshape(-1), theta, phi, ant_ref.G.T, np.zeros(T.size), True).reshape(T.shape)
+G_dist = sphere_interp(T.reshape(-1), P.reshape(-1), theta, phi, ant_dist.G.T, np.zeros(T.size), True)
+t_sphere = time.perf_counter() - t0
+
+t0 = time.perf_counter()
+ant_ref.mesh_gain_pattern(T, P)
+ant_dist.mesh_gain_pattern(T, P)
+t_mesh = time.perf_counter() - t0
+
+t0 = time.perf_counter()
+plan = ant_ref.interpolation_plan(T, P)
+t_plan = time.perf_counter() - t0
+t0 = time.perf_counter()
+G_ref_plan = ant_ref.plan_gain_pattern(plan)
+t_apply = time.perf_counter() - t0
+G_dist_plan = ant_dist.plan_gain_pattern(plan)
+
+print('{:40s} {:10.3f} s'.format('sphere_interp x 2', t_sphere))
+print('{:40s} {:10.3f} s'.format('mesh_gain_pattern x 2', t_mesh))
+print('{:40s} {:10.3f} s'.format('plan + plan_gain_pattern x 2', t_plan + 2 * t_apply))
+print('{:40s} {:10.3f} s  ({:.1f} MB)'.format('  plan', t_plan, (plan.t.nbytes + plan.p.nbytes + plan.x_t.nbytes +
+                                                                 plan.x_p.nbytes) / 1e6))
+print('{:40s} {:10.3f} s'.format('  plan_gain_pattern', t_apply))
+print('{:40s} {:10.3f} s'.format('batch of {}: sphere_interp'.format(batch), t_sphere / 2 * batch))
+print('{:40s} {:10.3f} s'.format('batch of {}: mesh_gain_pattern'.format(batch), t_mesh / 2 * batch))
+print('{:40s} {:10.3f} s'.format('batch of {}: plan'.format(batch), t_plan + batch * t_apply))
+# sphere_interp wraps to the wrong sample in the last phi cell when the last phi sample repeats the first
+last = P % (2 * np.pi) > ant_ref.Phi[-2, 0]
+error = np.abs(np.maximum(G_ref, 0) - G_ref_plan) / ant_ref.max_gain()
+print('max relative difference {:.2e}, {:.2e} outside the last phi cell'.format(np.max(error), np.max(error[~last])))
@@ -0,0 +1,105 @@
+# Simone Mencarelli
+# October 2026
+# Pencil beam pattern (uniform 2 m x 0.3 m aperture at 10 GHz, analytic) exported to ffs on three theta grids: uniform
+# fine (the step needed in the main beam everywhere), non-uniform (the fine step in the main beam only, growing to a
+# coarse step outside) and uniform coarse with the same number of samples of the non-uniform one. Every file is loaded
+# by an Aperture and the interpolated gain is compared with the analytic one in and outside the main beam.
+# run from the repository root with: python -m benchmarks.nonuniform_axes
+
+# %% includes
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from farFieldCST import Aperture
+from ffsFileWriter import ffsWrite
+
+# %% User input
+frequency = 10e9
+length = 2.0  # along x [m]
+width = 0.3  # along y [m]
+fine_step = 0.05  # theta step in the main beam [deg]
+beam_extent = 4.0  # theta extent of the fine step [deg]
+growth = 1.15  # step growth outside the main beam
+coarse_step = 5.0  # largest theta step [deg]
+phi_step = 2.0  # [deg]
+query_points = 2000000
+
+
+# %% functions
+def pencil_beam(theta, phi):
+    """
+    far field of a uniformly illuminated y polarized rectangular aperture (peak 1)
+    :param theta: theta [rad]
+    :param phi: phi [rad]
+    :return: E_Theta, E_Phi
+    """
+    wavelength = 3e8 / frequency
+    u = np.sin(theta) * np.cos(phi)
+    v = np.sin(theta) * np.sin(phi)
+    amplitude = np.sinc(length * u / wavelength) * np.sinc(width * v / wavelength) * (1 + np.cos(theta)) / 2
+    return amplitude * np.sin(phi) + 0j, amplitude * np.cos(phi) + 0j
+
+
+def nonuniform_theta():
+    """
+    :return: theta axis [deg], fine_step up to beam_extent, steps growing to coarse_step and coarse up to 180
+    """
+    axis = list(np.arange(0, beam_extent + fine_step / 2, fine_step))
+    step = fine_step
+    while step < coarse_step:
+        step = min(step * growth, coarse_step)
+        axis.append(axis[-1] + step)
+    tail = int(np.ceil((180 - axis[-1]) / coarse_step))
+    return np.round(np.concatenate((axis, np.linspace(axis[-1], 180, tail + 1)[1:])), 4)
+
+
+def export(theta_axis, filename):
+    """
+    writes the pencil beam sampled on a theta axis (and the phi_step phi axis) to an ffs file
+    :param theta_axis: theta axis [deg]
+    :param filename: output file
+    :return: number of samples
+    """
+    phi_axis = np.arange(0, 360, phi_step)
+    Theta, Phi = np.meshgrid(theta_axis, phi_axis)
+    e_theta, e_phi = pencil_beam(np.radians(Theta.ravel()), np.radians(Phi.ravel()))
+    # gain of the peak 4 pi A / lambda^2
+    peak = 4 * np.pi * length * width / (3e8 / frequency) ** 2
+    ffsWrite(Theta.ravel(), Phi.ravel(), e_theta, e_phi, len(phi_axis), len(theta_axis), filename,
+             radiated_power=2 * np.pi / (120 * np.pi * peak), frequency=frequency)
+    return Theta.size
+
+
+# %% benchmark
+if __name__ == '__main__':
+    peak = 4 * np.pi * length * width / (3e8 / frequency) ** 2
+    grids = {'uniform fine': np.arange(0, 180 + fine_step / 2, fine_step),
+             'non-uniform': nonuniform_theta()}
+    grids['uniform coarse'] = np.linspace(0, 180, len(grids['non-uniform']))
+    rng = np.random.default_rng(0)
+    # main beam (up to the first nulls along x and y) and the rest of the upper hemisphere
+    beam = (np.radians(rng.uniform(0, 5.5, query_points)), rng.uniform(0, 2 * np.pi, query_points))
+    outside = (np.radians(rng.uniform(5.5, 90, query_points)), rng.uniform(0, 2 * np.pi, query_points))
+    references = [np.abs(pencil_beam(*points)[0]) ** 2 + np.abs(pencil_beam(*points)[1]) ** 2 for points in
+                  (beam, outside)]
+    folder = tempfile.mkdtemp()
+    print('{:16s} {:>8s} {:>10s} {:>9s} {:>13s} {:>13s} {:>10s}'.format(
+        'theta grid', 'theta', 'samples', 'file [MB]', 'beam error', 'outside error', 'query [s]'))
+    for name, theta_axis in grids.items():
+        filename = os.path.join(folder, name.replace(' ', '_') + '.ffs')
+        samples = export(theta_axis, filename)
+        antenna = Aperture(filename, cache=False)
+        antenna.mesh_gain_pattern(beam[0][:3], beam[1][:3])  # warm up
+        errors = []
+        t0 = time.perf_counter()
+        for points, reference in zip((beam, outside), references):
+            errors.append(np.max(np.abs(antenna.mesh_gain_pattern(*points) / peak - reference)))
+        t_query = time.perf_counter() - t0
+        # errors relative to the peak gain
+        print('{:16s} {:8d} {:10d} {:9.1f} {:13.2e} {:13.2e} {:10.3f}'.format(
+            name, len(theta_axis), samples, os.path.getsize(filename) / 1e6, *errors, t_query))
+    shutil.rmtree(folder)
@@ -0,0 +1,46 @@
+# Simone Mencarelli
+# October 2026
+# Batch conversion throughput of patternConverter.convert: copies of the reference pattern converted to every format
+# in the calling process and in a pool of spawned workers, the converted files of both runs must be identical.
+# run from the repository root with: python -m benchmarks.pattern_converter
+
+# %% includes
+import filecmp
+import os
+import shutil
+import tempfile
+import time
+
+from patternConverter import convert, FORMATS
+
+# %% User input
+reference_pattern = 'farfield.ffs'
+copies = 8
+workers = max(2, os.cpu_count())
+
+# %% benchmark
+if __name__ == '__main__':
+    folder = tempfile.mkdtemp()
+    source = os.path.join(folder, 'source')
+    os.makedirs(source)
+    for ii in range(copies):
+        shutil.copy(reference_pattern, os.path.join(source, 'pattern{}.ffs'.format(ii)))
+    print('{} copies of {}, {:.1f} MB'.format(copies, reference_pattern,
+                                              copies * os.path.getsize(reference_pattern) / 1e6))
+    print('{:6s} {:>8s} {:>12s} {:>12s} {:>10s}'.format('format', 'workers', 'files/s', 'MB/s read', 'identical'))
+    for to in FORMATS:
+        outputs = []
+        for processes in (1, workers):
+            destination = os.path.join(folder, '{}_{}'.format(to, processes))
+            t0 = time.perf_counter()
+            results = convert(source, destination, to, processes)
+            elapsed = time.perf_counter() - t0
+            if any(result[4] is not None for result in results):
+                raise RuntimeError('conversion failed: ' + str([result[4] for result in results]))
+            outputs.append(sorted(result[1] for result in results))
+            identical = '' if len(outputs) == 1 else str(all(filecmp.cmp(first, second, shallow=False)
+                                                               for first, second in zip(*outputs)))
+            print('{:6s} {:8d} {:12.2f} {:12.2f} {:>10s}'.format(to, processes, len(results) / elapsed,
+                                                                sum(result[2] for result in results) / 1e6 / elapsed,
+                                                                identical))
+    shutil.rmtree(folder)
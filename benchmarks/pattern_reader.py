@@ -0,0 +1,87 @@
+# Simone Mencarelli
+# October 2026
+# Throughput and peak memory benchmark of the streaming ffs parser (patternReader) against the original
+# line by line parser.
+# run from the repository root with: python -m benchmarks.pattern_reader
+
+# %% includes
+import os
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from farFieldCST import ffsLoader
+from ffsFileWriter import ffsWrite
+from patternReader import read_pattern
+
+# %% User input
+phiSamples = 721
+thetaSamples = 361
+
+
+# %% original parser (the loop that was in farFieldCST.ffsLoader)
+def legacy_ffs_body(filename, phiSamples, thetaSamples):
+    with open(filename, 'r') as file:
+        content = file.read()
+    content = content.split('\n')
+    dataMatrix = np.zeros((phiSamples * thetaSamples, 6))
+    for i in range(len(content)):
+        if "Phi, Theta, Re(E_Theta), Im(E_Theta), Re(E_Phi), Im(E_Phi)" in content[i]:
+            for j in range(phiSamples * thetaSamples):
+                dataline = content[i + j + 1]
+                dataline = dataline.split(" ")
+                while "" in dataline:
+                    dataline.remove("")
+                dataline = np.array(dataline[0:6], dtype=float).reshape((1, 6))
+                dataMatrix[j, :] = dataline
+    return dataMatrix
+
+
+# %% synthetic pattern
+theta = np.linspace(0, 180, thetaSamples)
+phi = np.linspace(0, 360, phiSamples)
+T, P = np.meshgrid(theta, phi)
+rng = np.random.default_rng(0)
+e_theta = rng.standard_normal(T.size) + 1j * rng.standard_normal(T.size)
+e_phi = rng.standard_normal(T.size) + 1j * rng.standard_normal(T.size)
+filename = os.path.join(tempfile.mkdtemp(), 'bench.ffs')
+ffsWrite(T.reshape(-1), P.reshape(-1), e_theta, e_phi, phiSamples, thetaSamples, filename)
+rows = phiSamples * thetaSamples
+print('file size: {:.1f} MB, {} rows'.format(os.path.getsize(filename) / 1e6, rows))
+
+# %% benchmark
+ffsLoader(filename)  # jit warm up (cached on disk afterwards)
+t0 = time.perf_counter()
+Phi, Theta, E_Phi, E_Theta = ffsLoader(filename)[0:4]
+t_bulk = time.perf_counter() - t0
+
+t0 = time.perf_counter()
+dataMatrix = legacy_ffs_body(filename, phiSamples, thetaSamples)
+t_legacy = time.perf_counter() - t0
+
+print('line by line: {:12.0f} rows/s'.format(rows / t_legacy))
+print('streaming   : {:12.0f} rows/s'.format(rows / t_bulk))
+print('speedup     : {:12.1f} x'.format(t_legacy / t_bulk))
+
+# %% same meshgrids
+print('Phi equal     :', np.array_equal(Phi, dataMatrix[:, 0].reshape((phiSamples, thetaSamples))))
+print('Theta equal   :', np.array_equal(Theta, dataMatrix[:, 1].reshape((phiSamples, thetaSamples))))
+print('E_Theta equal :', np.array_equal(E_Theta, (dataMatrix[:, 2] + 1j * dataMatrix[:, 3]).reshape((phiSamples, thetaSamples))))
+print('E_Phi equal   :', np.array_equal(E_Phi, (dataMatrix[:, 4] + 1j * dataMatrix[:, 5]).reshape((phiSamples, thetaSamples))))
+
+# %% peak memory of the data matrix parsing (numpy allocations are traced too)
+tracemalloc.start()
+header, dataMatrix, found = read_pattern(filename)
+streaming_peak = tracemalloc.get_traced_memory()[1]
+tracemalloc.stop()
+del dataMatrix
+tracemalloc.start()
+dataMatrix = legacy_ffs_body(filename, phiSamples, thetaSamples)
+legacy_peak = tracemalloc.get_traced_memory()[1]
+tracemalloc.stop()
+print('data matrix      : {:8.1f} MB'.format(dataMatrix.nbytes / 1e6))
+print('streaming peak   : {:8.1f} MB'.format(streaming_peak / 1e6))
+print('line by line peak: {:8.1f} MB'.format(legacy_peak / 1e6))
+os.remove(filename)
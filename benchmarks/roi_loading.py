@@ -0,0 +1,51 @@
+# Simone Mencarelli
+# October 2026
+# Load time and memory of a pattern decoded whole and through a theta / phi window (region of interest), the rows
+# outside the window are skipped without being parsed.
+# run from the repository root with: python -m benchmarks.roi_loading
+
+# %% includes
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from ffsFileWriter import ffsWrite
+from patternReader import read_pattern
+
+# %% User input
+phiSamples = 1441
+thetaSamples = 721
+# windows [deg]: (theta_min, theta_max) or (theta_min, theta_max, phi_min, phi_max)
+windows = [(0, 10), (20, 40), (20, 40, 80, 100)]
+
+# %% synthetic pattern
+theta = np.linspace(0, 180, thetaSamples)
+phi = np.linspace(0, 360, phiSamples)
+T, P = np.meshgrid(theta, phi)
+u = np.sin(T * np.pi / 180) * np.cos(P * np.pi / 180)
+F = np.sinc(20 * u) + 0j
+filename = os.path.join(tempfile.mkdtemp(), 'bench.ffs')
+ffsWrite(T.reshape(-1), P.reshape(-1), F.reshape(-1), F.reshape(-1), phiSamples, thetaSamples, filename)
+print('file size: {:.1f} MB, {} rows'.format(os.path.getsize(filename) / 1e6, phiSamples * thetaSamples))
+
+# %% benchmark
+read_pattern(filename, window=windows[0])  # jit warm up
+t0 = time.perf_counter()
+header, full, found = read_pattern(filename)
+t_full = time.perf_counter() - t0
+full = full.reshape((phiSamples, thetaSamples, -1))
+print('{:20s} {:>10s} {:>10s} {:>12s} {:>8s}'.format('window [deg]', 'rows', 'time [s]', 'matrix [MB]', 'speedup'))
+print('{:20s} {:10d} {:10.3f} {:12.1f} {:8.1f}'.format('full', found, t_full, full.nbytes / 1e6, 1))
+for window in windows:
+    t0 = time.perf_counter()
+    header, dataMatrix, found = read_pattern(filename, window=window)
+    t_window = time.perf_counter() - t0
+    theta_lo, theta_hi, phi_lo, phi_hi = header['window']
+    same = np.array_equal(dataMatrix.reshape((phi_hi - phi_lo, theta_hi - theta_lo, -1)),
+                          full[phi_lo:phi_hi, theta_lo:theta_hi])
+    print('{:20s} {:10d} {:10.3f} {:12.1f} {:8.1f} {}'.format(str(window), found, t_window, dataMatrix.nbytes / 1e6,
+                                                              t_full / t_window, '' if same else 'differs'))
+os.remove(filename)
+os.rmdir(os.path.dirname(filename))
@@ -0,0 +1,55 @@
+# Simone Mencarelli
+# October 2026
+# Gain on the 3501 x 3500 rectilinear theta phi grid of the farFieldCST self test: Aperture.grid_gain_pattern (1d
+# stencils computed once per query axis, two banded products) against mesh_gain_pattern on the meshgrid (a cell
+# lookup per point in the coefficient table) and the per point stencils (interpolator_v3.sphere_interp_fused).
+# run from the repository root with: python -m benchmarks.separable_grid
+
+# %% includes
+import time
+
+import numpy as np
+
+from farFieldCST import Aperture
+from interpolator_v3 import sphere_interp_fused
+
+# %% User input
+reference_pattern = 'farfield.ffs'
+theta = np.linspace(-np.pi / 2, np.pi / 2, 3501)
+phi = np.linspace(0, 2 * np.pi, 3500)
+repetitions = 3
+
+# %% benchmark
+antenna = Aperture(reference_pattern, cache=False, coefficients=True)
+# warm up
+antenna.grid_gain_pattern(theta[:3], phi[:3])
+antenna.mesh_gain_pattern(theta[:3], phi[:3])
+
+
+def best_time(function):
+    """
+    :param function: callable without arguments
+    :return: best time of repetitions calls, last result
+    """
+    best = np.inf
+    for ii in range(repetitions):
+        t0 = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+t_grid, grid = best_time(lambda: antenna.grid_gain_pattern(theta, phi))
+T, P = np.meshgrid(theta, phi)
+t_table, table = best_time(lambda: antenna.mesh_gain_pattern(T, P))
+theta_ax, phi_ax = antenna.Theta[0, :], antenna.Phi[:, 0]
+# the same rearrangement for negative theta of mesh_gain_pattern
+T_r, P_r = np.abs(T), np.where(T < 0, (P + np.pi) % (2 * np.pi), P)
+t_stencil, stencil = best_time(lambda: sphere_interp_fused(T_r, P_r, theta_ax, phi_ax, antenna.G))
+
+print('grid {} x {}, {:.1f} M points'.format(len(phi), len(theta), T.size / 1e6))
+print('{:40s} {:10.3f} s'.format('per point stencils (sphere_interp_fused)', t_stencil))
+print('{:40s} {:10.3f} s'.format('mesh_gain_pattern (coefficient table)', t_table))
+print('{:40s} {:10.3f} s'.format('grid_gain_pattern (separable)', t_grid))
+print('speed up {:.1f} x, max relative difference {:.2e}'.format(t_table / t_grid,
+                                                                np.max(np.abs(grid - table)) / np.max(table)))
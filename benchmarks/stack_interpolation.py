@@ -0,0 +1,51 @@
+# Simone Mencarelli
+# October 2026
+# Throughput of the stacked interpolation (interpolator_v3.sphere_interp_stack, one stencil per query point for the
+# whole stack) on the deformedAntennaAIR mesh for N = 1, 8, 64 patterns, against N separate passes and sphere_interp.
+# run from the repository root with: python -m benchmarks.stack_interpolation
+
+# %% includes
+import time
+
+import numpy as np
+
+from benchmarks.air_geometry import air_mesh
+from farFieldCST import Aperture
+from interpolator_v2 import sphere_interp
+from interpolator_v3 import sphere_interp_stack
+
+# %% User input
+reference_pattern = 'farfield.ffs'
+doppler_samples = 10001
+stacks = (1, 8, 64)
+
+# %% Monte Carlo like stack, the reference gain with random ripples
+T, P = air_mesh(doppler_samples)
+antenna = Aperture(reference_pattern, cache=False)
+theta, phi = antenna.Theta[0, :], antenna.Phi[:, 0]
+rng = np.random.default_rng(0)
+G = antenna.G * (1 + 0.1 * rng.standard_normal((max(stacks),) + antenna.G.shape))
+print('mesh {} x {}, {:.2f} M points'.format(*T.shape, T.size / 1e6))
+
+# %% benchmark
+# warm up
+sphere_interp_stack(T[:10], P[:10], theta, phi, G[:1])
+theta_ax, phi_ax = np.ascontiguousarray(theta), np.ascontiguousarray(phi)
+sphere_interp(T[:10].reshape(-1), P[:10].reshape(-1), theta_ax, phi_ax, antenna.G.T, np.zeros(T[:10].size), True)
+t0 = time.perf_counter()
+reference = sphere_interp(T.reshape(-1), P.reshape(-1), theta_ax, phi_ax, antenna.G.T, np.zeros(T.size), True)
+t_sphere = time.perf_counter() - t0
+t0 = time.perf_counter()
+single = sphere_interp_stack(T, P, theta, phi, G[:1])
+t_single = time.perf_counter() - t0
+print('sphere_interp (1 pattern) {:.3f} s, {:.1f} M points/s'.format(t_sphere, T.size / t_sphere / 1e6))
+print('{:>4s} {:>12s} {:>16s} {:>20s} {:>16s}'.format('N', 'time [s]', 'M points/s', 'M pattern values/s',
+                                                      'N passes [s]'))
+for N in stacks:
+    t0 = time.perf_counter()
+    gains = sphere_interp_stack(T, P, theta, phi, G[:N])
+    elapsed = time.perf_counter() - t0
+    print('{:4d} {:12.3f} {:16.2f} {:20.2f} {:16.3f}'.format(N, elapsed, T.size / elapsed / 1e6,
+                                                             N * T.size / elapsed / 1e6, N * t_single))
+# the first pattern of the stack against a single pass
+print('max difference stack / single pass {:.2e}'.format(np.max(np.abs(gains[0] - single[0])) / np.max(G[0])))
@@ -0,0 +1,62 @@
+# Simone Mencarelli
+# October 2026
+# Start up time of a fresh process up to its first mesh_gain_pattern result on a small deformedAntennaAIR mesh
+# (imports, pattern loading, geometry kernels, interpolation), cold (empty numba disk cache, the kernels called compiled)
+# and warm (kernels loaded from the cache filled by the cold run). Each run is a new process with its own
+# NUMBA_CACHE_DIR, so the caches of the repository are not used.
+# run from the repository root with: python -m benchmarks.startup
+
+# %% includes
+import time
+
+t_start = time.perf_counter()
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+# %% User input
+reference_pattern = 'farfield.ffs'
+warm_runs = 3
+
+
+# %% functions
+def run():
+    """
+    first gain of a fresh process, prints the time of the imports and of the first result from the process start
+    :return:
+    """
+    import numpy as np
+    from benchmarks.air_geometry import air_mesh
+    from farFieldCST import Aperture
+
+    t_import = time.perf_counter() - t_start
+    antenna = Aperture(reference_pattern, cache=False)
+    T, P = air_mesh(101, 101)
+    gain = antenna.mesh_gain_pattern(T, P)
+    print('{:10.3f} {:10.3f} {:14.6e}'.format(t_import, time.perf_counter() - t_start, np.sum(gain)))
+
+
+def spawn(cache_folder):
+    """
+    :param cache_folder: numba disk cache folder of the process
+    :return: output line of run()
+    """
+    environment = dict(os.environ, NUMBA_CACHE_DIR=cache_folder)
+    return subprocess.run([sys.executable, '-m', 'benchmarks.startup', 'run'], stdout=subprocess.PIPE, text=True,
+                          check=True, env=environment).stdout.splitlines()[-1]
+
+
+# %% benchmark
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        run()
+        sys.exit()
+    folder = tempfile.mkdtemp()
+    print('{:6s} {:>10s} {:>10s} {:>14s}'.format('cache', 'import [s]', 'first [s]', 'sum of gain'))
+    print('{:6s} {}'.format('cold', spawn(folder)))
+    for ii in range(warm_runs):
+        print('{:6s} {}'.format('warm', spawn(folder)))
+    shutil.rmtree(folder)
@@ -0,0 +1,74 @@
+# Simone Mencarelli
+# October 2026
+# Peak memory and time of the reference and distorted gain on the deformedAntennaAIR mesh, with the full size geometry
+# (as the script did before) and tile by tile with farFieldCST.tiled_gain_patterns (geometry generated per tile).
+# Each mode runs in a fresh process, the peak resident memory above the loaded patterns is reported.
+# run from the repository root with: python -m benchmarks.tiled_gain
+
+# %% includes
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.fused_interpolation import resident, reset_peak
+
+# %% User input
+reference_pattern = 'farfield.ffs'
+# deformedAntennaAIR uses 1000001
+doppler_samples = 200001
+# tile memory budget [B]
+memory = 256e6
+MODES = ('full', 'tiled')
+
+
+# %% functions
+def run(mode, folder):
+    """
+    evaluates the two gains with the full geometry or by tiles and saves them in folder, prints time and peak memory
+    :param mode: 'full' or 'tiled'
+    :param folder: output folder
+    :return:
+    """
+    from benchmarks.air_geometry import air_mesh
+    from farFieldCST import Aperture, tiled_gain_patterns
+
+    ant_ref = Aperture(reference_pattern, cache=False)
+    ant_dist = Aperture(reference_pattern, cache=False)
+    tiled_gain_patterns([ant_ref], air_mesh(11, 101), (11, 101))  # warm up
+    reset_peak()
+    before = resident()
+    t0 = time.perf_counter()
+    if mode == 'full':
+        T, P = air_mesh(doppler_samples)
+        G_ref = ant_ref.mesh_gain_pattern(T, P)
+        G_dist = ant_dist.mesh_gain_pattern(T, P)
+    else:
+        G_ref, G_dist = tiled_gain_patterns([ant_ref, ant_dist],
+                                            lambda start, stop: air_mesh(doppler_samples, 101, start, stop),
+                                            (doppler_samples, 101), memory=memory)
+    elapsed = time.perf_counter() - t0
+    peak = resident('VmHWM') - before
+    np.save(os.path.join(folder, mode + '.npy'), G_dist)
+    print('{:8s} {:10.3f} {:16.1f} {:16.1f}'.format(mode, elapsed, peak / 1e6, (G_ref.nbytes + G_dist.nbytes) / 1e6))
+
+
+# %% benchmark
+if __name__ == '__main__':
+    if len(sys.argv) > 2:
+        run(sys.argv[1], sys.argv[2])
+        sys.exit()
+    folder = tempfile.mkdtemp()
+    print('mesh {} x 101, {:.1f} M points, tile budget {:.0f} MB'.format(doppler_samples, doppler_samples * 101 / 1e6,
+                                                                         memory / 1e6))
+    print('{:8s} {:>10s} {:>16s} {:>16s}'.format('mode', 'time [s]', 'peak extra [MB]', 'outputs [MB]'))
+    for mode in MODES:
+        print(subprocess.run([sys.executable, '-m', 'benchmarks.tiled_gain', mode, folder],
+                             stdout=subprocess.PIPE, text=True, check=True).stdout.splitlines()[-1])
+    full, tiled = [np.load(os.path.join(folder, mode + '.npy')) for mode in MODES]
+    print('tiles equal to the full evaluation:', np.array_equal(full, tiled))
+    shutil.rmtree(folder)
@@ -6,7 +6,7 @@ import matplotlib.pyplot as plt
 # %% includes
 from radartools.spherical_earth_geometry_radar import *
 from radartools.design_functions import *
-from farFieldCST import Aperture
+from farFieldCST import prefetch_apertures, tiled_gain_patterns
 import numpy as np
 from numpy.fft import fft, ifft, fftshift, ifftshift
 
@@ -42,8 +42,9 @@ radarGeo.set_speed(v_s)
 # that's it
 # %% load antenna patterns
 # %% load patterns
-ant_ref = Aperture(reference_pattern)
-ant_dist = Aperture(distorted_pattern)
+# both patterns load while the interpolator compiles, the gains of the large mesh use the coefficient tables
+ant_ref, ant_dist = [future.result() for future in prefetch_apertures([reference_pattern, distorted_pattern],
+                                                                      coefficients=True)]
 
 # %% calculation
 # 1 Doppler Bandwidth (nominal 3dB beamwidth)
@@ -58,21 +59,24 @@ rNF = range_ground_to_slant(rgNF, altitude)
 rgNF, incNF = range_slant_to_ground(rNF, altitude)
 # incidence axis
 incidence = np.linspace(incNF[0], incNF[1], 101)  # random length
-# 3 Incidence Doppler meshgrid
-I, D = np.meshgrid(incidence, doppler)
-# 4 Incidence Azimuth Stationary time
-I, A, Tk = mesh_doppler_to_azimuth(I, D, c / f, v_s, altitude)
-# 5 GCS
-X, Y, Z = mesh_incidence_azimuth_to_gcs(I, A, c / f, v_s, altitude)
-# 6 LCS
-Xl, Yl, Zl = mesh_gcs_to_lcs(X, Y, Z, radarGeo.Bc2s, radarGeo.S_0)
-# 7 LCS spherical
-R, T, P = meshCart2sph(Xl, Yl, Zl)
+
+
+# 3 - 6 geometry of a tile of Doppler rows, evaluated tile by tile (the full size geometry never exists)
+def tile_geometry(start, stop):
+    # 3 Incidence Doppler meshgrid
+    I, D = np.meshgrid(incidence, doppler[start:stop])
+    # 4 Incidence Azimuth Stationary time
+    I, A, Tk = mesh_doppler_to_azimuth(I, D, c / f, v_s, altitude)
+    # 5 GCS
+    X, Y, Z = mesh_incidence_azimuth_to_gcs(I, A, c / f, v_s, altitude)
+    # 6 LCS, the cartesian directions go to the patterns (Aperture.direction_gain_pattern, no meshCart2sph step)
+    Xl, Yl, Zl = mesh_gcs_to_lcs(X, Y, Z, radarGeo.Bc2s, radarGeo.S_0)
+    return Xl, Yl, Zl
+
+
 # 8 Antenna patterns
-T[np.isnan(T)] = 0
-P[np.isnan(P)] = 0  # to be safe
-G_ref = ant_ref.mesh_gain_pattern(T, P)
-G_dist = ant_dist.mesh_gain_pattern(T, P)
+G_ref, G_dist = tiled_gain_patterns([ant_ref, ant_dist], tile_geometry, (len(doppler), len(incidence)))
+I, D = np.meshgrid(incidence, doppler)
 # 9 AIR
 # ifft in azimuth
 air = np.where(np.abs(D) < Bd / 2, G_dist / G_ref, 0)
@@ -6,7 +6,7 @@ import matplotlib.pyplot as plt
 # %% includes
 from radartools.spherical_earth_geometry_radar import *
 from radartools.design_functions import *
-from farFieldCST import Aperture
+from farFieldCST import prefetch_apertures
 import numpy as np
 from numpy.fft import fft, ifft, fftshift, ifftshift
 
@@ -40,8 +40,8 @@ v_s = radarGeo.orbital_speed()
 radarGeo.set_speed(v_s)
 # that's it
 # %% load antenna patterns
-ant_ref = Aperture(reference_pattern)
-ant_dist = Aperture(distorted_pattern)
+# both patterns load while the interpolator compiles
+ant_ref, ant_dist = [future.result() for future in prefetch_apertures([reference_pattern, distorted_pattern])]
 
 # %% calculation
 ## 1 Doppler Bandwidth (nominal 3dB beamwidth)
@@ -69,8 +69,10 @@ R, T, P = meshCart2sph(Xl, Yl, Zl)
 ## 8 Normalized Antenna patterns
 T[np.isnan(T)] = 0
 P[np.isnan(P)] = 0  # to be safe
-G_ref = ant_ref.mesh_gain_pattern(T, P) / ant_ref.max_gain()
-G_dist = ant_dist.mesh_gain_pattern(T, P) / ant_ref.max_gain()
+# the interpolation stencils are computed once for both patterns (same theta phi grid)
+plan = ant_ref.interpolation_plan(T, P)
+G_ref = ant_ref.plan_gain_pattern(plan) / ant_ref.max_gain()
+G_dist = ant_dist.plan_gain_pattern(plan) / ant_ref.max_gain()
 ## 9 Integrand
 # the matched filter amplitude
 H = 1 / (stationary_phase_amplitude_multiplier(I, Tk, c / f, v_s, altitude) * G_ref)
@@ -1,75 +1,27 @@
 # Simone Mencarelli
 # October 23
+# The normal displacement of the shell nodes is resampled on a lambda/3 aperture grid by linear interpolation over
+# the Delaunay triangulation of the nodes. ApertureResampler builds the triangulation and the barycentric weights once
+# as a sparse (grid points, nodes) matrix, resampling any number of displacement vectors is then one sparse product.
 import numpy as np
-import matplotlib.pyplot as plt
-import matplotlib
-from scipy.interpolate import griddata
+from scipy.sparse import csr_matrix
+from scipy.spatial import Delaunay
 
+from mechanicalModelReader import read_deformation
 
-def aperture_distribution(filename, wavelength):
-    """
-
-    """
-    rows = 3312
-    columns = 11
-
-    # %% reader
-    with open(filename, 'r') as file:
-        content = file.read()
-    content = content.split('\n')
-
-    dataMatrix = np.zeros((rows, columns))
-
-    for i in range(len(content)):
-        if "Freq" in content[i]:
-            for j in range(rows):
-                dataline = content[i + j + 1]
-                dataline = dataline.split(" ")
-                if len(dataline) < columns:  # eof
-                    print('eof')
-                    break
-                else:
-                    while "" in dataline:
-                        dataline.remove("")
-                    dataline = np.array(dataline[0:columns], dtype=float).reshape((1, columns))
-                    dataMatrix[j, :] = dataline.astype('float')
-            print('eof')
-    # %%
-    # raw line vectors
-    Xundef = dataMatrix[:, 2]
-    Yundef = dataMatrix[:, 3]
-    Zundef = dataMatrix[:, 4]
-    Xdef = dataMatrix[:, 5]
-    Ydef = dataMatrix[:, 6]
-    Zdef = dataMatrix[:, 7]
-    # %% reconstructing the meshgrid
-    xpoints = 23
-    ypoints = 144
-
-    Xundef = Xundef.reshape((ypoints, xpoints))  # actually y
-    Yundef = Yundef.reshape((ypoints, xpoints))  # actually z
-    Zundef = Zundef.reshape((ypoints, xpoints))  # actually x
-    Xdef = Xdef.reshape((ypoints, xpoints))
-    Ydef = Ydef.reshape((ypoints, xpoints))
-    Zdef = Zdef.reshape((ypoints, xpoints))
-    # %% plotter
-    fig = plt.figure()
-    ax = fig.add_subplot(projection='3d')
-    ax.plot_surface(Xundef, Yundef, Zundef)
-    plt.show()
-    fig = plt.figure()
-    ax = fig.add_subplot(projection='3d')
-    ax.plot_surface(Xdef, Ydef, Zdef)
-    plt.show()
-
-    # %% resample the deformed xy grid to a uniform grid
-    # data to resample and y is z, x is y, and z is x
 
-    deformation = Ydef - Yundef
-    xlim = [np.min(Zdef), np.max(Zdef)]
-    ylim = [np.min(Xdef), np.max(Xdef)]
+# %% functions
 
-    # resample
+def aperture_axes(nodes_x, nodes_y, wavelength):
+    """
+    lambda/3 aperture grid covering the nodes, odd number of samples per axis
+    :param nodes_x: x coordinates of the nodes (file column 7)
+    :param nodes_y: y coordinates of the nodes (file column 5)
+    :param wavelength: wavelength [m]
+    :return: x, y axes
+    """
+    xlim = [np.min(nodes_x), np.max(nodes_x)]
+    ylim = [np.min(nodes_y), np.max(nodes_y)]
     # number of points 1/3 wavelength
     no = np.round((xlim[1] - xlim[0]) / (wavelength / 3)).astype('int')
     if no % 2 == 0:
@@ -79,15 +31,98 @@ def aperture_distribution(filename, wavelength):
     if no % 2 == 0:
         no += 1
     y = np.linspace(0.2, ylim[1], no)
-    X, Y = np.meshgrid(x, y)
-    Z = griddata((Zdef.reshape(-1), Xdef.reshape(-1)), deformation.reshape(-1), (X, Y))
-    Z[np.isnan(Z)] = 0
+    return x, y
+
+
+def resampling_matrix(points, X, Y):
+    """
+    linear interpolation over the Delaunay triangulation of scattered points as a sparse matrix, same values of
+    scipy.interpolate.griddata(points, values, (X, Y), 'linear') for the points inside the convex hull, 0 outside
+    :param points: (n_points, 2) scattered coordinates
+    :param X: query x coordinates, any shape
+    :param Y: query y coordinates, same shape of X
+    :return: (X.size, n_points) csr matrix, 3 barycentric weights per row
+    """
+    triangulation = Delaunay(points)
+    queries = np.column_stack((np.reshape(X, -1), np.reshape(Y, -1)))
+    simplex = triangulation.find_simplex(queries)
+    inside = np.flatnonzero(simplex >= 0)
+    simplex = simplex[inside]
+    # barycentric coordinates from the affine transform of each triangle
+    transform = triangulation.transform[simplex]
+    b = np.einsum('ijk,ik->ij', transform[:, :2], queries[inside] - transform[:, 2])
+    weights = np.column_stack((b, 1 - b.sum(axis=1)))
+    return csr_matrix((weights.reshape(-1), (np.repeat(inside, 3), triangulation.simplices[simplex].reshape(-1))),
+                      shape=(len(queries), len(points)))
 
-    # amplitude mask
-    A = griddata((Zdef.reshape(-1), Xdef.reshape(-1)), np.ones_like(Xdef.reshape(-1)),
-                 (X, Y), 'nearest')
-    A[np.isnan(Z)] = 0
 
-    E = A * np.exp(1j * Z / wavelength * 2 * np.pi)
+# %% resampler class
+class ApertureResampler:
+    def __init__(self, nodes_x, nodes_y, wavelength):
+        """
+        lambda/3 aperture grid of a node layout and its resampling matrix
+        :param nodes_x: x coordinates of the nodes (file column 7)
+        :param nodes_y: y coordinates of the nodes (file column 5)
+        :param wavelength: wavelength [m]
+        :return:
+        """
+        self.nodes = len(nodes_x)
+        self.x, self.y = aperture_axes(nodes_x, nodes_y, wavelength)
+        X, Y = np.meshgrid(self.x, self.y)
+        self.matrix = resampling_matrix(np.column_stack((nodes_x, nodes_y)), X, Y)
+
+    def resample(self, values):
+        """
+        :param values: (n_nodes,) values at the nodes or (n_nodes, n) n value vectors
+        :return: (len(y), len(x)) or (n, len(y), len(x)) resampled values, 0 outside the nodes
+        """
+        values = np.asarray(values)
+        if values.shape[0] != self.nodes:
+            raise ValueError('{} values for {} nodes'.format(values.shape[0], self.nodes))
+        out = self.matrix @ values
+        if values.ndim == 1:
+            return out.reshape((len(self.y), len(self.x)))
+        return np.moveaxis(out, -1, 0).reshape((-1, len(self.y), len(self.x)))
+
+
+def node_resampler(filename, wavelength):
+    """
+    resampler on the undeformed node layout of a result file, it can be shared by all the modes and load cases of the
+    same mesh (the in plane displacement of the nodes is neglected)
+    :param filename: mechanical result file (e.g. random_analysis_results/res_1mode.txt)
+    :param wavelength: wavelength [m]
+    :return: ApertureResampler
+    """
+    undeformed, deformed, shape = read_deformation(filename)
+    return ApertureResampler(undeformed[:, 2], undeformed[:, 0], wavelength)
+
+
+def aperture_distribution(filename, wavelength, resampler=None):
+    """
+    aperture field of a deformed shell, the normal displacement is resampled on a lambda/3 grid and turned into a
+    phase shift
+    :param filename: mechanical result file (e.g. random_analysis_results/res_1mode.txt)
+    :param wavelength: wavelength [m]
+    :param resampler: ApertureResampler to reuse (e.g. node_resampler of the mesh), default one built on the deformed
+                      nodes of the file
+    :return: x, y aperture axes, E complex field (len(y), len(x))
+    """
+    # %% reader
+    undeformed, deformed, shape = read_deformation(filename)
+    # raw line vectors
+    Yundef = undeformed[:, 1]  # actually z
+    Xdef = deformed[:, 0]  # actually y
+    Ydef = deformed[:, 1]
+    Zdef = deformed[:, 2]  # actually x
+
+    # %% resample the deformed xy grid to a uniform grid
+    # data to resample and y is z, x is y, and z is x
+    deformation = Ydef - Yundef
+    if resampler is None:
+        resampler = ApertureResampler(Zdef, Xdef, wavelength)
+    Z = resampler.resample(deformation)
+
+    # amplitude mask, the nearest neighbour resampling of a unit amplitude is 1 everywhere
+    E = np.exp(1j * Z / wavelength * 2 * np.pi)
 
-    return x, y, E
+    return resampler.x, resampler.y, E
@@ -2,74 +2,59 @@
 # September 2023
 # This file contains a class with the same interface of the Aperture class in radartools.farField
 # The pattern however is loaded from a CST ffs file and provided for any theta phi coordinate
-# by means of an interpolator, namely the sphere_interp in interpolator_v2.py
+# by means of an interpolator, namely the sphere_interp_fused in interpolator_v3.py (the successor of sphere_interp in
+# interpolator_v2.py, same edge rules with the stencils computed per point)
+# prefetch_apertures loads several patterns in background threads while the interpolator compiles (or loads from the
+# numba disk cache) in the calling thread.
+# mesh_field_pattern interpolates the complex fields (amplitude and phase, co-polar and cross-polar) in a single pass.
+# With coefficients=True the bicubic coefficients of every cell are computed on the first large cubic
+# mesh_gain_pattern of a block, the later queries evaluate them with a cell lookup per point.
+# Patterns sampled on non-uniform theta / phi axes (e.g. fine in the main beam and coarse elsewhere) are interpolated by
+# mesh_gain_pattern with the non-uniform stencil of sphere_interp_fused (no coefficient table, no plans, no fields).
+# grid_gain_pattern evaluates rectilinear theta phi grids from their 1d axes (separable, sphere_interp_grid).
+# direction_gain_pattern takes the LCS cartesian directions instead of theta phi, with the optional beam_cone the main
+# beam is looked up in a dense direction cosines table (sphere_interp_directions, no inverse trigonometry).
 
 # %% includes
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
 import numpy as np
-from interpolator_v2 import sphere_interp
+from interpolator_v3 import (InterpolationPlan, sphere_interp_fused, sphere_interp_fields, field_layout,
+                             coefficient_table, sphere_interp_table, sphere_interp_grid, uniform_axis, beam_table,
+                             sphere_interp_directions)
+from patternReader import read_pattern, index_pattern, header_index, pattern_extension
+from patternCache import PatternCache
+
+# %% globals
+# the interpolator is compiled (or loaded from the numba cache) once per process
+_compile_lock = threading.Lock()
+_compiled = False
+
+# %% constants
+# default memory budget of the tiles of tiled_gain_patterns [B]
+TILE_MEMORY = 1 << 30
+# memory per mesh point of a tile: the geometry chain of deformedAntennaAIR (about a dozen float64 meshes), the
+# rearranged theta / phi and the output [B]
+TILE_BYTES_PER_POINT = 128
 
 
 # %% functions
 
 # far field source loader (ffsFileReader script)
-def ffsLoader(filename):
-    # %% variables to read from file
-    # header
-    frequencies = 0
-    position = [0, 0, 0]
-    radiatedPower = 0
-    acceptedPower = 0
-    stimulatedPower = 0
-    frequency = 0
-    phiSamples = 0
-    thetaSamples = 0
-
-    # data matrix
-    dataMatrix = None  # size is going to be initialized after reading header
-
-    # %% Read file in ram
-    with open(filename, 'r') as file:
-        content = file.read()
-    content = content.split('\n')
-
-    # %% parse
-    # parse just header
-    for i in range(len(content)):
-        if "Frequencies" in content[i]:
-            frequencies = int(content[i + 1])
-            i += 1
-        if "Position" in content[i]:
-            pos = content[i + 1]
-            pos = pos.split(' ')
-            position = np.array(pos[0:3], dtype=float).reshape((3, 1))
-            i += 1
-        if "Radiated/Accepted/Stimulated Power , Frequency" in content[i]:
-            radiatedPower = float(content[i + 1])
-            acceptedPower = float(content[i + 2])
-            stimulatedPower = float(content[i + 3])
-            frequency = float(content[i + 4])
-        if "Total #phi samples, total #theta samples" in content[i]:
-            sam = content[i + 1]
-            sam = sam.split(' ')
-            phiSamples = int(sam[0])
-            thetaSamples = int(sam[1])
-            break
-
-    # %% data parsing
+def ffsLoader(filename, block=0, index=None, window=None):
+    # %% parse header and bulk parse data of the frequency block (window: optional theta phi region [deg])
     # Phi, Theta, Re(E_Theta), Im(E_Theta), Re(E_Phi), Im(E_Phi)
-    dataMatrix = np.zeros((phiSamples * thetaSamples, 6))
-
-    for i in range(len(content)):
-        if "Phi, Theta, Re(E_Theta), Im(E_Theta), Re(E_Phi), Im(E_Phi)" in content[i]:
-            for j in range(phiSamples * thetaSamples):
-                dataline = content[i + j + 1]
-                dataline = dataline.split(" ")
-                if len(dataline) == 0:  # eof
-                    break
-                while "" in dataline:
-                    dataline.remove("")
-                dataline = np.array(dataline[0:6], dtype=float).reshape((1, 6))
-                dataMatrix[j, :] = dataline
+    header, dataMatrix, found = read_pattern(filename, block, index, window)
+    phiSamples = header['phiSamples']
+    thetaSamples = header['thetaSamples']
+    radiatedPower = header['radiatedPower']
+    acceptedPower = header['acceptedPower']
+    stimulatedPower = header['stimulatedPower']
+    if found < phiSamples * thetaSamples:
+        raise ValueError('data section truncated, {} of {} rows: {}'.format(found, phiSamples * thetaSamples,
+                                                                             filename))
 
     # %% turn the data into meshgrids
     # theta component
@@ -87,71 +72,19 @@ def ffsLoader(filename):
     return Phi, Theta, E_Phi, E_Theta, phiSamples, thetaSamples, radiatedPower, stimulatedPower, acceptedPower
 
 
-def ffeLoader(filename):
-    # %% variables to read from file
-    # filename = 'EyPattern_NoDistortion.ffe'
-    # header
-    frequencies = 0
-    position = [0, 0, 0]
-    radiatedPower = 1
-    acceptedPower = 1
-    stimulatedPower = 1
-    frequency = 0
-    phiSamples = 1
-    thetaSamples = 1
-
-    # data matrix
-    dataMatrix = None  # size is going to be initialized after reading header
-
-    # %% Read file in ram
-    with open(filename, 'r') as file:
-        content = file.read()
-    content = content.split('\n')
-
-    # %% parse
-    # parse just header
-    for i in range(len(content)):
-        if "Frequencies" in content[i]:
-            frequencies = int(content[i + 1])
-            i += 1
-        if "Position" in content[i]:
-            pos = content[i + 1]
-            pos = pos.split(' ')
-            position = np.array(pos[0:3], dtype=float).reshape((3, 1))
-            i += 1
-        if "Radiated/Accepted/Stimulated Power , Frequency" in content[i]:
-            radiatedPower = float(content[i + 1])
-            acceptedPower = float(content[i + 2])
-            stimulatedPower = float(content[i + 3])
-            frequency = float(content[i + 4])
-        if "#Frequency: " in content[i]:
-            id = content[i].find(": ")
-            frequency = float(content[i][id + 2:])
-        if "#No. of Theta Samples: " in content[i]:
-            id = content[i].find(": ")
-            thetaSamples = int(content[i][id + 2:])
-        if "#No. of Phi Samples: " in content[i]:
-            id = content[i].find(": ")
-            phiSamples = int(content[i][id + 2:])
-            break
-
-    # %% data parsing
-    # Theta, Phi, Re(E_Theta), Im(E_Theta), Re(E_Phi), Im(E_Phi)
-    dataMatrix = np.zeros((phiSamples * thetaSamples, 9))
-
-    for i in range(len(content)):
-        if "Re(Etheta)" in content[i]:
-            for j in range(phiSamples * thetaSamples):
-                dataline = content[i + j + 1]
-                dataline = dataline.split(" ")
-                if len(dataline) < 9:  # eof
-                    print('eof')
-                    break
-                else:
-                    while "" in dataline:
-                        dataline.remove("")
-                    dataline = np.array(dataline[0:9], dtype=float).reshape((1, 9))
-                    dataMatrix[j, :] = dataline.astype('float')
+def ffeLoader(filename, block=0, index=None, window=None):
+    # %% parse header and bulk parse data of the frequency block (window: optional theta region [deg], the
+    # radiated power is normalised on the window, which has to contain the pattern peak)
+    # Theta, Phi, Re(E_Theta), Im(E_Theta), Re(E_Phi), Im(E_Phi), Gain(Theta), Gain(Phi), Gain(Total)
+    header, dataMatrix, found = read_pattern(filename, block, index, window)
+    phiSamples = header['phiSamples']
+    thetaSamples = header['thetaSamples']
+    radiatedPower = header['radiatedPower']
+    acceptedPower = header['acceptedPower']
+    stimulatedPower = header['stimulatedPower']
+    if found < phiSamples * thetaSamples:
+        raise ValueError('data section truncated, {} of {} rows: {}'.format(found, phiSamples * thetaSamples,
+                                                                             filename))
 
     # %% turn the data into meshgrids
     # theta component
@@ -179,74 +112,418 @@ def ffeLoader(filename):
     return Phi, Theta, E_Phi, E_Theta, phiSamples, thetaSamples, radiatedPower, stimulatedPower, acceptedPower
 
 
+def warm_up_interpolator():
+    """
+    compiles sphere_interp_fused for the argument types used by Aperture.mesh_gain_pattern (contiguous queries, read
+    only gain), once per process. The kernels are compiled on their first call, this moves that call ahead
+    :return:
+    """
+    global _compiled
+    with _compile_lock:
+        if _compiled:
+            return
+        theta = np.linspace(0, np.pi, 5)
+        phi = np.linspace(0, 2 * np.pi, 7)
+        G = np.ones((len(phi), len(theta)))
+        G.flags.writeable = False
+        T, P = np.meshgrid(np.linspace(0, np.pi / 2, 5), np.linspace(0, 2 * np.pi, 6))
+        sphere_interp_fused(T, P, theta, phi, G, True)
+        _compiled = True
+
+
+def prefetch_apertures(filenames, workers=None, **kwargs):
+    """
+    loads several patterns in background threads while the interpolator compiles, the start up time is the slowest
+    of the two instead of their sum (the parser releases the GIL)
+    e.g. ant_ref, ant_dist = [future.result() for future in prefetch_apertures([reference, distorted])]
+    the interpolator is compiled in the calling thread (the tbb threading layer of numba hangs at exit if the parallel
+    kernel is first run in a worker thread), this returns when the compilation is done
+    :param filenames: list of pattern files
+    :param workers: number of loading threads, default one per file
+    :param kwargs: Aperture arguments (cache, frequency, max_frequencies, window, coefficients, beam_cone,
+                   beam_oversampling)
+    :return: list of concurrent.futures.Future, result() returns the Aperture of the file
+    """
+    loader = ThreadPoolExecutor(workers or len(filenames))
+    futures = [loader.submit(Aperture, filename, **kwargs) for filename in filenames]
+    loader.shutdown(wait=False)
+    warm_up_interpolator()
+    return futures
+
+
+def tiled_gain_patterns(apertures, mesh, shape, out=None, tile_rows=None, memory=TILE_MEMORY, cubic=True):
+    """
+    gain of one or more patterns on a large mesh, evaluated by tiles of rows (first axis) of the mesh. The theta phi
+    coordinates of each tile are generated by a callback, so the full size geometry never exists and the memory is
+    bounded by the tile and the outputs (which can be memory mapped)
+    e.g. G_ref, G_dist = tiled_gain_patterns([ant_ref, ant_dist], geometry, (len(doppler), len(incidence)))
+    :param apertures: list of Aperture (or patternStore.CompactPattern) objects
+    :param mesh: callback mesh(start, stop) returning the theta, phi meshes of the rows start:stop, or a tuple of full
+                 size theta, phi meshes (e.g. memory mapped files). Three meshes are the x, y, z LCS directions
+                 (direction_gain_pattern, Aperture only)
+    :param shape: shape of the mesh
+    :param out: optional list of C contiguous float64 output arrays of the mesh shape, one per aperture (e.g.
+                np.lib.format.open_memmap), default new arrays
+    :param tile_rows: rows per tile, default from the memory budget
+    :param memory: memory budget of a tile [B], TILE_BYTES_PER_POINT per point
+    :param cubic: default True: bicubic interpolation utilised, False: linear interpolation.
+    :return: list of the gains, one per aperture
+    """
+    if out is None:
+        out = [np.empty(shape) for aperture in apertures]
+    if tile_rows is None:
+        tile_rows = max(1, int(memory // (TILE_BYTES_PER_POINT * int(np.prod(shape[1:])))))
+    if not callable(mesh):
+        meshes = mesh
+
+        def mesh(start, stop):
+            return [coordinate[start:stop] for coordinate in meshes]
+
+    for start in range(0, shape[0], tile_rows):
+        stop = min(start + tile_rows, shape[0])
+        coordinates = mesh(start, stop)
+        for aperture, gain in zip(apertures, out):
+            if len(coordinates) == 3:
+                aperture.direction_gain_pattern(*coordinates, cubic, out=gain[start:stop])
+            else:
+                aperture.mesh_gain_pattern(*coordinates, cubic, out=gain[start:stop])
+    return out
+
+
 # Aperture class for interfacing cst pattern
 class Aperture:
-    def __init__(self, filename):
+    def __init__(self, filename, cache=True, frequency=None, max_frequencies=4, window=None, coefficients=False,
+                 beam_cone=None, beam_oversampling=16):
         """
         initialization method, it requires a far field file
-        :param filename: CST ffs file
+        :param filename: CST ffs or FEKO ffe file, optionally .gz, .bz2, .xz or .zst compressed
+        :param cache: True to use the on disk pattern cache (per user folder, patternCache.CACHE_FOLDER), False to
+                      always parse the file, or a patternCache.PatternCache object (e.g. with a custom cache folder or
+                      size cap)
+        :param frequency: frequency of the pattern to use for multi frequency files (the closest block is chosen),
+                          default the first block
+        :param max_frequencies: number of decoded frequency blocks kept in memory (least recently used discarded)
+        :param window: optional region of interest (theta_min, theta_max) or (theta_min, theta_max, phi_min, phi_max)
+                       [rad], only the pattern samples inside it (plus a guard band for the bicubic interpolation)
+                       are decoded and kept. The gain is valid inside the window only and max_gain is the window
+                       maximum, so the window has to contain the beam peak. phi is cropped only for ffs patterns and
+                       windows not containing the poles (patternReader.window_samples)
+        :param coefficients: True to evaluate the cubic mesh_gain_pattern from the bicubic coefficient table of the
+                             block (16 float64 per sample, see cell_table), faster for large meshes queried repeatedly.
+                             Not used for non-uniformly sampled patterns
+        :param beam_cone: optional main beam cone (theta, phi of the axis, half angle below pi / 2) [rad], the gain
+                          of each loaded block inside it is tabulated on a uniform grid of the direction cosines about
+                          the axis for direction_gain_pattern (uniformly sampled patterns only)
+        :param beam_oversampling: theta steps of the pattern per step of the beam table
         :return:
         """
-        if filename[-4:].lower() == '.ffs':
+        if cache is True:
+            cache = PatternCache()
+        self.filename = filename
+        self.cache = cache
+        self.max_frequencies = max_frequencies
+        self.window = window
+        self.coefficients = coefficients
+        self.beam_cone = beam_cone
+        self.beam_oversampling = beam_oversampling
+        # index of the frequency blocks. The file is scanned (once) only if it holds several blocks or a frequency
+        # is requested, otherwise the first block is streamed from the end of the header. Blocks are decoded on
+        # first use only
+        self.index = cache.get(filename, 'index') if cache else None
+        self.indexed = self.index is not None
+        scanned = False
+        if not self.indexed:
+            self.index, blocks = header_index(filename)
+            self.indexed = blocks == 1
+            if not self.indexed and (blocks is not None or frequency is not None):
+                self.index = index_pattern(filename)
+                self.indexed = scanned = True
+        self.frequencies = np.asarray(self.index['frequency'])
+        self.patterns = OrderedDict()  # decoded blocks, least recently used first
+        self.field_patterns = OrderedDict()  # complex fields of the blocks, on request only
+        self.tables = OrderedDict()  # bicubic coefficient tables of the blocks, on request only
+
+        # store relevant parameters
+        self.set_frequency(frequency)
+        if scanned and cache:
+            # cached once a block parsed, a malformed file leaves nothing in the cache
+            cache.put(filename, self.index, 'index')
+
+    def frequency_block(self, frequency):
+        """
+        :param frequency: frequency in Hz
+        :return: number of the frequency block closest to frequency
+        """
+        if not self.indexed:
+            # ffe files do not declare their blocks in the header, scanned on the first frequency request
+            self.index = index_pattern(self.filename)
+            self.frequencies = np.asarray(self.index['frequency'])
+            self.indexed = True
+            if self.cache:
+                self.cache.put(self.filename, self.index, 'index')
+        return int(np.argmin(np.abs(self.frequencies - frequency)))
+
+    def load(self, block):
+        """
+        parses a frequency block (or reads it from the on disk cache)
+        :param block: frequency block number
+        :return: dictionary with the Phi, Theta [deg] meshgrids, E_Phi, E_Theta fields, G gain, phiSamples,
+                 thetaSamples and the powers
+        """
+        tag = 'block' + str(block)
+        window = None
+        if self.window is not None:
+            window = tuple(np.asarray(self.window) * 180 / np.pi)  # loaders use degrees
+            tag += 'window' + ','.join('{:.9g}'.format(angle) for angle in window)
+        data = self.cache.get(self.filename, tag) if self.cache else None
+        if data is not None:
+            # previously parsed, memory mapped from the cache
+            return data
+
+        if pattern_extension(self.filename) == '.ffs':
             # load far field
             (Phi, Theta, E_Phi, E_Theta, phiSamples, thetaSamples,
-             radiatedPower, stimulatedPower, acceptedPower) = ffsLoader(filename)
-        elif filename[-4:].lower() == '.ffe':
+             radiatedPower, stimulatedPower, acceptedPower) = ffsLoader(self.filename, block, self.index, window)
+        elif pattern_extension(self.filename) == '.ffe':
             print('loading ffe pattern')
             # load far field
             (Phi, Theta, E_Phi, E_Theta, phiSamples, thetaSamples,
-             radiatedPower, stimulatedPower, acceptedPower) = ffeLoader(filename)
+             radiatedPower, stimulatedPower, acceptedPower) = ffeLoader(self.filename, block, self.index, window)
         else:
             print('Error: file extension unknown')
 
         # compute directive gain
-        self.G = np.array(
+        G = np.array(
             2 * np.pi * (np.abs(E_Theta) ** 2 + np.abs(E_Phi) ** 2) / (120 * np.pi * radiatedPower),
             dtype=float)
+        G.flags.writeable = False  # same array type of the cached (memory mapped) gains, one interpolator
+        data = {'Phi': Phi, 'Theta': Theta, 'E_Phi': E_Phi, 'E_Theta': E_Theta, 'G': G, 'phiSamples': phiSamples,
+                'thetaSamples': thetaSamples, 'radiatedPower': radiatedPower, 'stimulatedPower': stimulatedPower,
+                'acceptedPower': acceptedPower}
+        if self.cache:
+            self.cache.put(self.filename, data, tag)
+        return data
+
+    def pattern(self, block):
+        """
+        decodes a frequency block on first use and keeps it in memory (and in the on disk cache)
+        :param block: frequency block number
+        :return: G, Theta, Phi meshgrids (radians), phiSamples, thetaSamples, beam table (None if not precomputed)
+        """
+        if block in self.patterns:
+            self.patterns.move_to_end(block)
+            return self.patterns[block]
+        data = self.load(block)
+        G, Theta, Phi = data['G'], data['Theta'] * np.pi / 180, data['Phi'] * np.pi / 180  # I use radians
+        beam = None
+        if self.beam_cone is not None and uniform_axis(Theta[0, :]) and uniform_axis(Phi[:, 0]):
+            beam = beam_table(G, Theta[0, :], Phi[:, 0], self.beam_cone,
+                              (Theta[0, 1] - Theta[0, 0]) / self.beam_oversampling)
+        self.patterns[block] = (G, Theta, Phi, data['phiSamples'], data['thetaSamples'], beam)
+        while len(self.patterns) > self.max_frequencies:
+            self.patterns.popitem(last=False)
+        return self.patterns[block]
+
+    def fields(self, block):
+        """
+        complex field components of a frequency block, loaded on first use (32 bytes per sample, kept only for the
+        blocks whose fields are requested)
+        :param block: frequency block number
+        :return: (phiSamples, thetaSamples, 2) E_Theta, E_Phi scaled so that |E_Theta|^2 + |E_Phi|^2 is the gain
+                 (interpolator_v3.field_layout)
+        """
+        if block in self.field_patterns:
+            self.field_patterns.move_to_end(block)
+            return self.field_patterns[block]
+        data = self.load(block)
+        fields = field_layout(data['E_Theta'], data['E_Phi'],
+                              np.sqrt(2 * np.pi / (120 * np.pi * data['radiatedPower'])))
+        fields.flags.writeable = False
+        self.field_patterns[block] = fields
+        while len(self.field_patterns) > self.max_frequencies:
+            self.field_patterns.popitem(last=False)
+        return fields
+
+    def cell_table(self, block):
+        """
+        bicubic coefficient table of a frequency block, computed on first use (16 float64 per sample, kept only for
+        the blocks queried through it). It is not stored in the on disk cache, a new process computes it again from
+        the (cached) gain
+        :param block: frequency block number
+        :return: (phiSamples, thetaSamples, 16) table (interpolator_v3.coefficient_table), None for non-uniformly
+                 sampled patterns
+        """
+        if block in self.tables:
+            self.tables.move_to_end(block)
+            return self.tables[block]
+        G, Theta, Phi = (self.G, self.Theta, self.Phi) if block == self.block else self.pattern(block)[0:3]
+        table = None
+        if uniform_axis(Theta[0, :]) and uniform_axis(Phi[:, 0]):
+            table = coefficient_table(G, Theta[0, :], Phi[:, 0])
+            table.flags.writeable = False
+        self.tables[block] = table
+        while len(self.tables) > self.max_frequencies:
+            self.tables.popitem(last=False)
+        return table
+
+    def set_frequency(self, frequency=None):
+        """
+        selects the frequency block used by default in mesh_gain_pattern and max_gain
+        :param frequency: frequency in Hz, the closest block is chosen. None for the first block
+        :return:
+        """
+        block = 0 if frequency is None else self.frequency_block(frequency)
+        self.G, self.Theta, self.Phi, self.phiSamples, self.thetaSamples, self.beam = self.pattern(block)
+        self.frequency = self.frequencies[block]
+        self.block = block
 
-        # store relevant parameters
-        self.Theta = Theta * np.pi / 180  # I use radians
-        self.Phi = Phi * np.pi / 180
-        self.phiSamples = phiSamples
-        self.thetaSamples = thetaSamples
-        # 3 compile the interpolator function
-        theta = np.linspace(0, np.pi / 2, 5)
-        phi = np.linspace(0, 2 * np.pi, 6)
-        T, P = np.meshgrid(theta, phi)
-        print('compiling')
-        ginterp = self.mesh_gain_pattern(T, P, cubic=True)
-        print('done')
-
-    def mesh_gain_pattern(self, theta_mesh: np.ndarray, phi_mesh: np.ndarray, cubic=True):
+    def mesh_gain_pattern(self, theta_mesh: np.ndarray, phi_mesh: np.ndarray, cubic=True, frequency=None, out=None):
         """
         retruns the gain pattern at the specified meshgrid points in spherical coordinates.
         :param theta_mesh: Theta coordinates
         :param phi_mesh: Phi coordinates
         :param cubic: default True: bicubic interpolation utilised, False: linear interpolation.
+        :param frequency: optional, frequency of the pattern (closest block), default the selected one
+        :param out: optional C contiguous float64 output array of the mesh shape (e.g. a tile of a memory mapped file)
+        :return:
+        """
+        block = self.block if frequency is None else self.frequency_block(frequency)
+        G, Theta, Phi = self.G, self.Theta, self.Phi
+        if frequency is not None:
+            G, Theta, Phi = self.pattern(block)[0:3]
+        table = None
+        # the table costs about one query point per sample to compute, it is built for queries at least that large
+        if cubic and self.coefficients and (block in self.tables or np.size(theta_mesh) >= G.size):
+            table = self.cell_table(block)
+        theta_mesh, phi_mesh = self.rearrange(theta_mesh, phi_mesh)
+        # theta and phi axes (origins of the meshgrid), a cell lookup per point in the coefficient table, or the
+        # stencil computed per point (uniform or non-uniform axes). The only full size array is the output
+        if table is not None:
+            outpattern = sphere_interp_table(theta_mesh, phi_mesh, Theta[0, :], Phi[:, 0], G, table, out)
+        else:
+            outpattern = sphere_interp_fused(theta_mesh, phi_mesh, Theta[0, :], Phi[:, 0], G, cubic, out)
+        return np.maximum(outpattern, 0, out=outpattern)
+
+    def grid_gain_pattern(self, theta: np.ndarray, phi: np.ndarray, cubic=True, frequency=None, out=None):
+        """
+        gain pattern on the rectilinear grid of a theta and a phi axis, the same values of mesh_gain_pattern on
+        np.meshgrid(theta, phi) with the interpolation stencils computed once per axis
+        :param theta: 1d theta axis
+        :param phi: 1d phi axis
+        :param cubic: default True: bicubic interpolation utilised, False: linear interpolation.
+        :param frequency: optional, frequency of the pattern (closest block), default the selected one
+        :param out: optional C contiguous float64 (len(phi), len(theta)) output array
+        :return: (len(phi), len(theta)) gain
+        """
+        G, Theta, Phi = self.G, self.Theta, self.Phi
+        if frequency is not None:
+            G, Theta, Phi = self.pattern(self.frequency_block(frequency))[0:3]
+        if not (uniform_axis(Theta[0, :]) and uniform_axis(Phi[:, 0])):
+            return self.mesh_gain_pattern(*np.meshgrid(theta, phi), cubic, frequency, out)
+        theta, phi = np.asarray(theta, dtype=float).reshape(-1), np.asarray(phi, dtype=float).reshape(-1)
+        self.rearrange(theta, np.zeros_like(theta))  # window warning only
+        outpattern = sphere_interp_grid(np.abs(theta), phi, Theta[0, :], Phi[:, 0], G, cubic, out)
+        negative = theta < 0
+        if np.any(negative):
+            # rearranged like mesh_gain_pattern, phi rotated by pi for the negative theta columns
+            outpattern[:, negative] = sphere_interp_grid(-theta[negative], (phi + np.pi) % (np.pi * 2), Theta[0, :],
+                                                         Phi[:, 0], G, cubic)
+        return np.maximum(outpattern, 0, out=outpattern)
+
+    def direction_gain_pattern(self, x_mesh: np.ndarray, y_mesh: np.ndarray, z_mesh: np.ndarray, cubic=True,
+                               frequency=None, out=None):
+        """
+        gain pattern at directions given as LCS cartesian coordinates (e.g. the mesh_gcs_to_lcs positions, any norm),
+        the same values of mesh_gain_pattern at their meshCart2sph theta, phi outside the beam cone, from the beam
+        table inside it (see beam_cone)
+        :param x_mesh: x coordinates
+        :param y_mesh: y coordinates
+        :param z_mesh: z coordinates
+        :param cubic: default True: bicubic interpolation utilised, False: linear interpolation.
+        :param frequency: optional, frequency of the pattern (closest block), default the selected one
+        :param out: optional C contiguous float64 output array of the mesh shape
         :return:
         """
+        G, Theta, Phi, beam = self.G, self.Theta, self.Phi, self.beam
+        if frequency is not None:
+            G, Theta, Phi, phiSamples, thetaSamples, beam = self.pattern(self.frequency_block(frequency))
+        if not (uniform_axis(Theta[0, :]) and uniform_axis(Phi[:, 0])):
+            r_mesh = np.sqrt(x_mesh ** 2 + y_mesh ** 2 + z_mesh ** 2)
+            theta_mesh = np.nan_to_num(np.arccos(np.clip(z_mesh / r_mesh, -1, 1)))
+            return self.mesh_gain_pattern(theta_mesh, np.nan_to_num(np.arctan2(y_mesh, x_mesh)), cubic, frequency,
+                                          out)
+        outpattern = sphere_interp_directions(x_mesh, y_mesh, z_mesh, Theta[0, :], Phi[:, 0], G, beam, cubic, out)
+        return np.maximum(outpattern, 0, out=outpattern)
+
+    def mesh_field_pattern(self, theta_mesh: np.ndarray, phi_mesh: np.ndarray, cubic=True, frequency=None,
+                           polarization='x'):
+        """
+        complex co-polar and cross-polar fields (Ludwig 3) and gain at the specified meshgrid points, E_Theta and
+        E_Phi are interpolated together in a single pass. The fields are scaled so that |co|^2 + |cross|^2 is the gain
+        :param theta_mesh: Theta coordinates
+        :param phi_mesh: Phi coordinates
+        :param cubic: default True: bicubic interpolation utilised, False: linear interpolation.
+        :param frequency: optional, frequency of the pattern (closest block), default the selected one
+        :param polarization: 'x' or 'y', co-polar reference direction
+        :return: co, cross, gain with the shape of the meshgrid
+        """
+        block = self.block if frequency is None else self.frequency_block(frequency)
+        G, Theta, Phi = self.pattern(block)[0:3]
+        # the Ludwig 3 components do not change with the negative theta rearrangement
+        theta_mesh, phi_mesh = self.rearrange(theta_mesh, phi_mesh)
+        return sphere_interp_fields(theta_mesh, phi_mesh, Theta[0, :], Phi[:, 0], self.fields(block), cubic,
+                                    polarization)
+
+    def rearrange(self, theta_mesh, phi_mesh):
+        """
+        spherical coordinates rearranged for negative theta, with a warning for points outside the theta window
+        :param theta_mesh: Theta coordinates
+        :param phi_mesh: Phi coordinates
+        :return: theta_mesh, phi_mesh with theta >= 0
+        """
         # phi_mesh = phi_mesh % (2 * np.pi)
-        # spherical coordinates rearranged for negative theta
         phi_mesh = np.where(theta_mesh < 0, (phi_mesh + np.pi) % (np.pi * 2), phi_mesh)
         theta_mesh = np.abs(theta_mesh)
-        # need to create an outpattern for some reason
-        outpattern = np.zeros_like(theta_mesh).reshape(-1).astype('float')
-        # theta and phi axes (origins of the meshgrid, non-uniform sampling not allowed)
-        theta = self.Theta[0, :].reshape(-1)
-        phi = self.Phi[:, 0].reshape(-1)
-        # The vectors need to be flattened hence reshape(-1) except pattern
-        outpattern = sphere_interp(theta_mesh.reshape(-1), phi_mesh.reshape(-1),
-                                   theta, phi,
-                                   self.G.T, outpattern, cubic)
-        outpattern = np.where(outpattern < 0, 0, outpattern)
-        # reshape to desired format
-        return outpattern.reshape(np.shape(theta_mesh))
-
-    def max_gain(self):
+        if self.window is not None and (np.min(theta_mesh) < self.window[0] or np.max(theta_mesh) > self.window[1]):
+            print('warning: points outside the theta window of the pattern')
+        return theta_mesh, phi_mesh
+
+    def interpolation_plan(self, theta_mesh: np.ndarray, phi_mesh: np.ndarray, cubic=True, frequency=None):
+        """
+        stencils of the interpolation on a meshgrid, computed once and reusable by every pattern sampled on the same
+        theta phi grid, e.g. a reference and a distorted antenna (see plan_gain_pattern)
+        :param theta_mesh: Theta coordinates
+        :param phi_mesh: Phi coordinates
+        :param cubic: default True: bicubic interpolation utilised, False: linear interpolation.
+        :param frequency: optional, frequency of the pattern (closest block) giving the grid, default the selected one
+        :return: interpolator_v3.InterpolationPlan
+        """
+        Theta, Phi = self.Theta, self.Phi
+        if frequency is not None:
+            Theta, Phi = self.pattern(self.frequency_block(frequency))[1:3]
+        theta_mesh, phi_mesh = self.rearrange(theta_mesh, phi_mesh)
+        return InterpolationPlan(Theta[0, :], Phi[:, 0], theta_mesh, phi_mesh, cubic)
+
+    def plan_gain_pattern(self, plan, frequency=None):
+        """
+        gain pattern at the points of an interpolation plan, same values of mesh_gain_pattern at the planned meshgrid
+        :param plan: interpolator_v3.InterpolationPlan of a pattern on the same theta phi grid
+        :param frequency: optional, frequency of the pattern (closest block), default the selected one
+        :return: gain with the shape of the planned meshgrid
+        """
+        G, Theta, Phi = self.G, self.Theta, self.Phi
+        if frequency is not None:
+            G, Theta, Phi = self.pattern(self.frequency_block(frequency))[0:3]
+        gain = plan.apply(G, Theta[0, :], Phi[:, 0])
+        return np.maximum(gain, 0, out=gain)
+
+    def max_gain(self, frequency=None):
         """
+        :param frequency: optional, frequency of the pattern (closest block), default the selected one
         :return: the peak (broadside) gain of pattern
         """
-        max_g = np.max(self.G)
+        G = self.G if frequency is None else self.pattern(self.frequency_block(frequency))[0]
+        max_g = np.max(G)
         return max_g
 
 
@@ -268,8 +545,7 @@ if __name__ == '__main__':
     theta = np.linspace(0, np.pi / 2, 3501)
     phi = np.linspace(0, 2 * np.pi, 3500)
     T, P = np.meshgrid(theta, phi)
-    ginterp = antenna.mesh_gain_pattern(T, P, cubic=True)
-    ginterp = np.where(ginterp < 0, 0, ginterp)
+    ginterp = antenna.grid_gain_pattern(theta, phi, cubic=True)
     plt.show()
     # Pass
 
@@ -283,7 +559,7 @@ if __name__ == '__main__':
     theta = np.linspace(0, np.pi / 2, antenna.thetaSamples)
     phi = np.linspace(0, 2 * np.pi, antenna.phiSamples)
     T, P = np.meshgrid(theta, phi)
-    ginterp = antenna.mesh_gain_pattern(T, P, cubic=True)
+    ginterp = antenna.grid_gain_pattern(theta, phi, cubic=True)
     diff = ginterp - antenna.G
     fig, ax = plt.subplots(1)
     ax.pcolormesh(T, P, 10 * np.log10(diff))
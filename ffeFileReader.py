@@ -6,74 +6,28 @@
 # %% Includes section
 import matplotlib.pyplot as plt
 import numpy as np
+from patternReader import read_ffe_header, read_body, FFE_COLUMNS
 
 # %% User input
 filename = 'farfield.ffs'
 
-# %% variables to read from file
+# %% parse header and stream the data section
 filename = 'lyceanem/DeformedAntennav2.ffe'
+# Theta, Phi, Re(E_Theta), Im(E_Theta), Re(E_Phi), Im(E_Phi), Gain(Theta), Gain(Phi), Gain(Total)
+with open(filename, 'rb') as file:
+    header = read_ffe_header(file)
+    dataMatrix, found = read_body(file, header['phiSamples'] * header['thetaSamples'], FFE_COLUMNS)
+if found < header['phiSamples'] * header['thetaSamples']:
+    print('eof')
 # header
-frequencies = 0
-position = [0, 0, 0]
-radiatedPower = 1
-acceptedPower = 1
-stimulatedPower = 1
-frequency = 0
-phiSamples = 1
-thetaSamples = 1
-
-# data matrix
-dataMatrix = None  # size is going to be initialized after reading header
-
-# %% Read file in ram
-with open(filename, 'r') as file:
-    content = file.read()
-content = content.split('\n')
-
-# %% parse
-# parse just header
-for i in range(len(content)):
-    if "Frequencies" in content[i]:
-        frequencies = int(content[i + 1])
-        i += 1
-    if "Position" in content[i]:
-        pos = content[i + 1]
-        pos = pos.split(' ')
-        position = np.array(pos[0:3], dtype=float).reshape((3, 1))
-        i += 1
-    if "Radiated/Accepted/Stimulated Power , Frequency" in content[i]:
-        radiatedPower = float(content[i + 1])
-        acceptedPower = float(content[i + 2])
-        stimulatedPower = float(content[i + 3])
-        frequency = float(content[i + 4])
-    if "#Frequency: " in content[i]:
-        id = content[i].find(": ")
-        frequency = float(content[i][id + 2:])
-    if "#No. of Theta Samples: " in content[i]:
-        id = content[i].find(": ")
-        thetaSamples = int(content[i][id + 2:])
-    if "#No. of Phi Samples: " in content[i]:
-        id = content[i].find(": ")
-        phiSamples = int(content[i][id + 2:])
-        break
-
-# %% data parsing
-# Theta, Phi, Re(E_Theta), Im(E_Theta), Re(E_Phi), Im(E_Phi)
-dataMatrix = np.zeros((phiSamples * thetaSamples, 9))
-
-for i in range(len(content)):
-    if "Re(Etheta)" in content[i]:
-        for j in range(phiSamples * thetaSamples):
-            dataline = content[i + j + 1]
-            dataline = dataline.split(" ")
-            if len(dataline) < 9:  # eof
-                print('eof')
-                break
-            else:
-                while "" in dataline:
-                    dataline.remove("")
-                dataline = np.array(dataline[0:9], dtype=float).reshape((1, 9))
-                dataMatrix[j, :] = dataline.astype('float')
+frequencies = header['frequencies']
+position = header['position']
+radiatedPower = header['radiatedPower']
+acceptedPower = header['acceptedPower']
+stimulatedPower = header['stimulatedPower']
+frequency = header['frequency']
+phiSamples = header['phiSamples']
+thetaSamples = header['thetaSamples']
 
 # %% turn the data into meshgrids
 # theta component
@@ -0,0 +1,83 @@
+# Simone Mencarelli
+# October 2026
+# this file contains a function to pack a far field pattern into a FEKO ffe file, the counterpart of ffsFileWriter
+# single frequency only, the data rows are formatted a block of rows at a time and written through a large buffer.
+# The fields are written as given, farFieldCST.ffeLoader flips E_Phi along phi when reading, so a pattern in the
+# loader convention has to be flipped before writing (patternConverter does it).
+import numpy as np
+
+from ffsFileWriter import CHUNK_ROWS, BUFFER_SIZE
+
+# %% constants
+# data row layout: Theta, Phi, Re(E_Theta), Im(E_Theta), Re(E_Phi), Im(E_Phi), Gain(Theta), Gain(Phi), Gain(Total)
+ROW_FORMAT = "%19.8E" * 9 + "\n"
+
+
+# %% function
+def format_rows(columns):
+    """
+    formats a block of data rows in the ffe layout
+    :param columns: (rows, 9) float array
+    :return: the text of the rows
+    """
+    return (ROW_FORMAT * len(columns)) % tuple(columns.ravel().tolist())
+
+
+def ffeWrite(theta, phi, e_theta, e_phi,
+             num_phi, num_theta,
+             filename='out.ffe',
+             gain_theta=None,
+             gain_phi=None,
+             accepted_power=1,
+             stimulated_power=1,
+             frequency=10e9,
+             chunk_rows=CHUNK_ROWS):
+    """
+    export a pattern to ffe format
+    :param theta: least significant, when unraveling the meshgrid this has to vary faster than phi
+    :param phi: most significant, when unraveling the meshgrid this has to vary slower than theta
+    :param e_theta: complex 1d
+    :param e_phi: complex 1d
+    :param num_phi:
+    :param num_theta:
+    :param filename: something.ffe
+    :param gain_theta: 1d linear gain of the theta component, default computed from e_theta for unit radiated power
+    :param gain_phi: 1d linear gain of the phi component, default computed from e_phi for unit radiated power
+    :param accepted_power: written in an extra header line (read back by patternReader.read_ffe_header)
+    :param stimulated_power: written in an extra header line (read back by patternReader.read_ffe_header)
+    :param frequency:
+    :param chunk_rows: rows formatted per block
+    :return:
+    """
+    theta, phi = np.asarray(theta), np.asarray(phi)
+    e_theta, e_phi = np.asarray(e_theta), np.asarray(e_phi)
+    if gain_theta is None:
+        gain_theta = 2 * np.pi * np.abs(e_theta) ** 2 / (120 * np.pi)
+    if gain_phi is None:
+        gain_phi = 2 * np.pi * np.abs(e_phi) ** 2 / (120 * np.pi)
+    gain_theta, gain_phi = np.asarray(gain_theta), np.asarray(gain_phi)
+    # %% Writer
+    pre = ('##File Type: Far field\n##File Format: 8\n** File exported by ffeFileWriter\n\n'
+           '#Request Name: FF\n#Frequency: {:16.8E}\n#Coordinate System: Spherical\n'
+           '#No. of Theta Samples: {}\n#No. of Phi Samples: {}\n#Result Type: Gain\n'
+           '#Accepted Power: {:16.8E}\n#Stimulated Power: {:16.8E}\n#No. of Header Lines: 1\n'
+           '#{:>18s}{:>19s}{:>19s}{:>19s}{:>19s}{:>19s}{:>19s}{:>19s}{:>19s}\n').format(
+        frequency, num_theta, num_phi, accepted_power, stimulated_power,
+        '"Theta"', '"Phi"', '"Re(Etheta)"', '"Im(Etheta)"', '"Re(Ephi)"', '"Im(Ephi)"',
+        '"Gain(Theta)"', '"Gain(Phi)"', '"Gain(Total)"')
+
+    with open(filename, 'w', buffering=BUFFER_SIZE) as file:
+        file.write(pre)
+        for start in range(0, len(theta), chunk_rows):
+            stop = start + chunk_rows
+            columns = np.empty((len(theta[start:stop]), 9))
+            columns[:, 0] = theta[start:stop]
+            columns[:, 1] = phi[start:stop]
+            columns[:, 2] = np.real(e_theta[start:stop])
+            columns[:, 3] = np.imag(e_theta[start:stop])
+            columns[:, 4] = np.real(e_phi[start:stop])
+            columns[:, 5] = np.imag(e_phi[start:stop])
+            columns[:, 6] = gain_theta[start:stop]
+            columns[:, 7] = gain_phi[start:stop]
+            columns[:, 8] = gain_theta[start:stop] + gain_phi[start:stop]
+            file.write(format_rows(columns))
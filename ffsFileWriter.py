@@ -2,8 +2,24 @@
 # September 2023
 # this file contains a function to pack a far field pattern into a CST ffs file
 # the geometry is fixed, single frequency only
+# the data rows are formatted a block of rows at a time (one string formatting call per block) and written through a
+# large buffer, optionally the blocks are formatted in worker processes and written in order.
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
 import numpy as np
 
+# %% constants
+# data row layout: Phi, Theta, Re(E_Theta), Im(E_Theta), Re(E_Phi), Im(E_Phi)
+ROW_FORMAT = "%10.4f %10.4f %16.8e %16.8e %16.8e %16.8e \n"
+# rows formatted per block
+CHUNK_ROWS = 1 << 16
+# write buffer size in bytes
+BUFFER_SIZE = 1 << 24
+# blocks in flight per worker process when formatting in parallel
+BLOCKS_PER_WORKER = 2
+
 
 # %% User input
 #
@@ -18,13 +34,40 @@ import numpy as np
 # frequency = 4
 
 # %% function
+def format_rows(columns):
+    """
+    formats a block of data rows in the ffs layout
+    :param columns: (rows, 6) float array, Phi, Theta, Re(E_Theta), Im(E_Theta), Re(E_Phi), Im(E_Phi)
+    :return: the text of the rows
+    """
+    return (ROW_FORMAT * len(columns)) % tuple(columns.ravel().tolist())
+
+
+def row_blocks(theta, phi, e_theta, e_phi, chunk_rows):
+    """
+    generator of the (rows, 6) column blocks to be formatted
+    """
+    for start in range(0, len(theta), chunk_rows):
+        stop = start + chunk_rows
+        columns = np.empty((len(theta[start:stop]), 6))
+        columns[:, 0] = phi[start:stop]
+        columns[:, 1] = theta[start:stop]
+        columns[:, 2] = np.real(e_theta[start:stop])
+        columns[:, 3] = np.imag(e_theta[start:stop])
+        columns[:, 4] = np.real(e_phi[start:stop])
+        columns[:, 5] = np.imag(e_phi[start:stop])
+        yield columns
+
+
 def ffsWrite(theta, phi, e_theta, e_phi,
              num_phi, num_theta,
              filename='out.ffs',
              radiated_power=1,
              accepted_power=1,
              stimulated_power=1,
-             frequency=10e9):
+             frequency=10e9,
+             workers=1,
+             chunk_rows=CHUNK_ROWS):
     """
     export a pattern to ffs format
     :param theta: least significant , when unraveling the meshgrid this has to vary faster than theta
@@ -38,6 +81,9 @@ def ffsWrite(theta, phi, e_theta, e_phi,
     :param accepted_power:
     :param stimulated_power:
     :param frequency:
+    :param workers: number of processes formatting the data rows, 1 formats in the calling process (more need the
+    if __name__ == '__main__' guard in the calling script, the workers are spawned)
+    :param chunk_rows: rows formatted per block
     :return:
     """
     # %% Writer
@@ -48,7 +94,7 @@ def ffsWrite(theta, phi, e_theta, e_phi,
     samples = '\n\n// >> Total #phi samples, total #theta samples \n'
     pattern = '\n// >> Phi, Theta, Re(E_Theta), Im(E_Theta), Re(E_Phi), Im(E_Phi): \n'
 
-    with open(filename, 'w') as file:
+    with open(filename, 'w', buffering=BUFFER_SIZE) as file:
         file.write(pre)
         file.write(power)
         file.write("{:.6e}".format(radiated_power) + '\n')
@@ -58,10 +104,19 @@ def ffsWrite(theta, phi, e_theta, e_phi,
         file.write(samples)
         file.write(str(num_phi) + ' ' + str(num_theta) + '\n')
         file.write(pattern)
-        for i in range(len(theta)):
-            file.write("{0:10.4f} {1:10.4f} {2:16.8e} {3:16.8e} {4:16.8e} {5:16.8e} \n".format(phi[i],
-                                                                                               theta[i],
-                                                                                               np.real(e_theta[i]),
-                                                                                               np.imag(e_theta[i]),
-                                                                                               np.real(e_phi[i]),
-                                                                                               np.imag(e_phi[i])))
+        blocks = row_blocks(np.asarray(theta), np.asarray(phi), np.asarray(e_theta), np.asarray(e_phi), chunk_rows)
+        if workers > 1:
+            # blocks formatted in parallel and written in order, a new block is submitted as each one is written so
+            # that at most BLOCKS_PER_WORKER blocks per worker are in memory. The workers are spawned, not forked: a
+            # fork after the numba thread pool has started (any parallel kernel called before) deadlocks
+            with ProcessPoolExecutor(workers, mp_context=get_context('spawn')) as executor:
+                pending = deque()
+                for columns in blocks:
+                    if len(pending) >= BLOCKS_PER_WORKER * workers:
+                        file.write(pending.popleft().result())
+                    pending.append(executor.submit(format_rows, columns))
+                while pending:
+                    file.write(pending.popleft().result())
+        else:
+            for columns in blocks:
+                file.write(format_rows(columns))
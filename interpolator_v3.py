@@ -0,0 +1,982 @@
+# Simone Mencarelli
+# October 2026
+# Stencil based kernels for the spherical interpolation of patterns, the successors of interpolator_v2.sphere_interp.
+# The stencil of a query point (cell indices and offsets within the cell) is computed per point, the rules at the
+# edges of the grid are the ones of sphere_interp, decided per point instead of for the whole query:
+#   - phi axis covering a full circle (last sample equal to the first, or one step before it): phi wraps around, and
+#     theta folds across the poles (theta -> -theta, phi -> phi + pi) if the axis reaches the pole
+#   - otherwise the indices are clamped to the edge samples
+# The patterns are indexed as stored by farFieldCST.Aperture, i.e. (n_phi, n_theta), and the axes may start at any
+# angle (windowed patterns).
+# The complex field components E_Theta, E_Phi are interpolated together (one stencil for the four real channels), the
+# samples folded across a pole change sign (the theta and phi unit vectors are reversed there) and the fields are
+# returned as Ludwig 3 co-polar and cross-polar components.
+# The bicubic interpolant of each cell can also be precomputed as a table of 16 polynomial coefficients (the samples
+# gathered once with the same edge rules), a query is then a cell lookup and a 2d Horner evaluation.
+# Non-uniformly sampled (increasing) axes are interpolated by sphere_interp_fused too: the cells are found through a
+# lookup table of the axes and the cubic weights are the Catmull-Rom ones for non-uniform knots (tangents from the
+# neighbouring samples, the uniform weights for equal steps). The other kernels need uniform axes.
+# Rectilinear query grids (np.meshgrid of a theta and a phi axis) are separable: sphere_interp_grid computes the 1d
+# stencils of each query axis once and evaluates the grid as two banded products, the phi stencils applied to the
+# pattern rows and the theta stencils to the columns of the result.
+# Directions given as cartesian (LCS) coordinates are interpolated by sphere_interp_directions: inside an optional
+# main beam cone the gain comes from a dense uniform table of the direction cosines u, v about the cone axis (no
+# inverse trigonometric functions), outside it from the spherical stencil.
+# The kernels are compiled on their first call, for the argument types of the call, and loaded from the numba disk
+# cache (__pycache__, or NUMBA_CACHE_DIR if set) afterwards. They are not compiled at import: the numba thread pool of
+# the parallel kernels must not be started before a process forks (the process pools of the pattern tools).
+
+# %% includes
+import numpy as np
+from numba import prange, jit
+
+# %% constants
+# Catmull-Rom weights as polynomials of the offset x, weight k = sum_i CATMULL_ROM[k, i] * x^i (see weights)
+CATMULL_ROM = np.array(((0.0, -0.5, 1.0, -0.5),
+                        (1.0, 0.0, -2.5, 1.5),
+                        (0.0, 0.5, 2.0, -1.5),
+                        (0.0, 0.0, -0.5, 0.5)))
+# steps within this fraction of the mean step are a uniform axis (rounding of the exported angles)
+UNIFORM_TOLERANCE = 0.01
+# maximum number of bins of the cell lookup table of a non-uniform axis
+LOOKUP_BINS = 1 << 16
+# maximum number of nodes per side of a beam table
+BEAM_NODES = 2048
+
+
+# %% grid
+
+def uniform_axis(axis):
+    """
+    :param axis: increasing axis
+    :return: True if uniformly sampled, within UNIFORM_TOLERANCE of the mean step
+    """
+    steps = np.diff(np.asarray(axis, dtype=float))
+    if len(steps) < 2:
+        return True
+    step = (axis[-1] - axis[0]) / len(steps)
+    return bool(np.max(np.abs(steps - step)) <= UNIFORM_TOLERANCE * abs(step))
+
+
+def axis_lookup(axis):
+    """
+    cell lookup table of a non-uniform axis, bins of at most the smallest step so that the cell of a point is the
+    one of its bin or one of the next ones
+    :param axis: increasing axis (samples and the end of the last cell)
+    :return: lookup (first cell of each bin), bin width
+    """
+    span = float(axis[-1] - axis[0])
+    width = max(float(np.min(np.diff(axis))), span / LOOKUP_BINS)
+    bins = int(np.ceil(span / width)) + 1
+    lookup = np.searchsorted(axis, axis[0] + width * np.arange(bins), side='right') - 1
+    return np.clip(lookup, 0, len(axis) - 2).astype(np.int32), width
+
+
+def nonuniform_grid(theta_ax, phi_ax):
+    """
+    sampling of a theta phi grid with non-uniform axes as passed to nonuniform_interp, same edge rules of
+    grid_parameters (the phi axis is a full circle if the gap from the last sample to the first is not larger than
+    the largest step, and theta folds across the poles only if phi + pi is a sample for every phi sample)
+    :param theta_ax: increasing theta axis [rad]
+    :param phi_ax: increasing phi axis [rad]
+    :return: grid (grid_parameters tuple with the lookup bin widths as steps), theta axis, theta lookup, phi axis,
+             phi lookup. The phi axis starts in [0, 2 pi) and ends with the first sample + 2 pi on a full circle
+    """
+    theta = np.array(theta_ax, dtype=float)
+    phi = np.array(phi_ax, dtype=float)
+    phi += phi[0] % (2 * np.pi) - phi[0]
+    theta_steps, phi_steps = np.diff(theta), np.diff(phi)
+    span = phi[-1] - phi[0]
+    if abs(span - 2 * np.pi) < np.min(phi_steps) / 2:
+        # last sample is the first
+        period = len(phi) - 1
+    elif np.min(phi_steps) / 2 < 2 * np.pi - span < 1.5 * np.max(phi_steps):
+        # last sample one cell before the first
+        period = len(phi)
+    else:
+        period = 0
+    if period > 0:
+        phi = np.append(phi[:period], phi[0] + 2 * np.pi)
+    half = period // 2 if period % 2 == 0 else 0
+    if half and np.max(np.abs(phi[half:period] - phi[:period - half] - np.pi)) > np.min(phi_steps) / 100:
+        half = 0
+    fold_start = half > 0 and abs(theta[0]) < theta_steps[0] / 2
+    fold_end = half > 0 and abs(theta[-1] - np.pi) < theta_steps[-1] / 2
+    theta_lookup, theta_width = axis_lookup(theta)
+    phi_lookup, phi_width = axis_lookup(phi)
+    grid = (float(theta[0]), theta_width, len(theta), float(phi[0]), phi_width, len(phi_ax), period, half,
+            bool(fold_start), bool(fold_end))
+    return grid, theta, theta_lookup, phi, phi_lookup
+
+
+def grid_parameters(theta_ax, phi_ax):
+    """
+    sampling of a uniform theta phi grid as passed to the kernels
+    :param theta_ax: uniformly sampled increasing theta axis [rad]
+    :param phi_ax: uniformly sampled increasing phi axis [rad]
+    :return: (theta_min, theta_step, n_theta, phi_min, phi_step, n_phi, period, half, fold_start, fold_end)
+             period: number of distinct phi samples of a full circle, 0 if the phi axis is not a full circle
+             half: phi samples in pi, 0 if the period is odd (no folding across the poles)
+             fold_start, fold_end: the theta axis starts at theta = 0 / ends at theta = pi and folds across the pole
+    """
+    if not (uniform_axis(theta_ax) and uniform_axis(phi_ax)):
+        raise ValueError('non-uniformly sampled axes, only sphere_interp_fused interpolates them')
+    n_theta, n_phi = len(theta_ax), len(phi_ax)
+    theta_step = float(theta_ax[-1] - theta_ax[0]) / (n_theta - 1)
+    phi_step = float(phi_ax[-1] - phi_ax[0]) / (n_phi - 1)
+    span = float(phi_ax[-1] - phi_ax[0])
+    if abs(span - 2 * np.pi) < phi_step / 2:
+        # last sample is the first
+        period = n_phi - 1
+    elif abs(span + phi_step - 2 * np.pi) < phi_step / 2:
+        # last sample one step before the first
+        period = n_phi
+    else:
+        period = 0
+    half = period // 2 if period % 2 == 0 else 0
+    fold_start = half > 0 and abs(float(theta_ax[0])) < theta_step / 2
+    fold_end = half > 0 and abs(float(theta_ax[-1]) - np.pi) < theta_step / 2
+    return (float(theta_ax[0]), theta_step, n_theta, float(phi_ax[0]) % (2 * np.pi), phi_step, n_phi,
+            period, half, fold_start, fold_end)
+
+
+# %% stencil
+
+@jit(nopython=True, nogil=True, cache=True)
+def locate(theta, phi, grid):
+    """
+    cell of a query point
+    :param theta: theta [rad]
+    :param phi: phi [rad]
+    :param grid: grid_parameters
+    :return: theta index, phi index of the cell origin, theta, phi offsets within the cell [0, 1)
+    """
+    u = (theta % (2 * np.pi) - grid[0]) / grid[1]
+    v = (phi % (2 * np.pi) - grid[3]) / grid[4]
+    t = np.floor(u)
+    p = np.floor(v)
+    return int(t), int(p), u - t, v - p
+
+
+@jit(nopython=True, nogil=True, cache=True)
+def row(t, grid):
+    """
+    :param t: theta index, possibly outside the axis
+    :param grid: grid_parameters
+    :return: theta index inside the axis, True if folded across a pole (phi rotated by pi)
+    """
+    n = grid[2]
+    rotated = False
+    if t < 0 and grid[8]:
+        t = -t
+        rotated = True
+    elif t > n - 1 and grid[9]:
+        t = 2 * n - 2 - t
+        rotated = True
+    return min(max(t, 0), n - 1), rotated
+
+
+@jit(nopython=True, nogil=True, cache=True)
+def column(p, rotated, grid):
+    """
+    :param p: phi index, possibly outside the axis
+    :param rotated: rotate by pi (theta folded across a pole)
+    :param grid: grid_parameters
+    :return: phi index inside the axis
+    """
+    period = grid[6]
+    if period > 0:
+        if rotated:
+            p += grid[7]
+        return p % period
+    return min(max(p, 0), grid[5] - 1)
+
+
+@jit(nopython=True, nogil=True, cache=True)
+def weights(x, cubic):
+    """
+    :param x: offset within the cell [0, 1)
+    :param cubic: Catmull-Rom weights (the cubic of sphere_interp), False for linear
+    :return: weights of the 4 samples around the cell
+    """
+    if cubic:
+        return (0.5 * x * (-1.0 + x * (2.0 - x)), 1.0 + 0.5 * x * x * (3.0 * x - 5.0),
+                0.5 * x * (1.0 + x * (4.0 - 3.0 * x)), 0.5 * x * x * (x - 1.0))
+    return 0.0, 1.0 - x, x, 0.0
+
+
+@jit(nopython=True, nogil=True, cache=True)
+def evaluate(pattern, t, p, x_t, x_p, grid, cubic):
+    """
+    interpolated value of one query point
+    :param pattern: (n_phi, n_theta) pattern
+    :param t: theta index of the cell
+    :param p: phi index of the cell
+    :param x_t: theta offset within the cell
+    :param x_p: phi offset within the cell
+    :param grid: grid_parameters
+    :param cubic: bicubic, False for bilinear
+    :return: interpolated value
+    """
+    return stencil_sum(pattern, t, p, weights(x_t, cubic), weights(x_p, cubic), grid)
+
+
+@jit(nopython=True, nogil=True, cache=True)
+def stencil_sum(pattern, t, p, w_t, w_p, grid):
+    """
+    weighted sum of the 4 x 4 samples around a cell
+    :param pattern: (n_phi, n_theta) pattern
+    :param t: theta index of the cell
+    :param p: phi index of the cell
+    :param w_t: theta weights of the 4 rows
+    :param w_p: phi weights of the 4 columns
+    :param grid: grid_parameters
+    :return: interpolated value
+    """
+    value = 0.0
+    for k in range(4):
+        if w_t[k] == 0:
+            continue
+        r, rotated = row(t + k - 1, grid)
+        partial = 0.0
+        for j in range(4):
+            if w_p[j] != 0:
+                partial += w_p[j] * pattern[column(p + j - 1, rotated, grid), r]
+        value += w_t[k] * partial
+    return value
+
+
+@jit(nopython=True, nogil=True, cache=True)
+def evaluate_stack(patterns, t, p, x_t, x_p, grid, cubic, out):
+    """
+    interpolated values of one query point in a stack of patterns, the stencil is shared by all the patterns
+    :param patterns: (n_phi, n_theta, n_patterns) stack, the patterns are contiguous for each sample
+    :param t: theta index of the cell
+    :param p: phi index of the cell
+    :param x_t: theta offset within the cell
+    :param x_p: phi offset within the cell
+    :param grid: grid_parameters
+    :param cubic: bicubic, False for bilinear
+    :param out: output, (n_patterns,) interpolated values
+    :return:
+    """
+    w_t = weights(x_t, cubic)
+    w_p = weights(x_p, cubic)
+    out[:] = 0
+    for k in range(4):
+        if w_t[k] == 0:
+            continue
+        r, rotated = row(t + k - 1, grid)
+        for j in range(4):
+            if w_p[j] == 0:
+                continue
+            w = w_t[k] * w_p[j]
+            c = column(p + j - 1, rotated, grid)
+            for m in range(len(out)):
+                out[m] += w * patterns[c, r, m]
+
+
+@jit(nopython=True, nogil=True, cache=True)
+def evaluate_fields(fields, t, p, x_t, x_p, grid, cubic):
+    """
+    interpolated field components of one query point
+    :param fields: (n_phi, n_theta, 2) complex E_Theta, E_Phi (field_layout)
+    :param t: theta index of the cell
+    :param p: phi index of the cell
+    :param x_t: theta offset within the cell
+    :param x_p: phi offset within the cell
+    :param grid: grid_parameters
+    :param cubic: bicubic, False for bilinear
+    :return: E_Theta, E_Phi
+    """
+    w_t = weights(x_t, cubic)
+    w_p = weights(x_p, cubic)
+    e_theta = 0j
+    e_phi = 0j
+    for k in range(4):
+        if w_t[k] == 0:
+            continue
+        r, rotated = row(t + k - 1, grid)
+        partial_theta = 0j
+        partial_phi = 0j
+        for j in range(4):
+            if w_p[j] != 0:
+                c = column(p + j - 1, rotated, grid)
+                partial_theta += w_p[j] * fields[c, r, 0]
+                partial_phi += w_p[j] * fields[c, r, 1]
+        # unit vectors reversed across the pole
+        w = -w_t[k] if rotated else w_t[k]
+        e_theta += w * partial_theta
+        e_phi += w * partial_phi
+    return e_theta, e_phi
+
+
+@jit(nopython=True, nogil=True, cache=True)
+def horner(table, t, p, x_t, x_p):
+    """
+    bicubic interpolant of a cell from its coefficients
+    :param table: (n_phi, n_theta, 16) coefficient table (coefficient_table)
+    :param t: theta index of the cell
+    :param p: phi index of the cell
+    :param x_t: theta offset within the cell
+    :param x_p: phi offset within the cell
+    :return: interpolated value
+    """
+    c = table[p, t]
+    value = 0.0
+    for i in range(12, -1, -4):
+        value = value * x_t + (((c[i + 3] * x_p + c[i + 2]) * x_p + c[i + 1]) * x_p + c[i])
+    return value
+
+
+# %% non-uniform stencil
+
+@jit(nopython=True, nogil=True, cache=True)
+def position(axis, i, period, fold_start, fold_end):
+    """
+    :param axis: axis of nonuniform_grid
+    :param i: sample index, possibly outside the axis
+    :param period: samples of the full circle (phi), 0 otherwise
+    :param fold_start: the axis folds across theta = 0
+    :param fold_end: the axis folds across theta = pi
+    :return: angle of the sample, continued across the wrap, the folds (mirrored) or the clamped ends (extrapolated
+             with the edge step)
+    """
+    n = len(axis)
+    if period > 0:
+        k = i // period
+        return axis[i - k * period] + 2 * np.pi * k
+    if i < 0:
+        if fold_start:
+            return 2 * axis[0] - axis[min(-i, n - 1)]
+        return axis[0] + i * (axis[1] - axis[0])
+    if i > n - 1:
+        if fold_end:
+            return 2 * axis[n - 1] - axis[max(2 * n - 2 - i, 0)]
+        return axis[n - 1] + (i - n + 1) * (axis[n - 1] - axis[n - 2])
+    return axis[i]
+
+
+@jit(nopython=True, nogil=True, cache=True)
+def locate_axis(x, axis, lookup, width, period, fold_start, fold_end, cubic):
+    """
+    cell and weights of a coordinate on a non-uniform axis
+    :param x: coordinate [rad], in [axis[0], axis[-1]) for a full circle
+    :param axis: axis of nonuniform_grid
+    :param lookup: cell lookup table of the axis
+    :param width: bin width of the lookup table
+    :param period: samples of the full circle (phi), 0 otherwise
+    :param fold_start: the axis folds across theta = 0
+    :param fold_end: the axis folds across theta = pi
+    :param cubic: Catmull-Rom weights for non-uniform knots, False for linear
+    :return: index of the cell origin, weights of the 4 samples around the cell
+    """
+    n = len(axis)
+    if period == 0 and x < axis[0]:
+        i = int(np.floor((x - axis[0]) / (axis[1] - axis[0])))
+    elif period == 0 and x >= axis[n - 1]:
+        i = n - 1 + int(np.floor((x - axis[n - 1]) / (axis[n - 1] - axis[n - 2])))
+    else:
+        i = lookup[min(int((x - axis[0]) / width), len(lookup) - 1)]
+        while i < n - 2 and axis[i + 1] <= x:
+            i += 1
+    x_0 = position(axis, i, period, fold_start, fold_end)
+    x_1 = position(axis, i + 1, period, fold_start, fold_end)
+    d = x_1 - x_0
+    u = (x - x_0) / d
+    if not cubic:
+        return i, (0.0, 1.0 - u, u, 0.0)
+    # tangents from the neighbouring samples
+    a = d / (x_1 - position(axis, i - 1, period, fold_start, fold_end))
+    b = d / (position(axis, i + 2, period, fold_start, fold_end) - x_0)
+    h_00 = 1.0 + u * u * (2.0 * u - 3.0)
+    h_10 = u * (1.0 + u * (u - 2.0))
+    h_01 = u * u * (3.0 - 2.0 * u)
+    h_11 = u * u * (u - 1.0)
+    return i, (-a * h_10, h_00 - b * h_11, h_01 + a * h_10, b * h_11)
+
+
+# %% kernels
+
+@jit(nopython=True, parallel=True, cache=True)
+def fused_interp(theta_out, phi_out, grid, pattern, cubic, out):
+    """
+    interpolates a pattern, the stencil of each query point is computed inside the parallel loop so no index array is
+    allocated (memory: inputs plus output)
+    :param theta_out: 1d theta query points [rad]
+    :param phi_out: 1d phi query points [rad]
+    :param grid: grid_parameters
+    :param pattern: (n_phi, n_theta) pattern
+    :param cubic: bicubic, False for bilinear
+    :param out: output, 1d interpolated values
+    :return: out
+    """
+    for ii in prange(len(out)):
+        t, p, x_t, x_p = locate(theta_out[ii], phi_out[ii], grid)
+        out[ii] = evaluate(pattern, t, p, x_t, x_p, grid, cubic)
+    return out
+
+
+@jit(nopython=True, parallel=True, cache=True)
+def stack_interp(theta_out, phi_out, grid, patterns, cubic, out):
+    """
+    interpolates a stack of patterns sampled on the same grid, one stencil per query point for all the patterns
+    :param theta_out: 1d theta query points [rad]
+    :param phi_out: 1d phi query points [rad]
+    :param grid: grid_parameters
+    :param patterns: (n_phi, n_theta, n_patterns) stack (stack_layout)
+    :param cubic: bicubic, False for bilinear
+    :param out: output, (n_points, n_patterns) interpolated values
+    :return: out
+    """
+    for ii in prange(len(theta_out)):
+        t, p, x_t, x_p = locate(theta_out[ii], phi_out[ii], grid)
+        evaluate_stack(patterns, t, p, x_t, x_p, grid, cubic, out[ii])
+    return out
+
+
+@jit(nopython=True, parallel=True, cache=True)
+def field_interp(theta_out, phi_out, grid, fields, cubic, y_polarized, co, cross, gain):
+    """
+    interpolates the complex field components and projects them on the Ludwig 3 co-polar and cross-polar directions
+    :param theta_out: 1d theta query points [rad]
+    :param phi_out: 1d phi query points [rad]
+    :param grid: grid_parameters
+    :param fields: (n_phi, n_theta, 2) complex E_Theta, E_Phi (field_layout)
+    :param cubic: bicubic, False for bilinear
+    :param y_polarized: co-polar reference along y, False along x
+    :param co: output, 1d complex co-polar field
+    :param cross: output, 1d complex cross-polar field
+    :param gain: output, 1d |co|^2 + |cross|^2
+    :return:
+    """
+    for ii in prange(len(gain)):
+        t, p, x_t, x_p = locate(theta_out[ii], phi_out[ii], grid)
+        e_theta, e_phi = evaluate_fields(fields, t, p, x_t, x_p, grid, cubic)
+        cos_phi = np.cos(phi_out[ii])
+        sin_phi = np.sin(phi_out[ii])
+        e_x = e_theta * cos_phi - e_phi * sin_phi
+        e_y = e_theta * sin_phi + e_phi * cos_phi
+        if y_polarized:
+            co[ii] = e_y
+            cross[ii] = e_x
+        else:
+            co[ii] = e_x
+            cross[ii] = e_y
+        gain[ii] = e_x.real ** 2 + e_x.imag ** 2 + e_y.real ** 2 + e_y.imag ** 2
+
+
+@jit(nopython=True, parallel=True, cache=True)
+def nonuniform_interp(theta_out, phi_out, grid, theta_axis, theta_lookup, phi_axis, phi_lookup, pattern, cubic, out):
+    """
+    interpolates a pattern sampled on non-uniform axes, stencils computed per point
+    :param theta_out: 1d theta query points [rad]
+    :param phi_out: 1d phi query points [rad]
+    :param grid: nonuniform_grid tuple
+    :param theta_axis: theta axis of nonuniform_grid
+    :param theta_lookup: cell lookup table of the theta axis
+    :param phi_axis: phi axis of nonuniform_grid
+    :param phi_lookup: cell lookup table of the phi axis
+    :param pattern: (n_phi, n_theta) pattern
+    :param cubic: bicubic, False for bilinear
+    :param out: output, 1d interpolated values
+    :return: out
+    """
+    for ii in prange(len(out)):
+        theta = theta_out[ii] % (2 * np.pi)
+        phi = phi_out[ii] % (2 * np.pi)
+        if grid[9] and theta > theta_axis[-1]:
+            # across theta = pi, the same direction
+            theta = 2 * theta_axis[-1] - theta
+            phi = (phi + np.pi) % (2 * np.pi)
+        if phi < phi_axis[0] and phi + 2 * np.pi - phi_axis[-1] < phi_axis[0] - phi:
+            # phi axis starting in [0, 2 pi), the point is nearer to its end
+            phi += 2 * np.pi
+        t, w_t = locate_axis(theta, theta_axis, theta_lookup, grid[1], 0, grid[8], grid[9], cubic)
+        p, w_p = locate_axis(phi, phi_axis, phi_lookup, grid[4], grid[6], False, False, cubic)
+        out[ii] = stencil_sum(pattern, t, p, w_t, w_p, grid)
+    return out
+
+
+@jit(nopython=True, parallel=True, cache=True)
+def separable_interp(theta_out, phi_out, grid, pattern, cubic, out):
+    """
+    interpolates a pattern on the rectilinear grid of a theta and a phi query axis. The phi stencils combine the
+    pattern rows, straight and rotated by pi (for the samples folded across the poles), the theta stencils then
+    combine the columns of the result
+    :param theta_out: 1d theta query axis [rad]
+    :param phi_out: 1d phi query axis [rad]
+    :param grid: grid_parameters
+    :param pattern: (n_phi, n_theta) pattern
+    :param cubic: bicubic, False for bilinear
+    :param out: output, (len(phi_out), len(theta_out)) interpolated values
+    :return: out
+    """
+    n_t, n_p, columns = len(theta_out), len(phi_out), pattern.shape[1]
+    rows = np.empty((n_t, 4), dtype=np.int64)
+    sides = np.zeros((n_t, 4), dtype=np.int64)
+    w_theta = np.empty((n_t, 4))
+    for s in prange(n_t):
+        u = (theta_out[s] % (2 * np.pi) - grid[0]) / grid[1]
+        t = np.floor(u)
+        w_t = weights(u - t, cubic)
+        for k in range(4):
+            r, rotated = row(int(t) + k - 1, grid)
+            rows[s, k] = r
+            sides[s, k] = rotated
+            w_theta[s, k] = w_t[k]
+    n_sides = 1 + np.max(sides) if n_t > 0 else 1
+    # phi stencils applied to the pattern rows, side 1 with the columns rotated by pi
+    partial = np.zeros((n_sides, n_p, columns))
+    for q in prange(n_p):
+        v = (phi_out[q] % (2 * np.pi) - grid[3]) / grid[4]
+        p = np.floor(v)
+        w_p = weights(v - p, cubic)
+        for side in range(n_sides):
+            for j in range(4):
+                if w_p[j] == 0:
+                    continue
+                c = column(int(p) + j - 1, side == 1, grid)
+                for r in range(columns):
+                    partial[side, q, r] += w_p[j] * pattern[c, r]
+    for q in prange(n_p):
+        for s in range(n_t):
+            value = 0.0
+            for k in range(4):
+                value += w_theta[s, k] * partial[sides[s, k], q, rows[s, k]]
+            out[q, s] = value
+    return out
+
+
+@jit(nopython=True, parallel=True, cache=True)
+def direction_interp(x_out, y_out, z_out, grid, pattern, beam, frame, beam_pattern, cubic, out):
+    """
+    interpolates a pattern at cartesian directions, from the u v table inside the beam cone and from the spherical
+    stencil outside
+    :param x_out: 1d x of the directions (any length)
+    :param y_out: 1d y of the directions
+    :param z_out: 1d z of the directions
+    :param grid: grid_parameters
+    :param pattern: (n_phi, n_theta) pattern
+    :param beam: beam_table grid
+    :param frame: rows u, v, w versors of the cone frame (w the cone axis)
+    :param beam_pattern: (nodes, nodes) beam table (v, u)
+    :param cubic: bicubic, False for bilinear
+    :param out: output, 1d interpolated values
+    :return: out
+    """
+    for ii in prange(len(out)):
+        x, y, z = x_out[ii], y_out[ii], z_out[ii]
+        r = np.sqrt(x * x + y * y + z * z)
+        if not r > 0:
+            # origin or nan, theta = phi = 0 as the callers of meshCart2sph do
+            x, y, z, r = 0.0, 0.0, 1.0, 1.0
+        u = (frame[0, 0] * x + frame[0, 1] * y + frame[0, 2] * z) / r
+        v = (frame[1, 0] * x + frame[1, 1] * y + frame[1, 2] * z) / r
+        w = frame[2, 0] * x + frame[2, 1] * y + frame[2, 2] * z
+        if w > 0 and u * u + v * v <= beam[3]:
+            a = (u - beam[0]) / beam[1]
+            b = (v - beam[0]) / beam[1]
+            i = np.floor(a)
+            j = np.floor(b)
+            w_u = weights(a - i, cubic)
+            w_v = weights(b - j, cubic)
+            value = 0.0
+            for k in range(4):
+                partial = 0.0
+                for l in range(4):
+                    partial += w_u[l] * beam_pattern[int(j) + k - 1, int(i) + l - 1]
+                value += w_v[k] * partial
+            out[ii] = value
+        else:
+            t, p, x_t, x_p = locate(np.arccos(min(max(z / r, -1.0), 1.0)), np.arctan2(y, x), grid)
+            out[ii] = evaluate(pattern, t, p, x_t, x_p, grid, cubic)
+    return out
+
+
+# %% plan kernels
+
+@jit(nopython=True, parallel=True, cache=True)
+def plan_cells(theta_out, phi_out, grid, t, p, x_t, x_p):
+    """
+    stencils of the query points
+    :param theta_out: 1d theta query points [rad]
+    :param phi_out: 1d phi query points [rad]
+    :param grid: grid_parameters
+    :param t: output, int32 theta cell indices
+    :param p: output, int32 phi cell indices
+    :param x_t: output, theta offsets within the cells
+    :param x_p: output, phi offsets within the cells
+    :return:
+    """
+    for ii in prange(len(theta_out)):
+        a, b, c, d = locate(theta_out[ii], phi_out[ii], grid)
+        t[ii] = a
+        p[ii] = b
+        x_t[ii] = c
+        x_p[ii] = d
+
+
+@jit(nopython=True, parallel=True, cache=True)
+def plan_interp(pattern, t, p, x_t, x_p, grid, cubic, out):
+    """
+    interpolates a pattern on planned query points
+    :param pattern: (n_phi, n_theta) pattern
+    :param t: theta cell indices
+    :param p: phi cell indices
+    :param x_t: theta offsets within the cells
+    :param x_p: phi offsets within the cells
+    :param grid: grid_parameters
+    :param cubic: bicubic, False for bilinear
+    :param out: output, 1d interpolated values
+    :return: out
+    """
+    for ii in prange(len(out)):
+        out[ii] = evaluate(pattern, t[ii], p[ii], x_t[ii], x_p[ii], grid, cubic)
+    return out
+
+
+@jit(nopython=True, parallel=True, cache=True)
+def plan_stack_interp(patterns, t, p, x_t, x_p, grid, cubic, out):
+    """
+    interpolates a stack of patterns on planned query points
+    :param patterns: (n_phi, n_theta, n_patterns) stack (stack_layout)
+    :param t: theta cell indices
+    :param p: phi cell indices
+    :param x_t: theta offsets within the cells
+    :param x_p: phi offsets within the cells
+    :param grid: grid_parameters
+    :param cubic: bicubic, False for bilinear
+    :param out: output, (n_points, n_patterns) interpolated values
+    :return: out
+    """
+    for ii in prange(len(out)):
+        evaluate_stack(patterns, t[ii], p[ii], x_t[ii], x_p[ii], grid, cubic, out[ii])
+    return out
+
+
+# %% coefficient table kernels
+
+@jit(nopython=True, parallel=True, cache=True)
+def table_cells(pattern, grid, table):
+    """
+    coefficients of the bicubic interpolant of every cell, a_il of x_t^i x_p^l at table[p, t, 4 * i + l]
+    :param pattern: (n_phi, n_theta) pattern
+    :param grid: grid_parameters
+    :param table: output, (n_phi, n_theta, 16) coefficients, a cell for each sample (the stencil of the last samples
+                  follows the edge rules)
+    :return:
+    """
+    for p in prange(grid[5]):
+        samples = np.empty((4, 4))
+        for t in range(grid[2]):
+            for k in range(4):
+                r, rotated = row(t + k - 1, grid)
+                for j in range(4):
+                    samples[k, j] = pattern[column(p + j - 1, rotated, grid), r]
+            for i in range(4):
+                for l in range(4):
+                    a = 0.0
+                    for k in range(4):
+                        for j in range(4):
+                            a += CATMULL_ROM[k, i] * CATMULL_ROM[j, l] * samples[k, j]
+                    table[p, t, 4 * i + l] = a
+
+
+@jit(nopython=True, parallel=True, cache=True)
+def table_interp(theta_out, phi_out, grid, pattern, table, out):
+    """
+    bicubic interpolation from the coefficient table, the points outside the table (clamped axes) use the stencil
+    :param theta_out: 1d theta query points [rad]
+    :param phi_out: 1d phi query points [rad]
+    :param grid: grid_parameters
+    :param pattern: (n_phi, n_theta) pattern of the table
+    :param table: (n_phi, n_theta, 16) coefficient table
+    :param out: output, 1d interpolated values
+    :return: out
+    """
+    for ii in prange(len(out)):
+        t, p, x_t, x_p = locate(theta_out[ii], phi_out[ii], grid)
+        if 0 <= t < grid[2] and 0 <= p < grid[5]:
+            out[ii] = horner(table, t, p, x_t, x_p)
+        else:
+            out[ii] = evaluate(pattern, t, p, x_t, x_p, grid, True)
+    return out
+
+
+# %% functions
+
+def stack_layout(patterns):
+    """
+    :param patterns: (n_patterns, n_phi, n_theta) stack, e.g. patternCollection.PatternCollection.G
+    :return: (n_phi, n_theta, n_patterns) contiguous float64 copy, the layout of the stack kernels
+    """
+    return np.ascontiguousarray(np.moveaxis(np.asarray(patterns, dtype=float), 0, -1))
+
+
+def field_layout(E_Theta, E_Phi, scale=1.):
+    """
+    :param E_Theta: (n_phi, n_theta) complex theta field component
+    :param E_Phi: (n_phi, n_theta) complex phi field component
+    :param scale: factor applied to the fields, e.g. sqrt(2 pi / (120 pi radiatedPower)) for |E|^2 equal to the gain
+    :return: (n_phi, n_theta, 2) contiguous complex128 fields, the layout of field_interp
+    """
+    fields = np.empty(np.shape(E_Theta) + (2,), dtype=complex)
+    np.multiply(E_Theta, scale, out=fields[:, :, 0])
+    np.multiply(E_Phi, scale, out=fields[:, :, 1])
+    return fields
+
+
+def sphere_interp_fused(theta_out, phi_out, theta_ax, phi_ax, pattern, cubic=True, out=None):
+    """
+    interpolates a pattern at the query points without temporaries (fused_interp)
+    :param theta_out: theta query points, any shape [rad]
+    :param phi_out: phi query points, same shape of theta_out [rad]
+    :param theta_ax: theta axis of the pattern, uniformly or non-uniformly sampled (increasing) [rad]
+    :param phi_ax: phi axis of the pattern, uniformly or non-uniformly sampled (increasing) [rad]
+    :param pattern: (n_phi, n_theta) pattern
+    :param cubic: bicubic, False for bilinear
+    :param out: optional float64 C contiguous output array of the shape of theta_out
+    :return: interpolated pattern with the shape of theta_out
+    """
+    if out is None:
+        out = np.empty(np.shape(theta_out))
+    elif out.dtype != np.float64 or not out.flags.c_contiguous or np.shape(out) != np.shape(theta_out):
+        raise ValueError('the output has to be C contiguous float64 with the shape of the query points')
+    theta_out = np.ascontiguousarray(theta_out, dtype=float).reshape(-1)
+    phi_out = np.ascontiguousarray(phi_out, dtype=float).reshape(-1)
+    # memory mapped outputs are passed as plain arrays (views)
+    if uniform_axis(theta_ax) and uniform_axis(phi_ax):
+        fused_interp(theta_out, phi_out, grid_parameters(theta_ax, phi_ax), pattern, cubic, np.asarray(out).reshape(-1))
+    else:
+        nonuniform_interp(theta_out, phi_out, *nonuniform_grid(theta_ax, phi_ax), pattern, cubic,
+                          np.asarray(out).reshape(-1))
+    return out
+
+
+def coefficient_table(pattern, theta_ax, phi_ax):
+    """
+    bicubic coefficient table of a pattern (16 float64 per sample)
+    :param pattern: (n_phi, n_theta) pattern
+    :param theta_ax: uniformly sampled theta axis of the pattern [rad]
+    :param phi_ax: uniformly sampled phi axis of the pattern [rad]
+    :return: (n_phi, n_theta, 16) coefficients, see table_cells
+    """
+    table = np.empty(np.shape(pattern) + (16,))
+    table_cells(pattern, grid_parameters(theta_ax, phi_ax), table)
+    return table
+
+
+def sphere_interp_table(theta_out, phi_out, theta_ax, phi_ax, pattern, table, out=None):
+    """
+    bicubic interpolation of a pattern at the query points from its coefficient table (table_interp), same values of
+    sphere_interp_fused to rounding
+    :param theta_out: theta query points, any shape [rad]
+    :param phi_out: phi query points, same shape of theta_out [rad]
+    :param theta_ax: uniformly sampled theta axis of the pattern [rad]
+    :param phi_ax: uniformly sampled phi axis of the pattern [rad]
+    :param pattern: (n_phi, n_theta) pattern
+    :param table: coefficient_table of the pattern
+    :param out: optional float64 C contiguous output array of the shape of theta_out
+    :return: interpolated pattern with the shape of theta_out
+    """
+    if out is None:
+        out = np.empty(np.shape(theta_out))
+    elif out.dtype != np.float64 or not out.flags.c_contiguous or np.shape(out) != np.shape(theta_out):
+        raise ValueError('the output has to be C contiguous float64 with the shape of the query points')
+    table_interp(np.ascontiguousarray(theta_out, dtype=float).reshape(-1),
+                 np.ascontiguousarray(phi_out, dtype=float).reshape(-1), grid_parameters(theta_ax, phi_ax), pattern,
+                 table, np.asarray(out).reshape(-1))
+    return out
+
+
+def sphere_interp_grid(theta_out, phi_out, theta_ax, phi_ax, pattern, cubic=True, out=None):
+    """
+    interpolates a pattern on the rectilinear grid np.meshgrid(theta_out, phi_out), same values of sphere_interp_fused
+    on the meshgrid to rounding with the stencils computed once per query axis (separable_interp)
+    :param theta_out: 1d theta query axis [rad]
+    :param phi_out: 1d phi query axis [rad]
+    :param theta_ax: uniformly sampled theta axis of the pattern [rad]
+    :param phi_ax: uniformly sampled phi axis of the pattern [rad]
+    :param pattern: (n_phi, n_theta) pattern
+    :param cubic: bicubic, False for bilinear
+    :param out: optional float64 C contiguous (len(phi_out), len(theta_out)) output array
+    :return: (len(phi_out), len(theta_out)) interpolated pattern
+    """
+    theta_out = np.ascontiguousarray(theta_out, dtype=float).reshape(-1)
+    phi_out = np.ascontiguousarray(phi_out, dtype=float).reshape(-1)
+    if out is None:
+        out = np.empty((len(phi_out), len(theta_out)))
+    elif out.dtype != np.float64 or not out.flags.c_contiguous or np.shape(out) != (len(phi_out), len(theta_out)):
+        raise ValueError('the output has to be C contiguous float64 with the (phi, theta) shape of the query axes')
+    separable_interp(theta_out, phi_out, grid_parameters(theta_ax, phi_ax), pattern, cubic, np.asarray(out))
+    return out
+
+
+def cone_frame(theta, phi):
+    """
+    :param theta: theta of the cone axis [rad]
+    :param phi: phi of the cone axis [rad]
+    :return: (3, 3) rows theta versor, phi versor and radial versor at the cone axis (u, v, w of the beam table)
+    """
+    frame = np.array(((np.cos(theta) * np.cos(phi), np.cos(theta) * np.sin(phi), -np.sin(theta)),
+                      (-np.sin(phi), np.cos(phi), 0.),
+                      (np.sin(theta) * np.cos(phi), np.sin(theta) * np.sin(phi), np.cos(theta))))
+    frame.flags.writeable = False
+    return frame
+
+
+def beam_table(pattern, theta_ax, phi_ax, cone, step):
+    """
+    pattern of a main beam cone on a uniform grid of the direction cosines u, v about the cone axis (the theta and
+    phi versors at the axis, u = sin(theta) cos(phi), v = sin(theta) sin(phi) for a cone about z), bicubic
+    interpolation of the pattern at the nodes
+    :param pattern: (n_phi, n_theta) pattern
+    :param theta_ax: theta axis of the pattern [rad]
+    :param phi_ax: phi axis of the pattern [rad]
+    :param cone: theta, phi of the cone axis, cone half angle (below pi / 2) [rad]
+    :param step: u v step of the table, enlarged if the table would have more than BEAM_NODES nodes per side
+    :return: beam (grid, frame, (nodes, nodes) table indexed (v, u)) for sphere_interp_directions
+    """
+    if not 0 < cone[2] < np.pi / 2:
+        raise ValueError('the half angle of the beam cone has to be in (0, pi / 2)')
+    radius = np.sin(cone[2])
+    step = max(step, 2 * radius / (BEAM_NODES - 5))
+    # two nodes of guard for the stencils of the cone edge
+    half = int(np.ceil(radius / step))
+    axis = step * np.arange(-half - 1, half + 2)
+    U, V = np.meshgrid(axis, axis)
+    W = np.sqrt(np.maximum(1 - U ** 2 - V ** 2, 0))
+    frame = cone_frame(cone[0], cone[1])
+    # lcs directions of the nodes
+    X, Y, Z = [frame[0, ii] * U + frame[1, ii] * V + frame[2, ii] * W for ii in range(3)]
+    table = sphere_interp_fused(np.arccos(np.clip(Z, -1, 1)), np.arctan2(Y, X), theta_ax, phi_ax, pattern)
+    table.flags.writeable = False
+    return (float(axis[0]), float(step), len(axis), float(radius ** 2)), frame, table
+
+
+def sphere_interp_directions(x_out, y_out, z_out, theta_ax, phi_ax, pattern, beam=None, cubic=True, out=None):
+    """
+    interpolates a pattern at directions given as cartesian coordinates (e.g. LCS positions, any norm), same values of
+    sphere_interp_fused at the theta, phi of meshCart2sph outside the beam cone
+    :param x_out: x of the directions, any shape
+    :param y_out: y of the directions, same shape of x_out
+    :param z_out: z of the directions, same shape of x_out
+    :param theta_ax: uniformly sampled theta axis of the pattern [rad]
+    :param phi_ax: uniformly sampled phi axis of the pattern [rad]
+    :param pattern: (n_phi, n_theta) pattern
+    :param beam: optional beam_table of the pattern, directions inside its cone are interpolated from the table
+    :param cubic: bicubic, False for bilinear
+    :param out: optional float64 C contiguous output array of the shape of x_out
+    :return: interpolated pattern with the shape of x_out
+    """
+    if out is None:
+        out = np.empty(np.shape(x_out))
+    elif out.dtype != np.float64 or not out.flags.c_contiguous or np.shape(out) != np.shape(x_out):
+        raise ValueError('the output has to be C contiguous float64 with the shape of the query points')
+    if beam is None:
+        # empty cone
+        beam = (0., 1., 4, -1.), cone_frame(0., 0.), np.zeros((4, 4))
+    direction_interp(*[np.ascontiguousarray(coordinate, dtype=float).reshape(-1) for coordinate in
+                       (x_out, y_out, z_out)], grid_parameters(theta_ax, phi_ax), pattern, *beam, cubic,
+                     np.asarray(out).reshape(-1))
+    return out
+
+
+def sphere_interp_stack(theta_out, phi_out, theta_ax, phi_ax, patterns, cubic=True):
+    """
+    interpolates a stack of patterns sampled on the same grid in a single pass over the query points
+    :param theta_out: theta query points, any shape [rad]
+    :param phi_out: phi query points, same shape of theta_out [rad]
+    :param theta_ax: uniformly sampled theta axis of the patterns [rad]
+    :param phi_ax: uniformly sampled phi axis of the patterns [rad]
+    :param patterns: (n_patterns, n_phi, n_theta) stack
+    :param cubic: bicubic, False for bilinear
+    :return: (n_patterns, *theta_out.shape) interpolated patterns (a view of a (n_points, n_patterns) array)
+    """
+    shape = np.shape(theta_out)
+    patterns = stack_layout(patterns)
+    out = np.empty((int(np.prod(shape)), patterns.shape[2]))
+    stack_interp(np.ascontiguousarray(theta_out, dtype=float).reshape(-1),
+                 np.ascontiguousarray(phi_out, dtype=float).reshape(-1), grid_parameters(theta_ax, phi_ax), patterns,
+                 cubic, out)
+    return out.T.reshape((patterns.shape[2],) + shape)
+
+
+def sphere_interp_fields(theta_out, phi_out, theta_ax, phi_ax, fields, cubic=True, polarization='x'):
+    """
+    interpolates the complex fields of a pattern at the query points in a single pass, amplitude and phase
+    :param theta_out: theta query points, any shape [rad]
+    :param phi_out: phi query points, same shape of theta_out [rad]
+    :param theta_ax: uniformly sampled theta axis of the pattern [rad]
+    :param phi_ax: uniformly sampled phi axis of the pattern [rad]
+    :param fields: (n_phi, n_theta, 2) complex E_Theta, E_Phi (field_layout)
+    :param cubic: bicubic, False for bilinear
+    :param polarization: 'x' or 'y', co-polar reference direction (Ludwig 3)
+    :return: co, cross, gain with the shape of theta_out: complex co-polar and cross-polar fields and
+             |co|^2 + |cross|^2
+    """
+    if polarization not in ('x', 'y'):
+        raise ValueError("polarization has to be 'x' or 'y'")
+    shape = np.shape(theta_out)
+    co = np.empty(shape, dtype=complex)
+    cross = np.empty(shape, dtype=complex)
+    gain = np.empty(shape)
+    field_interp(np.ascontiguousarray(theta_out, dtype=float).reshape(-1),
+                 np.ascontiguousarray(phi_out, dtype=float).reshape(-1), grid_parameters(theta_ax, phi_ax), fields,
+                 cubic, polarization == 'y', co.reshape(-1), cross.reshape(-1), gain.reshape(-1))
+    return co, cross, gain
+
+
+# %% plan class
+class InterpolationPlan:
+    def __init__(self, theta_ax, phi_ax, theta_out, phi_out, cubic=True):
+        """
+        stencils of a set of query points on a theta phi grid, computed once and applied to any pattern sampled on
+        the same grid (24 bytes per point)
+        :param theta_ax: uniformly sampled theta axis of the patterns [rad]
+        :param phi_ax: uniformly sampled phi axis of the patterns [rad]
+        :param theta_out: theta query points, any shape [rad]
+        :param phi_out: phi query points, same shape of theta_out [rad]
+        :param cubic: bicubic, False for bilinear
+        :return:
+        """
+        self.grid = grid_parameters(theta_ax, phi_ax)
+        self.shape = np.shape(theta_out)
+        self.cubic = cubic
+        points = int(np.prod(self.shape))
+        self.t = np.empty(points, dtype=np.int32)
+        self.p = np.empty(points, dtype=np.int32)
+        self.x_t = np.empty(points)
+        self.x_p = np.empty(points)
+        plan_cells(np.ascontiguousarray(theta_out, dtype=float).reshape(-1),
+                   np.ascontiguousarray(phi_out, dtype=float).reshape(-1), self.grid, self.t, self.p, self.x_t,
+                   self.x_p)
+
+    def __len__(self):
+        return len(self.t)
+
+    def apply(self, pattern, theta_ax, phi_ax, out=None):
+        """
+        interpolates a pattern, or a stack of patterns, on the planned points
+        :param pattern: (n_phi, n_theta) pattern or (n_patterns, n_phi, n_theta) stack
+        :param theta_ax: theta axis of the pattern, it has to be the planned one [rad]
+        :param phi_ax: phi axis of the pattern, it has to be the planned one [rad]
+        :param out: optional float64 C contiguous output array of the planned shape, single pattern only
+        :return: interpolated pattern with the shape of the query points, (n_patterns, *shape) for a stack
+        """
+        if grid_parameters(theta_ax, phi_ax) != self.grid or np.shape(pattern)[-2:] != (self.grid[5], self.grid[2]):
+            raise ValueError('pattern sampled on a grid different from the planned one')
+        if np.ndim(pattern) == 3:
+            if out is not None:
+                raise ValueError('the output array is for a single pattern only')
+            pattern = stack_layout(pattern)
+            out = np.empty((len(self), pattern.shape[2]))
+            plan_stack_interp(pattern, self.t, self.p, self.x_t, self.x_p, self.grid, self.cubic, out)
+            return out.T.reshape((pattern.shape[2],) + self.shape)
+        if out is None:
+            out = np.empty(self.shape)
+        elif out.dtype != np.float64 or not out.flags.c_contiguous or np.shape(out) != self.shape:
+            raise ValueError('the output has to be C contiguous float64 with the planned shape')
+        plan_interp(pattern, self.t, self.p, self.x_t, self.x_p, self.grid, self.cubic, out.reshape(-1))
+        return out
@@ -2,94 +2,160 @@
 # October 2023
 # this script is meant to provide a guideline on how to import the cad meshfiles for the nominal and
 # deformed shell shape
+# the reader (read_deformation) infers the number of nodes, columns and structured grid shape from the file and
+# parses the whole table in one pass with the patternReader tokenizer, it never plots. The plots are in the
+# script section at the bottom.
 
 # %% IMPORTS
+import re
+
 import numpy as np
-import matplotlib.pyplot as plt
-import matplotlib
-from scipy.interpolate import griddata
-
-matplotlib.use('Qt5Agg')
-# %% USER INPUT
-filename = 'random_analysis_results/res_2mode.txt'
-rows = 3312
-columns = 11
-
-# %% reader
-with open(filename, 'r') as file:
-    content = file.read()
-content = content.split('\n')
-
-dataMatrix = np.zeros((rows, columns))
-
-for i in range(len(content)):
-    if "Freq" in content[i]:
-        for j in range(rows):
-            dataline = content[i + j + 1]
-            dataline = dataline.split(" ")
-            if len(dataline) < columns:  # eof
-                print('eof')
-                break
-            else:
-                while "" in dataline:
-                    dataline.remove("")
-                dataline = np.array(dataline[0:columns], dtype=float).reshape((1, columns))
-                dataMatrix[j, :] = dataline.astype('float')
-        print('eof')
-# %%
-# raw line vectors
-Xundef = dataMatrix[:, 2]
-Yundef = dataMatrix[:, 3]
-Zundef = dataMatrix[:, 4]
-Xdef = dataMatrix[:, 5]
-Ydef = dataMatrix[:, 6]
-Zdef = dataMatrix[:, 7]
-# %% reconstructing the meshgrid
-xpoints = 23
-ypoints = 144
-
-Xundef = Xundef.reshape((ypoints, xpoints))  # actually y
-Yundef = Yundef.reshape((ypoints, xpoints))  # actually z
-Zundef = Zundef.reshape((ypoints, xpoints))  # actually x
-Xdef = Xdef.reshape((ypoints, xpoints))
-Ydef = Ydef.reshape((ypoints, xpoints))
-Zdef = Zdef.reshape((ypoints, xpoints))
-# %% plotter
-fig = plt.figure()
-ax = fig.add_subplot(projection='3d')
-ax.plot_surface(Xundef, Yundef, Zundef)
-plt.show()
-fig = plt.figure()
-ax = fig.add_subplot(projection='3d')
-ax.plot_surface(Xdef, Ydef, Zdef)
-plt.show()
-
-# %% resample the deformed xy grid to a uniform grid
-# data to resample and y is z, x is y, and z is x
-
-deformation = Ydef - Yundef
-xlim = [np.min(Zdef), np.max(Zdef)]
-ylim = [np.min(Xdef), np.max(Xdef)]
-
-# resample
-# number of points 1/3 wavelength
-no = np.round((xlim[1] - xlim[0]) / (3e-2 / 5)).astype('int')
-x = np.linspace(xlim[0], xlim[1], no)
-no = np.round((ylim[1] - ylim[0]) / (3e-2 / 5)).astype('int')
-y = np.linspace(ylim[0], ylim[1], no)
-X, Y = np.meshgrid(x, y)
-Z = griddata((Zdef.reshape(-1), Xdef.reshape(-1)), deformation.reshape(-1), (X, Y))
-Z[np.isnan(Z)] = 0
-
-# amplitude mask
-A = griddata((Zdef.reshape(-1), Xdef.reshape(-1)), np.ones_like(Xdef.reshape(-1)),
-             (X, Y), 'nearest')
-A[np.isnan(Z)] = 0
-
-fig, ax = plt.subplots(1)
-ax.pcolormesh(X, Y, Z)
-plt.show()
-
-fig, ax = plt.subplots(1)
-ax.pcolormesh(X, Y, A)
-plt.show()
+
+from patternReader import tokenize
+
+# %% constants
+# columns of the undeformed and deformed node coordinates in the result table
+UNDEFORMED_COLUMNS = slice(2, 5)
+DEFORMED_COLUMNS = slice(5, 8)
+# line starting with a number, the table goes on past it
+NUMERIC_LINE = re.compile(rb'^[ \t]*[-+]?\.?[0-9]', re.MULTILINE)
+
+
+# %% functions
+
+def read_table(filename, marker="Freq"):
+    """
+    parses the numeric table following the header line of a mechanical result file
+    :param filename: result file (e.g. random_analysis_results/res_2mode.txt)
+    :param marker: text identifying the header line, the table starts on the next line
+    :return: (rows, columns) float array, rows and columns as found in the file. The table ends at the end of the
+             file or at a non numeric line with no numeric line after it (footer). ValueError if a row is malformed
+             (missing values or a non numeric token) or the last row is truncated
+    """
+    with open(filename, 'rb') as file:
+        content = file.read()
+    start = content.find(marker.encode())
+    if start < 0:
+        raise ValueError(marker + ' header line not found in ' + filename)
+    start = content.find(b'\n', start) + 1
+    if start == 0:
+        raise ValueError('no data after the header line in ' + filename)
+    end = content.find(b'\n', start)
+    columns = len(content[start:end if end >= 0 else len(content)].split())
+    if columns == 0:
+        raise ValueError('no data after the header line in ' + filename)
+    # upper bound of the rows, trimmed after parsing
+    dataMatrix = np.zeros((content.count(b'\n', start) + 1, columns))
+    count, stop = tokenize(np.frombuffer(content, dtype=np.uint8)[start:], dataMatrix.reshape(-1), 0, columns)
+    # a partial row, or numeric lines after the token that stopped the parsing, are a malformed table
+    if count % columns != 0 or NUMERIC_LINE.search(content, start + stop) is not None:
+        raise ValueError('malformed row {} of the table in {} (missing values or non numeric token)'.format(
+            count // columns + 1, filename))
+    return dataMatrix[:count // columns]
+
+
+def grid_shape(points, tolerance=1e-9):
+    """
+    infers the structured grid of the nodes, i.e. a coordinate that stays constant along consecutive runs of nodes
+    :param points: (n_nodes, 3) node coordinates in file order
+    :param tolerance: relative tolerance on the coordinates
+    :return: (rows, columns) of the grid, the nodes reshape to it in C order. None if the nodes are not structured
+    """
+    n = len(points)
+    scale = max(np.max(np.ptp(points, axis=0)), 1e-300) * tolerance
+    best = None
+    for coordinate in points.T:
+        # length of the first run of constant values
+        run = int(np.argmax(np.abs(coordinate - coordinate[0]) > scale))
+        if run <= 1 or n % run != 0:
+            continue
+        runs = coordinate.reshape((n // run, run))
+        if np.all(np.abs(runs - runs[:, 0:1]) <= scale) and (best is None or run < best):
+            best = run
+    if best is None:
+        return None
+    return n // best, best
+
+
+def read_deformation(filename, marker="Freq"):
+    """
+    reads the undeformed and deformed node coordinates of a mechanical result file
+    :param filename: result file (e.g. random_analysis_results/res_2mode.txt)
+    :param marker: text identifying the header line, the table starts on the next line
+    :return: undeformed, deformed (n_nodes, 3) contiguous coordinate arrays in file column order,
+             grid shape (rows, columns) of the nodes or None if unstructured
+    """
+    dataMatrix = read_table(filename, marker)
+    undeformed = np.ascontiguousarray(dataMatrix[:, UNDEFORMED_COLUMNS])
+    deformed = np.ascontiguousarray(dataMatrix[:, DEFORMED_COLUMNS])
+    return undeformed, deformed, grid_shape(undeformed)
+
+
+if __name__ == '__main__':
+    import matplotlib.pyplot as plt
+    import matplotlib
+    from scipy.interpolate import griddata
+
+    matplotlib.use('Qt5Agg')
+    # %% USER INPUT
+    filename = 'random_analysis_results/res_2mode.txt'
+
+    # %% reader
+    undeformed, deformed, shape = read_deformation(filename)
+    print(len(undeformed), 'nodes, grid', shape)
+    # %%
+    # raw line vectors
+    Xundef = undeformed[:, 0]
+    Yundef = undeformed[:, 1]
+    Zundef = undeformed[:, 2]
+    Xdef = deformed[:, 0]
+    Ydef = deformed[:, 1]
+    Zdef = deformed[:, 2]
+    # %% reconstructing the meshgrid
+    ypoints, xpoints = shape
+
+    Xundef = Xundef.reshape((ypoints, xpoints))  # actually y
+    Yundef = Yundef.reshape((ypoints, xpoints))  # actually z
+    Zundef = Zundef.reshape((ypoints, xpoints))  # actually x
+    Xdef = Xdef.reshape((ypoints, xpoints))
+    Ydef = Ydef.reshape((ypoints, xpoints))
+    Zdef = Zdef.reshape((ypoints, xpoints))
+    # %% plotter
+    fig = plt.figure()
+    ax = fig.add_subplot(projection='3d')
+    ax.plot_surface(Xundef, Yundef, Zundef)
+    plt.show()
+    fig = plt.figure()
+    ax = fig.add_subplot(projection='3d')
+    ax.plot_surface(Xdef, Ydef, Zdef)
+    plt.show()
+
+    # %% resample the deformed xy grid to a uniform grid
+    # data to resample and y is z, x is y, and z is x
+
+    deformation = Ydef - Yundef
+    xlim = [np.min(Zdef), np.max(Zdef)]
+    ylim = [np.min(Xdef), np.max(Xdef)]
+
+    # resample
+    # number of points 1/3 wavelength
+    no = np.round((xlim[1] - xlim[0]) / (3e-2 / 5)).astype('int')
+    x = np.linspace(xlim[0], xlim[1], no)
+    no = np.round((ylim[1] - ylim[0]) / (3e-2 / 5)).astype('int')
+    y = np.linspace(ylim[0], ylim[1], no)
+    X, Y = np.meshgrid(x, y)
+    Z = griddata((Zdef.reshape(-1), Xdef.reshape(-1)), deformation.reshape(-1), (X, Y))
+    Z[np.isnan(Z)] = 0
+
+    # amplitude mask
+    A = griddata((Zdef.reshape(-1), Xdef.reshape(-1)), np.ones_like(Xdef.reshape(-1)),
+                 (X, Y), 'nearest')
+    A[np.isnan(Z)] = 0
+
+    fig, ax = plt.subplots(1)
+    ax.pcolormesh(X, Y, Z)
+    plt.show()
+
+    fig, ax = plt.subplots(1)
+    ax.pcolormesh(X, Y, A)
+    plt.show()
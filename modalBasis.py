@@ -0,0 +1,93 @@
+# Simone Mencarelli
+# October 2026
+# This file contains a modal basis of the shell deformation on the aperture grid. The mode files are parsed once and
+# their normal displacements resampled together (dummyModalApertureField.ApertureResampler, one sparse product) into
+# a (n_modes, ny, nx) stack. The displacement and the aperture field of any combination of modal amplitudes, or of a
+# batch of amplitude vectors (random vibration Monte Carlo), are then array operations on the stack.
+# e.g.
+#   basis = ModalBasis('random_analysis_results', 3e8 / 10e9)
+#   E = basis.field(np.random.default_rng().normal(size=(1000, len(basis))))  # (1000, ny, nx)
+
+# %% includes
+import os
+import re
+
+import numpy as np
+
+from dummyModalApertureField import ApertureResampler
+from mechanicalModelReader import read_deformation
+from patternCollection import pattern_files
+
+
+# %% functions
+
+def mode_files(source):
+    """
+    mode result files sorted by mode number
+    :param source: folder (its res_*mode.txt files), glob pattern, manifest file or list of paths
+    :return: list of paths, sorted by the first number in the file name (res_2mode before res_10mode)
+    """
+    if isinstance(source, str) and os.path.isdir(source):
+        source = os.path.join(source, 'res_*mode.txt')
+    files = pattern_files(source)
+
+    def number(filename):
+        found = re.search(r'\d+', os.path.basename(filename))
+        return (int(found.group()) if found else -1), filename
+
+    return sorted(files, key=number)
+
+
+# %% basis class
+class ModalBasis:
+    def __init__(self, source, wavelength, resampler=None):
+        """
+        parses the mode files and resamples their normal displacement on the lambda/3 aperture grid
+        :param source: folder (its res_*mode.txt files), glob pattern, manifest file or list of mode files, all on the
+                       same mesh
+        :param wavelength: wavelength [m]
+        :param resampler: dummyModalApertureField.ApertureResampler of the mesh, default built on the undeformed
+                          nodes of the first mode
+        :return:
+        """
+        self.files = mode_files(source)
+        if not self.files:
+            raise ValueError('no mode files found in ' + str(source))
+        self.wavelength = wavelength
+        displacement = None
+        for mode, filename in enumerate(self.files):
+            undeformed, deformed, shape = read_deformation(filename)
+            if displacement is None:
+                if resampler is None:
+                    # y is z, x is y and z is x (see aperture_distribution)
+                    resampler = ApertureResampler(undeformed[:, 2], undeformed[:, 0], wavelength)
+                displacement = np.zeros((len(undeformed), len(self.files)))
+            if len(undeformed) != len(displacement):
+                raise ValueError('{} has {} nodes, {} expected'.format(filename, len(undeformed), len(displacement)))
+            displacement[:, mode] = deformed[:, 1] - undeformed[:, 1]
+        self.resampler = resampler
+        self.x, self.y = resampler.x, resampler.y
+        # (n_modes, ny, nx) normal displacement of each mode on the aperture grid
+        self.Z = resampler.resample(displacement)
+
+    def __len__(self):
+        return len(self.Z)
+
+    def displacement(self, amplitudes):
+        """
+        normal displacement of a combination of modes
+        :param amplitudes: (n_modes,) modal amplitudes or (n, n_modes) n amplitude vectors
+        :return: (ny, nx) or (n, ny, nx) displacement [m]
+        """
+        amplitudes = np.asarray(amplitudes)
+        if amplitudes.shape[-1] != len(self):
+            raise ValueError('{} amplitudes for {} modes'.format(amplitudes.shape[-1], len(self)))
+        return np.tensordot(amplitudes, self.Z, axes=1)
+
+    def field(self, amplitudes):
+        """
+        aperture field of a combination of modes, unit amplitude and the phase shift of the normal displacement
+        :param amplitudes: (n_modes,) modal amplitudes or (n, n_modes) n amplitude vectors
+        :return: (ny, nx) or (n, ny, nx) complex field, E.T is the tanEField of a radartools.farField.UniformAperture
+        """
+        return np.exp(1j * self.displacement(amplitudes) / self.wavelength * 2 * np.pi)
@@ -0,0 +1,208 @@
+# Simone Mencarelli
+# October 2026
+# This file contains an on disk cache for parsed antenna patterns.
+# The parsed meshgrids (G, Theta, Phi, E_Theta, E_Phi) are stored as .npy files that are memory mapped when read
+# back, the header values are stored in a small json file next to them. An entry is valid as long as the size and
+# modification time of the source file are unchanged, if they changed the content hash decides. The total size of
+# a cache folder is capped, the least recently used entries are evicted first.
+# The entries go to a per user cache folder (not next to the patterns, which may be read only or shared), a cache
+# that cannot be written is skipped and the patterns are parsed as if uncached.
+
+# %% includes
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+# %% constants
+# default cache folder, in the user cache location (%LOCALAPPDATA% on windows, $XDG_CACHE_HOME or ~/.cache otherwise)
+CACHE_FOLDER = os.path.join(os.environ.get('LOCALAPPDATA') or os.environ.get('XDG_CACHE_HOME') or
+                            os.path.join(os.path.expanduser('~'), '.cache'), 'patterncache')
+# default size cap of a cache folder in bytes
+MAX_BYTES = 1e9
+
+
+# %% functions
+
+def file_hash(filename, block=1 << 24):
+    """
+    content hash of a file, read in blocks
+    :param filename: file path
+    :param block: read size in bytes
+    :return: hex digest string
+    """
+    digest = hashlib.sha1()
+    with open(filename, 'rb') as file:
+        chunk = file.read(block)
+        while chunk:
+            digest.update(chunk)
+            chunk = file.read(block)
+    return digest.hexdigest()
+
+
+# %% cache class
+class PatternCache:
+    def __init__(self, cache_dir=None, max_bytes=MAX_BYTES):
+        """
+        initialization method
+        :param cache_dir: folder for the cache entries, default CACHE_FOLDER (per user)
+        :param max_bytes: size cap of each cache folder, the least recently used entries are evicted beyond it
+        :return:
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hashes = {}  # content hashes of the files seen, by path, size and modification time
+
+    def directory(self, filename):
+        """
+        :param filename: pattern file
+        :return: the cache folder used for filename
+        """
+        if self.cache_dir is not None:
+            return self.cache_dir
+        return CACHE_FOLDER
+
+    def content_hash(self, filename, stat):
+        """
+        content hash of a pattern file, computed once per size and modification time (one read of the file for all
+        the entries of its blocks)
+        :param filename: pattern file
+        :param stat: os.stat of filename
+        :return: hex digest string
+        """
+        key = (os.path.abspath(filename), stat.st_size, stat.st_mtime_ns)
+        if key not in self.hashes:
+            self.hashes[key] = file_hash(filename)
+        return self.hashes[key]
+
+    def entry(self, filename, tag=''):
+        """
+        :param filename: pattern file
+        :param tag: optional string distinguishing different products of the same file
+        :return: the cache entry folder of filename
+        """
+        key = hashlib.sha1((os.path.abspath(filename) + '|' + tag).encode()).hexdigest()
+        return os.path.join(self.directory(filename), key)
+
+    def get(self, filename, tag=''):
+        """
+        looks up a pattern in the cache, stale entries are removed
+        :param filename: pattern file
+        :param tag: optional string distinguishing different products of the same file
+        :return: dictionary with the memory mapped (read only) arrays and the header values, None if not cached
+        """
+        entry = self.entry(filename, tag)
+        try:
+            with open(os.path.join(entry, 'meta.json'), 'r') as file:
+                meta = json.load(file)
+        except (OSError, ValueError):
+            return None
+        stat = os.stat(filename)
+        if stat.st_size != meta['size']:
+            self.remove(entry)
+            return None
+        if stat.st_mtime_ns != meta['mtime']:
+            # touched, the content decides
+            if self.content_hash(filename, stat) != meta['hash']:
+                self.remove(entry)
+                return None
+            meta['mtime'] = stat.st_mtime_ns
+        try:
+            data = {name: np.asarray(np.load(os.path.join(entry, name + '.npy'), mmap_mode='r'))
+                    for name in meta['arrays']}
+        except (OSError, ValueError):
+            self.remove(entry)
+            return None
+        data.update(meta['header'])
+        # least recently used bookkeeping
+        meta['access'] = time.time()
+        try:
+            self._write_meta(entry, meta)
+        except OSError:
+            pass  # read only cache
+        return data
+
+    def put(self, filename, data, tag=''):
+        """
+        stores a parsed pattern in the cache, nothing is stored if the cache folder cannot be written (read only,
+        full disk)
+        :param filename: pattern file the data was parsed from
+        :param data: dictionary with the arrays (stored as .npy files) and the scalar header values (stored in json)
+        :param tag: optional string distinguishing different products of the same file
+        :return:
+        """
+        directory = self.directory(filename)
+        try:
+            os.makedirs(directory, exist_ok=True)
+            # write in a temporary folder and move it in place, readers never see half entries
+            temp = tempfile.mkdtemp(dir=directory, prefix='tmp')
+        except OSError:
+            return
+        try:
+            stat = os.stat(filename)
+            meta = {'source': os.path.abspath(filename),
+                    'size': stat.st_size,
+                    'mtime': stat.st_mtime_ns,
+                    'hash': self.content_hash(filename, stat),
+                    'access': time.time(),
+                    'arrays': [name for name in data if isinstance(data[name], np.ndarray)],
+                    'header': {name: np.asarray(data[name]).item() for name in data
+                               if not isinstance(data[name], np.ndarray)}}
+            for name in meta['arrays']:
+                np.save(os.path.join(temp, name + '.npy'), np.ascontiguousarray(data[name]))
+            self._write_meta(temp, meta)
+            entry = self.entry(filename, tag)
+            self.remove(entry)
+            os.replace(temp, entry)
+            self.evict(directory)
+        except OSError:
+            shutil.rmtree(temp, ignore_errors=True)
+
+    def evict(self, directory):
+        """
+        removes the least recently used entries of a cache folder until it is below the size cap
+        :param directory: cache folder
+        :return:
+        """
+        entries = []
+        for name in os.listdir(directory):
+            entry = os.path.join(directory, name)
+            try:
+                with open(os.path.join(entry, 'meta.json'), 'r') as file:
+                    access = json.load(file)['access']
+                size = sum(os.path.getsize(os.path.join(entry, f)) for f in os.listdir(entry))
+            except (OSError, ValueError, KeyError):
+                continue
+            entries.append((access, size, entry))
+        entries.sort()
+        total = sum(size for access, size, entry in entries)
+        for access, size, entry in entries:
+            if total <= self.max_bytes:
+                break
+            self.remove(entry)
+            total -= size
+
+    def clear(self, filename=None):
+        """
+        empties the cache folder
+        :param filename: pattern file, needed to locate the folder when no cache_dir is set
+        :return:
+        """
+        directory = self.cache_dir if filename is None else self.directory(filename)
+        if directory is not None:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    @staticmethod
+    def remove(entry):
+        shutil.rmtree(entry, ignore_errors=True)
+
+    @staticmethod
+    def _write_meta(entry, meta):
+        temp = os.path.join(entry, 'meta.json.tmp')
+        with open(temp, 'w') as file:
+            json.dump(meta, file)
+        os.replace(temp, os.path.join(entry, 'meta.json'))
@@ -0,0 +1,191 @@
+# Simone Mencarelli
+# October 2026
+# This file contains a catalog of pattern files, a small sqlite database with one row per frequency block holding
+# the header values (frequency, samples, powers) and the grid extents. Files are probed from their header and the
+# first phi cut only, the data section is never parsed. The catalog is updated incrementally: only files that are
+# new or whose size / modification time changed are probed again.
+# e.g. all the 10 GHz patterns with at least 361 phi samples:
+#   PatternCatalog('patterns.sqlite').query(frequency=10e9, min_phi_samples=361)
+
+# %% includes
+import os
+import sqlite3
+
+import numpy as np
+
+from patternCollection import pattern_files
+from patternReader import pattern_format, read_axes, index_pattern, open_pattern
+
+# %% constants
+# catalog columns
+COLUMNS = ('path', 'block', 'size', 'mtime', 'frequency', 'phiSamples', 'thetaSamples',
+           'radiatedPower', 'acceptedPower', 'stimulatedPower', 'theta_min', 'theta_max', 'phi_min', 'phi_max')
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS patterns (
+    path TEXT NOT NULL,
+    block INTEGER NOT NULL,
+    size INTEGER,
+    mtime INTEGER,
+    frequency REAL,
+    phiSamples INTEGER,
+    thetaSamples INTEGER,
+    radiatedPower REAL,
+    acceptedPower REAL,
+    stimulatedPower REAL,
+    theta_min REAL,
+    theta_max REAL,
+    phi_min REAL,
+    phi_max REAL,
+    PRIMARY KEY (path, block)
+);
+CREATE INDEX IF NOT EXISTS patterns_frequency ON patterns (frequency);
+"""
+
+
+# %% functions
+
+def probe_pattern(filename, scan=False):
+    """
+    reads the header and the first phi cut of a pattern file
+    the theta extent comes from the first phi cut, the phi extent from the first two phi cuts (uniform sampling, as
+    assumed by the interpolator). In ffs files the blocks listed in the file header share the first block grid.
+    :param filename: .ffs or .ffe file, optionally compressed
+    :param scan: True to locate and probe every frequency block with patternReader.index_pattern (a byte search of
+                 the whole file), needed for multi frequency ffe files. False probes the file header only
+    :return: list of dictionaries (one per frequency block) with the catalog columns except path, size and mtime
+    """
+    read_header, columns, needle = pattern_format(filename)
+    with open_pattern(filename) as file:
+        header = read_header(file)
+        first = probe_grid(file, header, columns)
+    if scan:
+        index = index_pattern(filename)
+        blocks = []
+        with open_pattern(filename) as file:
+            for block in range(len(index['offset'])):
+                values = {name: index[name][block].item() for name in index}
+                file.seek(values.pop('offset'))
+                values.update(probe_grid(file, values, columns))
+                values['block'] = block
+                blocks.append(values)
+        return blocks
+    first.update({name: header[name] for name in ('frequency', 'phiSamples', 'thetaSamples',
+                                                  'radiatedPower', 'acceptedPower', 'stimulatedPower')})
+    first['block'] = 0
+    blocks = [first]
+    # further blocks declared in the ffs header
+    for block, powers in enumerate(header.get('powers', np.zeros((1, 4)))[1:], 1):
+        values = dict(first)
+        values['radiatedPower'], values['acceptedPower'], values['stimulatedPower'], values['frequency'] = powers
+        values['block'] = block
+        blocks.append(values)
+    return blocks
+
+
+def probe_grid(file, header, columns):
+    """
+    :param file: binary file object positioned at the first data row of a block
+    :param header: dictionary with phiSamples and thetaSamples
+    :param columns: data columns of the format
+    :return: dictionary with theta_min, theta_max, phi_min, phi_max in degrees (nan if the block is truncated)
+    """
+    theta, phi = read_axes(file, header, columns)
+    if theta is None:
+        return {'theta_min': np.nan, 'theta_max': np.nan, 'phi_min': np.nan, 'phi_max': np.nan}
+    return {'theta_min': np.min(theta), 'theta_max': np.max(theta), 'phi_min': phi[0], 'phi_max': phi[-1]}
+
+
+# %% catalog class
+class PatternCatalog:
+    def __init__(self, database='patterns.sqlite'):
+        """
+        opens (or creates) a catalog
+        :param database: sqlite file of the catalog
+        :return:
+        """
+        self.database = database
+        self.connection = sqlite3.connect(database)
+        self.connection.executescript(_SCHEMA)
+
+    def update(self, source, scan=False):
+        """
+        adds new files to the catalog and probes again the modified ones, unchanged files are not opened
+        :param source: glob pattern, manifest file or list of paths (see patternCollection.pattern_files)
+        :param scan: True to probe every block of multi frequency ffe files too (see probe_pattern), it applies to
+                     the files probed in this call
+        :return: number of probed files
+        """
+        known = {row[0]: (row[1], row[2]) for row in
+                 self.connection.execute('SELECT path, size, mtime FROM patterns WHERE block = 0')}
+        probed = 0
+        for filename in pattern_files(source):
+            path = os.path.abspath(filename)
+            try:
+                stat = os.stat(path)
+                if known.get(path) == (stat.st_size, stat.st_mtime_ns):
+                    continue
+                blocks = probe_pattern(path, scan)
+            except (OSError, ValueError) as error:
+                print('skipped', filename + ':', error)
+                continue
+            with self.connection:
+                self.connection.execute('DELETE FROM patterns WHERE path = ?', (path,))
+                for values in blocks:
+                    values.update({'path': path, 'size': stat.st_size, 'mtime': stat.st_mtime_ns})
+                    self.connection.execute(
+                        'INSERT INTO patterns VALUES ({})'.format(', '.join('?' * len(COLUMNS))),
+                        [np.asarray(values[name]).item() for name in COLUMNS])
+            probed += 1
+        return probed
+
+    def prune(self):
+        """
+        removes the files that no longer exist from the catalog
+        :return: number of removed files
+        """
+        paths = [row[0] for row in self.connection.execute('SELECT DISTINCT path FROM patterns')]
+        missing = [(path,) for path in paths if not os.path.isfile(path)]
+        with self.connection:
+            self.connection.executemany('DELETE FROM patterns WHERE path = ?', missing)
+        return len(missing)
+
+    def query(self, frequency=None, tolerance=1e3, min_phi_samples=None, min_theta_samples=None, theta_max=None,
+              where=None, parameters=()):
+        """
+        selects the catalogued blocks matching all the given conditions
+        :param frequency: frequency in Hz
+        :param tolerance: frequency tolerance in Hz
+        :param min_phi_samples: minimum number of phi samples
+        :param min_theta_samples: minimum number of theta samples
+        :param theta_max: the theta extent of the grid must reach at least this angle [deg]
+        :param where: optional sql condition on the catalog columns, e.g. 'radiatedPower > ?'
+        :param parameters: values of the ? placeholders of where
+        :return: list of dictionaries with the catalog columns, sorted by path and block
+        """
+        conditions, values = [], []
+        if frequency is not None:
+            conditions.append('frequency BETWEEN ? AND ?')
+            values += [frequency - tolerance, frequency + tolerance]
+        if min_phi_samples is not None:
+            conditions.append('phiSamples >= ?')
+            values.append(min_phi_samples)
+        if min_theta_samples is not None:
+            conditions.append('thetaSamples >= ?')
+            values.append(min_theta_samples)
+        if theta_max is not None:
+            conditions.append('theta_max >= ?')
+            values.append(theta_max)
+        if where is not None:
+            conditions.append('(' + where + ')')
+            values += list(parameters)
+        statement = 'SELECT {} FROM patterns'.format(', '.join(COLUMNS))
+        if conditions:
+            statement += ' WHERE ' + ' AND '.join(conditions)
+        statement += ' ORDER BY path, block'
+        return [dict(zip(COLUMNS, row)) for row in self.connection.execute(statement, values)]
+
+    def close(self):
+        self.connection.close()
+
+    def __len__(self):
+        return self.connection.execute('SELECT COUNT(*) FROM patterns').fetchone()[0]
@@ -0,0 +1,203 @@
+# Simone Mencarelli
+# October 2026
+# This file contains a bulk loader for whole folders of pattern files (e.g. the deformed antenna Monte Carlo
+# outputs). The files are parsed concurrently in a process pool, each worker writes the gain of its pattern
+# directly in a shared (n_patterns, n_phi, n_theta) stack, a memory mapped file in /dev/shm (RAM) when available,
+# only the axes and header values are pickled back. The workers are spawned (not forked): a fork after the numba
+# thread pool has started deadlocks.
+# Files whose axes differ from the first file are reported and left out of the stack.
+
+# %% includes
+import glob
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import numpy as np
+
+from farFieldCST import ffsLoader, ffeLoader
+from interpolator_v3 import sphere_interp_stack
+from patternReader import pattern_format, index_pattern, open_pattern, pattern_extension
+
+# %% constants
+# folder of the shared stacks, tmpfs on linux
+SHARED_FOLDER = '/dev/shm' if os.path.isdir('/dev/shm') else None
+
+
+# %% functions
+
+def pattern_files(source):
+    """
+    list of pattern files from a glob pattern, a manifest file or a list of paths
+    :param source: glob pattern (e.g. 'lyceanem/*.ffe'), manifest text file with one path per line (relative paths
+                   are relative to the manifest folder, # starts a comment), or a list of paths
+    :return: list of paths
+    """
+    if not isinstance(source, str):
+        return list(source)
+    if os.path.isfile(source) and pattern_extension(source) not in ('.ffs', '.ffe'):
+        folder = os.path.dirname(source)
+        with open(source, 'r') as file:
+            lines = [line.split('#')[0].strip() for line in file]
+        return [os.path.join(folder, line) for line in lines if line]
+    return sorted(glob.glob(source))
+
+
+def probe_samples(filename):
+    """
+    :param filename: pattern file
+    :return: phiSamples, thetaSamples of the first block, read from the header only
+    """
+    read_header, columns, needle = pattern_format(filename)
+    with open_pattern(filename) as file:
+        header = read_header(file)
+    return header['phiSamples'], header['thetaSamples']
+
+
+def load_into(arguments):
+    """
+    process pool worker, parses one pattern and writes its gain in slot of the shared stack
+    :param arguments: slot, filename, shared stack file, stack shape, frequency (None for the first block)
+    :return: slot, theta axis, phi axis (degrees), header dictionary, error message (None if fine)
+    """
+    slot, filename, shared, shape, frequency = arguments
+    try:
+        block, index = 0, None
+        if frequency is not None:
+            index = index_pattern(filename)
+            block = int(np.argmin(np.abs(index['frequency'] - frequency)))
+        if pattern_extension(filename) == '.ffs':
+            loader = ffsLoader
+        else:
+            loader = ffeLoader
+        (Phi, Theta, E_Phi, E_Theta, phiSamples, thetaSamples,
+         radiatedPower, stimulatedPower, acceptedPower) = loader(filename, block, index)
+    except (OSError, ValueError) as error:
+        return slot, None, None, None, str(error)
+    if (phiSamples, thetaSamples) != tuple(shape[1:]):
+        return slot, None, None, None, 'samples {} x {} instead of {} x {}'.format(phiSamples, thetaSamples,
+                                                                                    *shape[1:])
+    # compute directive gain in place
+    pattern = np.memmap(shared, dtype=float, mode='r+', offset=slot * shape[1] * shape[2] * 8, shape=shape[1:])
+    pattern[:] = 2 * np.pi * (np.abs(E_Theta) ** 2 + np.abs(E_Phi) ** 2) / (120 * np.pi * radiatedPower)
+    pattern.flush()
+    del pattern
+    header = {'radiatedPower': radiatedPower, 'acceptedPower': acceptedPower, 'stimulatedPower': stimulatedPower}
+    return slot, Theta[0, :].copy(), Phi[:, 0].copy(), header, None
+
+
+def load_patterns(source, workers=None, frequency=None):
+    """
+    loads many pattern files concurrently into a PatternCollection
+    :param source: glob pattern, manifest file or list of paths (see pattern_files)
+    :param workers: number of processes, default os.cpu_count() (at most one per file), 1 loads in the calling
+                    process. More than one needs the if __name__ == '__main__' guard in the calling script
+    :param frequency: frequency of the block to load in multi frequency files, default the first block
+    :return: PatternCollection
+    """
+    files = pattern_files(source)
+    if len(files) == 0:
+        raise ValueError('no pattern files found: ' + str(source))
+    rejected = {}
+    # the header of the first file sets the grid, the others are checked from their headers before parsing
+    samples = {}
+    for filename in files:
+        try:
+            samples[filename] = probe_samples(filename)
+        except (OSError, ValueError) as error:
+            rejected[filename] = str(error)
+    files = [filename for filename in files if filename in samples]
+    if len(files) == 0:
+        raise ValueError('no readable pattern files: ' + str(rejected))
+    reference = samples[files[0]]
+    for filename in files:
+        if samples[filename] != reference:
+            rejected[filename] = 'samples {} x {} instead of {} x {}'.format(*samples[filename], *reference)
+    files = [filename for filename in files if filename not in rejected]
+    if len(files) == 0:
+        raise ValueError('no readable pattern files: ' + str(rejected))
+
+    # shared stack, written by the workers
+    shape = (len(files), reference[0], reference[1])
+    handle, shared = tempfile.mkstemp(suffix='.patterns', dir=SHARED_FOLDER)
+    os.close(handle)
+    try:
+        stack = np.memmap(shared, dtype=float, mode='w+', shape=shape)
+        arguments = [(slot, filename, shared, shape, frequency) for slot, filename in enumerate(files)]
+        workers = min(workers or os.cpu_count(), len(files))
+        if workers <= 1:
+            results = [load_into(argument) for argument in arguments]
+        else:
+            # the workers find the stack by its file name, the arguments are plain picklable values
+            with ProcessPoolExecutor(workers, mp_context=get_context('spawn')) as executor:
+                results = list(executor.map(load_into, arguments))
+
+        # axes check against the first loaded file
+        keep = []
+        theta, phi = None, None
+        headers = []
+        for slot, theta_ax, phi_ax, header, error in results:
+            if error is None and theta is None:
+                theta, phi = theta_ax, phi_ax
+            if error is None and not (np.array_equal(theta_ax, theta) and np.array_equal(phi_ax, phi)):
+                error = 'theta / phi axes differ from ' + files[keep[0]]
+            if error is not None:
+                rejected[files[slot]] = error
+                continue
+            keep.append(slot)
+            headers.append(header)
+        if theta is None:
+            raise ValueError('no readable pattern files: ' + str(rejected))
+        # the consistent patterns only (a copy), or the shared stack itself
+        G = np.array(stack[keep]) if len(keep) < len(files) else np.asarray(stack)
+    finally:
+        # the mapping stays valid until G is released
+        try:
+            os.remove(shared)
+        except OSError:
+            pass
+    for filename in rejected:
+        print('skipped', filename + ':', rejected[filename])
+    return PatternCollection([files[slot] for slot in keep], G, theta * np.pi / 180, phi * np.pi / 180,
+                             {name: np.array([header[name] for header in headers]) for name in headers[0]},
+                             rejected)
+
+
+# %% collection class
+class PatternCollection:
+    def __init__(self, filenames, G, theta, phi, header, rejected):
+        """
+        stack of gain patterns sampled on the same theta / phi grid
+        :param filenames: list of the n_patterns files, in stack order
+        :param G: (n_patterns, n_phi, n_theta) directive gain stack
+        :param theta: theta axis [rad]
+        :param phi: phi axis [rad]
+        :param header: dictionary of (n_patterns,) arrays with the header powers
+        :param rejected: dictionary filename: reason of the files left out of the stack
+        :return:
+        """
+        self.filenames = filenames
+        self.G = G
+        self.theta = theta
+        self.phi = phi
+        self.header = header
+        self.rejected = rejected
+
+    def __len__(self):
+        return len(self.filenames)
+
+    def mesh_gain_pattern(self, theta_mesh: np.ndarray, phi_mesh: np.ndarray, cubic=True):
+        """
+        gain of all the patterns at the specified meshgrid points, the stencil of each point is computed once for the
+        whole stack (interpolator_v3.sphere_interp_stack)
+        :param theta_mesh: Theta coordinates
+        :param phi_mesh: Phi coordinates
+        :param cubic: default True: bicubic interpolation utilised, False: linear interpolation.
+        :return: (n_patterns, *theta_mesh.shape) gains
+        """
+        # spherical coordinates rearranged for negative theta
+        phi_mesh = np.where(theta_mesh < 0, (phi_mesh + np.pi) % (np.pi * 2), phi_mesh)
+        theta_mesh = np.abs(theta_mesh)
+        gain = sphere_interp_stack(theta_mesh, phi_mesh, self.theta, self.phi, self.G, cubic)
+        return np.maximum(gain, 0, out=gain)
@@ -0,0 +1,178 @@
+# Simone Mencarelli
+# October 2026
+# This file contains a batch converter between the CST ffs, the FEKO ffe and the binary pattern store (.pst)
+# formats. The files are converted in a process pool, one file per task. The workers are spawned (not forked): a fork
+# after the numba thread pool has started deadlocks.
+# The patterns go through the loader convention of farFieldCST: E_Phi of ffe files is flipped along phi by ffeLoader
+# and flipped back when writing ffe, the radiated power of ffe files is the one ffeLoader derives from the gain
+# column, so a converted file loads to the same fields and powers (to the text precision of the formats).
+# usage (from the repository root):
+#   python patternConverter.py "montecarlo/*.ffe" converted --to pst
+#   python patternConverter.py montecarlo converted --to ffs --workers 8
+
+# %% includes
+import argparse
+import glob
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import numpy as np
+
+from farFieldCST import ffsLoader, ffeLoader
+from ffeFileWriter import ffeWrite
+from ffsFileWriter import ffsWrite
+from patternCollection import pattern_files
+from patternReader import header_index, index_pattern, pattern_extension, split_compression
+from patternStore import read_store, write_store, STORE_EXTENSION
+
+# %% constants
+# formats known to the converter
+FORMATS = ('ffs', 'ffe', 'pst')
+
+
+# %% functions
+
+def load_pattern(filename, frequency=None):
+    """
+    loads a pattern of any known format in the loader convention
+    :param filename: .ffs, .ffe (optionally compressed) or .pst file
+    :param frequency: frequency of the block to load in multi frequency files, default the first block
+    :return: dictionary with theta, phi axes [deg], E_Theta, E_Phi (n_phi, n_theta) complex fields and the
+             radiatedPower, acceptedPower, stimulatedPower, frequency header values
+    """
+    extension = pattern_extension(filename)
+    if extension == STORE_EXTENSION:
+        data = read_store(filename)
+        if 'E_Theta' not in data or 'E_Phi' not in data:
+            raise ValueError('pattern store without fields: ' + filename)
+        pattern = {name: data.get(name, 1.) for name in ('radiatedPower', 'acceptedPower', 'stimulatedPower')}
+        pattern.update({'theta': data['theta'] * 180 / np.pi, 'phi': data['phi'] * 180 / np.pi,
+                        'E_Theta': data['E_Theta'], 'E_Phi': data['E_Phi'], 'frequency': data.get('frequency', 0.)})
+        return pattern
+    if extension == '.ffs':
+        loader = ffsLoader
+    elif extension == '.ffe':
+        loader = ffeLoader
+    else:
+        raise ValueError('file extension unknown: ' + filename)
+    # the file is scanned for its blocks only if a frequency is requested from a (possibly) multi frequency file
+    index, blocks = header_index(filename)
+    if frequency is not None and blocks != 1:
+        index = index_pattern(filename)
+    block = 0 if frequency is None else int(np.argmin(np.abs(index['frequency'] - frequency)))
+    (Phi, Theta, E_Phi, E_Theta, phiSamples, thetaSamples,
+     radiatedPower, stimulatedPower, acceptedPower) = loader(filename, block, index)
+    return {'theta': Theta[0, :], 'phi': Phi[:, 0], 'E_Theta': E_Theta, 'E_Phi': E_Phi,
+            'radiatedPower': radiatedPower, 'acceptedPower': acceptedPower, 'stimulatedPower': stimulatedPower,
+            'frequency': index['frequency'][block].item()}
+
+
+def save_pattern(pattern, filename, dtype=np.float32):
+    """
+    writes a pattern in the loader convention (see load_pattern) to the format of the file extension
+    :param pattern: dictionary returned by load_pattern
+    :param filename: .ffs, .ffe or .pst file
+    :param dtype: float type of the pattern store, np.float32 or np.float64
+    :return:
+    """
+    extension = filename[-4:].lower()
+    theta, phi = np.asarray(pattern['theta']), np.asarray(pattern['phi'])
+    E_Theta, E_Phi = np.asarray(pattern['E_Theta']), np.asarray(pattern['E_Phi'])
+    radiatedPower = pattern['radiatedPower']
+    if extension == STORE_EXTENSION:
+        G = 2 * np.pi * (np.abs(E_Theta) ** 2 + np.abs(E_Phi) ** 2) / (120 * np.pi * radiatedPower)
+        header = {'phiSamples': len(phi), 'thetaSamples': len(theta)}
+        header.update({name: pattern[name] for name in ('frequency', 'radiatedPower', 'stimulatedPower',
+                                                        'acceptedPower')})
+        write_store(filename, theta * np.pi / 180, phi * np.pi / 180, G, E_Theta, E_Phi, header, dtype)
+        return
+    # phi varies slower than theta in both text formats
+    T, P = np.meshgrid(theta, phi)
+    if extension == '.ffs':
+        ffsWrite(T.reshape(-1), P.reshape(-1), E_Theta.reshape(-1), E_Phi.reshape(-1), len(phi), len(theta),
+                 filename, radiatedPower, pattern['acceptedPower'], pattern['stimulatedPower'],
+                 pattern['frequency'])
+    elif extension == '.ffe':
+        # the gain columns are computed in the loader convention, ffeLoader recovers the radiated power from them
+        gain_theta = 2 * np.pi * np.abs(E_Theta) ** 2 / (120 * np.pi * radiatedPower)
+        gain_phi = 2 * np.pi * np.abs(E_Phi) ** 2 / (120 * np.pi * radiatedPower)
+        ffeWrite(T.reshape(-1), P.reshape(-1), E_Theta.reshape(-1), np.flip(E_Phi, 0).reshape(-1),
+                 len(phi), len(theta), filename, gain_theta.reshape(-1), gain_phi.reshape(-1),
+                 pattern['acceptedPower'], pattern['stimulatedPower'], pattern['frequency'])
+    else:
+        raise ValueError('file extension unknown: ' + filename)
+
+
+def convert_file(arguments):
+    """
+    process pool worker, converts one file
+    :param arguments: source file, target file, frequency (None for the first block), store dtype
+    :return: source file, target file, bytes read, bytes written, error message (None if fine)
+    """
+    source, target, frequency, dtype = arguments
+    try:
+        save_pattern(load_pattern(source, frequency), target, dtype)
+        return source, target, os.path.getsize(source), os.path.getsize(target), None
+    except (OSError, ValueError) as error:
+        return source, target, 0, 0, str(error)
+
+
+def convert(source, destination, to='pst', workers=None, frequency=None, dtype=np.float32):
+    """
+    converts many pattern files to one format
+    :param source: folder (all its .ffs, .ffe, compressed or not, and .pst files), glob pattern, manifest file or
+                   list of paths
+    :param destination: output folder, created if missing. The file names are kept with the new extension
+    :param to: target format, 'ffs', 'ffe' or 'pst'
+    :param workers: number of processes, default os.cpu_count() (at most one per file), 1 converts in the calling
+                    process. More than one needs the if __name__ == '__main__' guard in the calling script
+    :param frequency: frequency of the block to convert in multi frequency files, default the first block
+    :param dtype: float type of the pattern store, np.float32 or np.float64
+    :return: list of (source, target, bytes read, bytes written, error) tuples
+    """
+    if to not in FORMATS:
+        raise ValueError('unknown target format: ' + to)
+    if isinstance(source, str) and os.path.isdir(source):
+        files = sorted(name for name in glob.glob(os.path.join(source, '*'))
+                       if pattern_extension(name) in ('.ffs', '.ffe', STORE_EXTENSION))
+    else:
+        files = pattern_files(source)
+    os.makedirs(destination, exist_ok=True)
+    arguments = [(filename, os.path.join(destination,
+                                         os.path.splitext(os.path.basename(split_compression(filename)[0]))[0] +
+                                         '.' + to),
+                  frequency, dtype) for filename in files]
+    workers = min(workers or os.cpu_count(), len(arguments))
+    if workers <= 1:
+        return [convert_file(argument) for argument in arguments]
+    with ProcessPoolExecutor(workers, mp_context=get_context('spawn')) as executor:
+        return list(executor.map(convert_file, arguments))
+
+
+# %% command line
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='converts pattern files between the ffs, ffe and pst formats')
+    parser.add_argument('source', help='folder, glob pattern (quoted) or manifest file of the patterns to convert')
+    parser.add_argument('destination', help='output folder')
+    parser.add_argument('--to', choices=FORMATS, default='pst', help='target format, default pst')
+    parser.add_argument('--workers', type=int, default=None, help='number of processes, default all cores')
+    parser.add_argument('--frequency', type=float, default=None,
+                        help='frequency of the block to convert in multi frequency files, default the first block')
+    parser.add_argument('--double', action='store_true', help='store float64 / complex128 in pst files')
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    results = convert(args.source, args.destination, args.to, args.workers, args.frequency,
+                      np.float64 if args.double else np.float32)
+    elapsed = time.perf_counter() - t0
+    converted = [result for result in results if result[4] is None]
+    for source, target, read, written, error in results:
+        if error is not None:
+            print('skipped', source + ':', error)
+    read = sum(result[2] for result in converted)
+    written = sum(result[3] for result in converted)
+    print('converted {} of {} files in {:.2f} s'.format(len(converted), len(results), elapsed))
+    print('{:10.2f} files/s'.format(len(converted) / elapsed))
+    print('{:10.2f} MB/s read, {:.2f} MB/s written'.format(read / 1e6 / elapsed, written / 1e6 / elapsed))
@@ -0,0 +1,568 @@
+# Simone Mencarelli
+# October 2026
+# This file contains the fast parser for CST ffs and FEKO ffe far field files.
+# The header is read line by line once, the numeric body is then streamed in fixed size binary chunks to a
+# JIT compiled tokenizer that fills a preallocated (phiSamples * thetaSamples, columns) float array without any
+# python work per row, so the text is never held in memory as a whole. The kernels release the GIL, files can be
+# parsed concurrently in threads. farFieldCST.ffsLoader and farFieldCST.ffeLoader are built on top of this.
+# Compressed files (.ffs.gz, .ffe.bz2, .ffs.xz, .ffe.zst) are decompressed on the fly while streaming, the .zst ones
+# need the zstandard package.
+# The tokenizers have explicit signatures, compiled on the first import and loaded from the numba disk cache after.
+
+# %% includes
+import bz2
+import gzip
+import io
+import lzma
+
+import numpy as np
+from numba import jit, types
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# %% constants
+# data section markers, the numeric body starts on the line after these
+FFS_DATA_MARKER = "Phi, Theta, Re(E_Theta), Im(E_Theta), Re(E_Phi), Im(E_Phi)"
+FFE_DATA_MARKER = "Re(Etheta)"
+# columns per data row
+FFS_COLUMNS = 6  # Phi, Theta, Re(E_Theta), Im(E_Theta), Re(E_Phi), Im(E_Phi)
+FFE_COLUMNS = 9  # Theta, Phi, Re(E_Theta), Im(E_Theta), Re(E_Phi), Im(E_Phi), Gain(Theta), Gain(Phi), Gain(Total)
+
+# bytes read per chunk when streaming the data section
+CHUNK_SIZE = 1 << 22
+# bytes read per chunk when probing the first data rows (axes)
+PROBE_CHUNK = 1 << 16
+# samples kept around a theta / phi window, the bicubic stencil of sphere_interp spans 1 sample before and 2 after
+GUARD_SAMPLES = 2
+# compression extensions, the data is decompressed while streaming
+COMPRESSIONS = ('.gz', '.bz2', '.xz', '.zst')
+# exact powers of ten, a mantissa below 2^53 scaled by one of these is correctly rounded
+_POW10 = np.array([10.0 ** i for i in range(23)])
+# tokenizer input, chunk of a bytearray or bytes (read only)
+BUFFER = types.Array(types.uint8, 1, 'C', readonly=True)
+
+
+# %% numba functions
+
+@jit([(BUFFER, types.float64[::1], types.int64, types.int64)], nopython=True, nogil=True, cache=True)
+def tokenize(buffer, out, start, columns):
+    """
+    parses whitespace separated decimal numbers from an ascii byte buffer into a preallocated flat array.
+    accepts the fixed point and exponential formats written by CST and FEKO (e.g. 360.000, -1.2e+01, 1.0E+010).
+    values are identical to float() for decimal exponents within +-22 (after moving the decimal point to the end
+    of the mantissa), outside that range they are within one ulp.
+    :param buffer: uint8 array with the ascii text
+    :param out: preallocated float 1d array
+    :param start: index of out where the first parsed number is stored
+    :param columns: numbers per line, parsing stops at a new line ending a partial row (missing values)
+    :return: index of out after the last stored number, index of buffer where parsing stopped
+    """
+    n = len(buffer)
+    size = len(out)
+    k = start
+    i = 0
+    while i < n and k < size:
+        c = buffer[i]
+        # skip blanks, tabs, carriage returns and new lines
+        if c == 10 and k % columns != 0:
+            break
+        if c == 32 or c == 9 or c == 10 or c == 13:
+            i += 1
+            continue
+        # sign
+        negative = False
+        if c == 45 or c == 43:  # - +
+            negative = c == 45
+            i += 1
+        # mantissa digits, the ones after the 17th are dropped shifting the exponent instead
+        mantissa = 0
+        digits = 0
+        seen = 0
+        exponent = 0
+        while i < n and 48 <= buffer[i] <= 57:
+            seen += 1
+            if digits < 18:
+                mantissa = mantissa * 10 + (buffer[i] - 48)
+                if mantissa > 0:
+                    digits += 1
+            else:
+                exponent += 1
+            i += 1
+        if i < n and buffer[i] == 46:  # .
+            i += 1
+            while i < n and 48 <= buffer[i] <= 57:
+                seen += 1
+                if digits < 18:
+                    mantissa = mantissa * 10 + (buffer[i] - 48)
+                    exponent -= 1
+                    if mantissa > 0:
+                        digits += 1
+                i += 1
+        # not a number (comment or next block header), stop here
+        if seen == 0:
+            break
+        if i < n and (buffer[i] == 101 or buffer[i] == 69):  # e E
+            i += 1
+            exp_negative = False
+            if i < n and (buffer[i] == 45 or buffer[i] == 43):
+                exp_negative = buffer[i] == 45
+                i += 1
+            e = 0
+            while i < n and 48 <= buffer[i] <= 57:
+                e = e * 10 + (buffer[i] - 48)
+                i += 1
+            if exp_negative:
+                e = -e
+            exponent += e
+        # scale the mantissa
+        value = float(mantissa)
+        if 0 <= exponent <= 22:
+            value = value * _POW10[exponent]
+        elif -22 <= exponent < 0:
+            value = value / _POW10[-exponent]
+        else:
+            value = value * 10.0 ** exponent
+        if negative:
+            value = -value
+        out[k] = value
+        k += 1
+    return k, i
+
+
+@jit([(BUFFER, types.float64[::1]) + (types.int64,) * 9], nopython=True, nogil=True, cache=True)
+def tokenize_window(buffer, out, start, row, rows, columns, thetaSamples, theta_lo, theta_hi, phi_lo, phi_hi):
+    """
+    like tokenize, but only the data rows inside a window of sample indices are parsed, the other rows are skipped
+    looking for the next new line only. The rows are in file order, theta varying faster than phi.
+    :param buffer: uint8 array with complete lines of ascii text
+    :param out: preallocated float 1d array
+    :param start: index of out where the first parsed number is stored
+    :param row: file row number of the first line in buffer
+    :param rows: total number of data rows of the block
+    :param columns: numbers per row
+    :param thetaSamples: rows per phi cut
+    :param theta_lo: first theta index of the window
+    :param theta_hi: theta index after the window
+    :param phi_lo: first phi index of the window
+    :param phi_hi: phi index after the window
+    :return: index of out after the last stored number, index of buffer where parsing stopped, next file row number
+    """
+    n = len(buffer)
+    k = start
+    i = 0
+    while i < n and k < len(out) and row < rows:
+        c = buffer[i]
+        if c == 32 or c == 9 or c == 10 or c == 13:
+            i += 1
+            continue
+        # a data row starts with a digit, a sign or a point, anything else ends the data section
+        if not (48 <= c <= 57 or c == 45 or c == 43 or c == 46):
+            break
+        theta_idx = row % thetaSamples
+        phi_idx = row // thetaSamples
+        if theta_lo <= theta_idx < theta_hi and phi_lo <= phi_idx < phi_hi:
+            found, stop = tokenize(buffer[i:], out[k:k + columns], 0, columns)
+            k += found
+            i += stop
+            if found < columns:
+                break
+        # next line
+        while i < n and buffer[i] != 10:
+            i += 1
+        row += 1
+    return k, i, row
+
+
+# %% functions
+
+def split_compression(filename):
+    """
+    :param filename: pattern file, optionally with a compression extension
+    :return: filename without the compression extension, compression extension ('' if not compressed)
+    """
+    for extension in COMPRESSIONS:
+        if filename.lower().endswith(extension):
+            return filename[:-len(extension)], extension
+    return filename, ''
+
+
+def pattern_extension(filename):
+    """
+    :param filename: pattern file, optionally with a compression extension
+    :return: lower case extension of the uncompressed file, e.g. '.ffs' for farfield.ffs.gz
+    """
+    return split_compression(filename)[0][-4:].lower()
+
+
+def open_pattern(filename):
+    """
+    opens a pattern file for binary reading, compressed files are decompressed on the fly (nothing is written to
+    disk and the file is never decompressed as a whole). Positions (tell, seek) refer to the uncompressed text,
+    seeking forward in a compressed file decompresses and discards the skipped bytes.
+    :param filename: pattern file, optionally .gz, .bz2, .xz or .zst compressed
+    :return: binary file object
+    """
+    compression = split_compression(filename)[1]
+    if compression == '.gz':
+        return gzip.open(filename, 'rb')
+    elif compression == '.bz2':
+        return bz2.open(filename, 'rb')
+    elif compression == '.xz':
+        return lzma.open(filename, 'rb')
+    elif compression == '.zst':
+        if zstandard is None:
+            raise ValueError('the zstandard package is needed to read ' + filename)
+        return io.BufferedReader(ZstdFile(filename), CHUNK_SIZE)
+    return open(filename, 'rb')
+
+
+class ZstdFile(io.RawIOBase):
+    def __init__(self, filename):
+        """
+        seekable raw reader of a zstandard compressed file (the zstandard stream reader only reads forward),
+        wrapped in an io.BufferedReader by open_pattern for readline. Seeking backwards restarts decompression.
+        :param filename: .zst file
+        :return:
+        """
+        self.filename = filename
+        self.position = 0
+        self.reader = zstandard.ZstdDecompressor().stream_reader(open(filename, 'rb'), closefd=True)
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, buffer):
+        read = self.reader.readinto(buffer)
+        self.position += read
+        return read
+
+    def tell(self):
+        return self.position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self.position
+        elif whence != io.SEEK_SET:
+            raise io.UnsupportedOperation('seek from the end of a compressed file')
+        if offset < self.position:
+            self.reader.close()
+            self.reader = zstandard.ZstdDecompressor().stream_reader(open(self.filename, 'rb'), closefd=True)
+            self.position = 0
+        # decompress and discard up to offset
+        while self.position < offset:
+            skipped = len(self.reader.read(min(offset - self.position, CHUNK_SIZE)))
+            if skipped == 0:
+                break
+            self.position += skipped
+        return self.position
+
+    def close(self):
+        if not self.closed:
+            self.reader.close()
+        super().close()
+
+
+def read_ffs_header(file):
+    """
+    reads the header of a CST ffs file up to the data section marker. For multi frequency files the powers and
+    frequencies of all the blocks are listed in header['powers'] (radiated, accepted, stimulated, frequency rows).
+    it can be called again at the end of a data block to read the samples of the next block.
+    :param file: binary file object positioned at the beginning of the file (or of a block)
+    :return: dictionary with the header fields, the file is left positioned at the first data row
+    """
+    header = {'frequencies': 0,
+              'position': np.zeros((3, 1)),
+              'radiatedPower': 0.,
+              'acceptedPower': 0.,
+              'stimulatedPower': 0.,
+              'frequency': 0.,
+              'phiSamples': 0,
+              'thetaSamples': 0}
+    line = file.readline()
+    while line:
+        line = line.decode('ascii', 'replace')
+        if FFS_DATA_MARKER in line:
+            return header
+        if "Frequencies" in line:
+            header['frequencies'] = int(file.readline())
+        elif "Position" in line:
+            pos = file.readline().split()
+            header['position'] = np.array(pos[0:3], dtype=float).reshape((3, 1))
+        elif "Radiated/Accepted/Stimulated Power , Frequency" in line:
+            # one group of 4 values per frequency, blank line separated
+            values = []
+            while len(values) < 4 * max(header['frequencies'], 1):
+                value = file.readline()
+                if not value:
+                    break
+                if value.strip():
+                    values.append(float(value))
+            header['powers'] = np.array(values).reshape((-1, 4))
+            (header['radiatedPower'], header['acceptedPower'],
+             header['stimulatedPower'], header['frequency']) = header['powers'][0]
+        elif "Total #phi samples, total #theta samples" in line:
+            sam = file.readline().split()
+            header['phiSamples'] = int(sam[0])
+            header['thetaSamples'] = int(sam[1])
+        line = file.readline()
+    raise ValueError('ffs data section not found')
+
+
+def read_ffe_header(file):
+    """
+    reads the header of a FEKO ffe file up to the data column names line.
+    it can be called again at the end of a data block to read the header of the next frequency block.
+    :param file: binary file object positioned at the beginning of the file (or of a block)
+    :return: dictionary with the header fields, the file is left positioned at the first data row
+    """
+    header = {'frequencies': 1,
+              'position': np.zeros((3, 1)),
+              'radiatedPower': 1.,
+              'acceptedPower': 1.,
+              'stimulatedPower': 1.,
+              'frequency': 0.,
+              'phiSamples': 1,
+              'thetaSamples': 1}
+    line = file.readline()
+    while line:
+        line = line.decode('ascii', 'replace')
+        if FFE_DATA_MARKER in line:
+            return header
+        if "#Frequency: " in line:
+            header['frequency'] = float(line[line.find(": ") + 2:])
+        elif "#No. of Theta Samples: " in line:
+            header['thetaSamples'] = int(line[line.find(": ") + 2:])
+        elif "#No. of Phi Samples: " in line:
+            header['phiSamples'] = int(line[line.find(": ") + 2:])
+        elif "#Accepted Power: " in line:  # written by ffeFileWriter only
+            header['acceptedPower'] = float(line[line.find(": ") + 2:])
+        elif "#Stimulated Power: " in line:  # written by ffeFileWriter only
+            header['stimulatedPower'] = float(line[line.find(": ") + 2:])
+        line = file.readline()
+    raise ValueError('ffe data section not found')
+
+
+def read_body(file, rows, columns, chunk_size=CHUNK_SIZE, window=None):
+    """
+    streams the numeric body of a pattern file into the output array, the file is read in fixed size binary
+    chunks so the peak memory is the output array plus one chunk, never the whole text
+    :param file: binary file object positioned at the first data row
+    :param rows: number of data rows, i.e. phiSamples * thetaSamples
+    :param columns: number of columns per row
+    :param chunk_size: bytes read per chunk
+    :param window: optional (phiSamples, thetaSamples, theta_lo, theta_hi, phi_lo, phi_hi) to parse only the rows
+                   with theta index in [theta_lo, theta_hi) and phi index in [phi_lo, phi_hi), see window_samples.
+                   rows is then the number of rows inside the window. The file is not read past the window
+    :return: (rows, columns) float array, number of rows actually found in the file (fewer if the file ends
+             early). ValueError if a row is malformed (missing values or a non numeric token) before the last one
+    """
+    dataMatrix = np.zeros((rows, columns))
+    flat = dataMatrix.reshape(-1)
+    count = 0
+    # one reusable chunk buffer, the partial last line is moved to its front before the next read
+    buffer = bytearray(chunk_size)
+    carry = 0
+    row = 0  # file row at the front of the buffer, window only
+    while count < flat.size:
+        if carry == len(buffer):
+            # a single line longer than the chunk
+            buffer.extend(bytes(len(buffer)))
+        with memoryview(buffer) as view:
+            read = file.readinto(view[carry:])
+        end = carry + read
+        if read == 0:
+            # last line without new line character
+            cut = end
+        else:
+            # parse complete lines only
+            cut = buffer.rfind(b'\n', 0, end) + 1
+        if window is None:
+            count, stop = tokenize(np.frombuffer(buffer, dtype=np.uint8, count=cut), flat, count, columns)
+        else:
+            count, stop, row = tokenize_window(np.frombuffer(buffer, dtype=np.uint8, count=cut), flat, count, row,
+                                               window[0] * window[1], columns, *window[1:])
+        if stop < cut and count < flat.size:
+            raise ValueError('malformed data row {} (missing values or non numeric token)'.format(
+                row + count // columns + 1 if window is None else row + 1))
+        if stop < cut or read == 0:
+            # end of the data section (full or truncated)
+            break
+        buffer[0:end - cut] = buffer[cut:end]
+        carry = end - cut
+    return dataMatrix, count // columns
+
+
+def find_next(file, needle, chunk_size=CHUNK_SIZE):
+    """
+    searches the file from its current position for a byte string, reading in chunks
+    :param file: binary file object
+    :param needle: bytes to find
+    :param chunk_size: bytes read per chunk
+    :return: absolute position of the needle, -1 if not found. The file position is left undefined
+    """
+    position = file.tell()
+    overlap = b''
+    chunk = file.read(chunk_size)
+    while chunk:
+        chunk = overlap + chunk
+        found = chunk.find(needle)
+        if found >= 0:
+            return position - len(overlap) + found
+        position += len(chunk) - len(overlap)
+        overlap = chunk[len(chunk) - len(needle) + 1:]
+        chunk = file.read(chunk_size)
+    return -1
+
+
+def pattern_format(filename):
+    """
+    :param filename: path to the .ffs or .ffe file (optionally compressed)
+    :return: header reader function, data columns and the byte string starting the header of a following block
+    """
+    if pattern_extension(filename) == '.ffs':
+        return read_ffs_header, FFS_COLUMNS, b'\n//'
+    elif pattern_extension(filename) == '.ffe':
+        return read_ffe_header, FFE_COLUMNS, b'\n#'
+    raise ValueError('file extension unknown: ' + filename)
+
+
+def header_index(filename):
+    """
+    index of the first frequency block from the file header alone, the data rows are not read
+    :param filename: path to the .ffs or .ffe file (optionally compressed)
+    :return: index dictionary of the first block (see index_pattern), number of frequency blocks declared in the
+             header (ffs #Frequencies), None when the format does not declare it (ffe)
+    """
+    read_header, columns, needle = pattern_format(filename)
+    with open_pattern(filename) as file:
+        header = read_header(file)
+        header['offset'] = file.tell()
+    index = {name: np.array([header[name]]) for name in ('frequency', 'phiSamples', 'thetaSamples', 'radiatedPower',
+                                                         'acceptedPower', 'stimulatedPower', 'offset')}
+    blocks = max(header['frequencies'], 1) if columns == FFS_COLUMNS else None
+    return index, blocks
+
+
+def index_pattern(filename, chunk_size=CHUNK_SIZE):
+    """
+    scans a (multi frequency) pattern file once and records the position of every frequency block, the data rows
+    are skipped with a chunked byte search and never parsed
+    :param filename: path to the .ffs or .ffe file (optionally compressed)
+    :param chunk_size: bytes read per chunk
+    :return: dictionary of 1d arrays with one element per block: offset (byte offset of the first data row),
+             frequency, phiSamples, thetaSamples, radiatedPower, acceptedPower, stimulatedPower
+    """
+    read_header, columns, needle = pattern_format(filename)
+    blocks = []
+    with open_pattern(filename) as file:
+        header = read_header(file)
+        powers = header.get('powers')
+        while True:
+            block = {name: header[name] for name in ('frequency', 'phiSamples', 'thetaSamples',
+                                                     'radiatedPower', 'acceptedPower', 'stimulatedPower')}
+            if powers is not None and len(blocks) < len(powers):
+                # ffs, the powers of every block are listed in the file header
+                (block['radiatedPower'], block['acceptedPower'],
+                 block['stimulatedPower'], block['frequency']) = powers[len(blocks)]
+            block['offset'] = file.tell()
+            blocks.append(block)
+            # header of the next block
+            position = find_next(file, needle, chunk_size)
+            if position < 0:
+                break
+            file.seek(position + 1)
+            try:
+                header = read_header(file)
+            except ValueError:
+                break  # trailing comments, no more data
+    return {name: np.array([block[name] for block in blocks]) for name in blocks[0]}
+
+
+def read_axes(file, header, columns):
+    """
+    reads the theta axis (first phi cut) and the phi step (first row of the second cut) of a block, the file position
+    is restored afterwards
+    :param file: binary file object positioned at the first data row of a block
+    :param header: dictionary with phiSamples and thetaSamples
+    :param columns: data columns of the format
+    :return: theta axis, phi axis [deg] (phi rebuilt from its first step, the phi window of a non-uniform phi axis
+             is not exact), None, None if the block is truncated
+    """
+    position = file.tell()
+    thetaSamples = header['thetaSamples']
+    rows = thetaSamples + (header['phiSamples'] > 1)
+    dataMatrix, found = read_body(file, rows, columns, PROBE_CHUNK)
+    file.seek(position)
+    if found < rows:
+        return None, None
+    # column of theta and phi
+    theta_col, phi_col = (1, 0) if columns == FFS_COLUMNS else (0, 1)
+    theta = dataMatrix[:thetaSamples, theta_col]
+    phi_step = dataMatrix[-1, phi_col] - dataMatrix[0, phi_col] if rows > thetaSamples else 0.
+    return theta, dataMatrix[0, phi_col] + phi_step * np.arange(header['phiSamples'])
+
+
+def window_samples(theta, phi, window, guard=GUARD_SAMPLES, crop_phi=True):
+    """
+    sample index ranges covering a theta / phi window plus a guard band for the interpolation stencil.
+    phi is cropped only if the window stays away from the poles (sphere_interp needs the whole phi circle to
+    interpolate across them) and does not cross the end of the phi axis.
+    :param theta: increasing theta axis [deg], uniformly sampled or not
+    :param phi: increasing phi axis [deg]
+    :param window: (theta_min, theta_max) or (theta_min, theta_max, phi_min, phi_max) [deg]
+    :param guard: samples kept on each side of the window
+    :param crop_phi: False to keep every phi cut
+    :return: theta_lo, theta_hi, phi_lo, phi_hi sample indices, the window is [lo, hi)
+    """
+    # last sample not after the window start, first sample after the window end
+    theta_lo = max(int(np.searchsorted(theta, window[0], side='right')) - 1 - guard, 0)
+    theta_hi = min(int(np.searchsorted(theta, window[1], side='right')) + guard, len(theta))
+    phi_lo, phi_hi = 0, len(phi)
+    if crop_phi and len(window) > 2 and len(phi) > 1 and 0 < theta_lo and theta_hi < len(theta):
+        lo = int(np.searchsorted(phi, window[2], side='right')) - 1 - guard
+        hi = int(np.searchsorted(phi, window[3], side='right')) + guard
+        if 0 <= lo < hi <= len(phi):
+            phi_lo, phi_hi = lo, hi
+    return theta_lo, theta_hi, phi_lo, phi_hi
+
+
+def read_pattern(filename, block=0, index=None, window=None):
+    """
+    parses one frequency block of a ffs or ffe file, the format is chosen from the extension
+    :param filename: path to the .ffs or .ffe file (optionally compressed)
+    :param block: frequency block number, 0 is the first one
+    :param index: output of index_pattern, only needed for block > 0 (computed if not given)
+    :param window: optional (theta_min, theta_max) or (theta_min, theta_max, phi_min, phi_max) [deg], only the rows
+                   inside the window (plus guard samples, see window_samples) are parsed. header['phiSamples'] and
+                   header['thetaSamples'] are then the samples of the window and header['window'] holds the sample
+                   index ranges. ffe files are cropped in theta only (ffeLoader flips E_Phi over the whole phi axis)
+    :return: header dictionary, (rows, columns) data matrix, number of rows found
+    """
+    read_header, columns, needle = pattern_format(filename)
+    with open_pattern(filename) as file:
+        header = read_header(file)
+        if block > 0:
+            if index is None:
+                index = index_pattern(filename)
+            for name in index:
+                header[name] = index[name][block].item()
+            file.seek(header['offset'])
+        if window is None:
+            dataMatrix, found = read_body(file, header['phiSamples'] * header['thetaSamples'], columns)
+            return header, dataMatrix, found
+        theta, phi = read_axes(file, header, columns)
+        if theta is None:
+            raise ValueError('data section truncated: ' + filename)
+        samples = window_samples(theta, phi, window, crop_phi=columns == FFS_COLUMNS)
+        header['window'] = samples
+        samples = (header['phiSamples'], header['thetaSamples']) + samples
+        header['thetaSamples'] = samples[3] - samples[2]
+        header['phiSamples'] = samples[5] - samples[4]
+        dataMatrix, found = read_body(file, header['phiSamples'] * header['thetaSamples'], columns, window=samples)
+    return header, dataMatrix, found
@@ -0,0 +1,237 @@
+# Simone Mencarelli
+# October 2026
+# This file contains a compact binary container for antenna patterns.
+# Only the 1d theta and phi axes are stored (the meshgrids are outer products of them), the gain and the complex
+# field components are stored as float32 / complex64 by default (float64 / complex128 optional).
+# The file is a short json description followed by the raw arrays (64 bytes aligned), the arrays are memory mapped
+# read only, so processes opening the same store share one physical copy of it in the page cache.
+# CompactPattern has the same mesh_gain_pattern / mesh_field_pattern / max_gain interface of farFieldCST.Aperture.
+
+# %% includes
+import json
+import os
+import struct
+
+import numpy as np
+
+from farFieldCST import ffsLoader, ffeLoader
+from interpolator_v3 import sphere_interp_fused, sphere_interp_fields, sphere_interp_grid, field_layout, uniform_axis
+from patternReader import index_pattern, pattern_extension, split_compression
+
+# %% constants
+# file signature and format version
+MAGIC = b'PATSTORE'
+VERSION = 1
+# extension of the store files
+STORE_EXTENSION = '.pst'
+# byte alignment of the arrays in the file
+ALIGNMENT = 64
+# magic, version, description length
+_PREAMBLE = struct.Struct('<8sII')
+
+
+# %% functions
+
+def aligned(size):
+    """
+    :param size: bytes
+    :return: size rounded up to a multiple of ALIGNMENT
+    """
+    return -(-size // ALIGNMENT) * ALIGNMENT
+
+
+def write_store(filename, theta, phi, G, E_Theta=None, E_Phi=None, header=None, dtype=np.float32):
+    """
+    writes a pattern store file
+    :param filename: output file (.pst)
+    :param theta: theta axis [rad]
+    :param phi: phi axis [rad]
+    :param G: (n_phi, n_theta) directive gain
+    :param E_Theta: optional (n_phi, n_theta) complex theta field component
+    :param E_Phi: optional (n_phi, n_theta) complex phi field component
+    :param header: optional dictionary of scalar values (powers, frequency...)
+    :param dtype: float type of the gain, np.float32 (default) or np.float64, the fields use the complex counterpart
+    :return:
+    """
+    dtype = np.dtype(dtype)
+    complex_dtype = np.result_type(dtype, np.complex64)
+    arrays = {'theta': np.asarray(theta, dtype=float).reshape(-1),
+              'phi': np.asarray(phi, dtype=float).reshape(-1),
+              'G': np.asarray(G, dtype=dtype)}
+    if E_Theta is not None:
+        arrays['E_Theta'] = np.asarray(E_Theta, dtype=complex_dtype)
+    if E_Phi is not None:
+        arrays['E_Phi'] = np.asarray(E_Phi, dtype=complex_dtype)
+    shape = (len(arrays['phi']), len(arrays['theta']))
+    for name in arrays:
+        if name not in ('theta', 'phi') and arrays[name].shape != shape:
+            raise ValueError('{} shape {} instead of {}'.format(name, arrays[name].shape, shape))
+
+    # array offsets are relative to the first aligned byte after the description
+    meta = {'header': {name: np.asarray(value).item() for name, value in (header or {}).items()},
+            'arrays': {}}
+    offset = 0
+    for name in arrays:
+        meta['arrays'][name] = {'dtype': arrays[name].dtype.str, 'shape': list(arrays[name].shape),
+                                'offset': offset}
+        offset += aligned(arrays[name].nbytes)
+    description = json.dumps(meta).encode()
+    start = aligned(_PREAMBLE.size + len(description))
+
+    temp = filename + '.tmp'
+    with open(temp, 'wb') as file:
+        file.write(_PREAMBLE.pack(MAGIC, VERSION, len(description)))
+        file.write(description)
+        for name in arrays:
+            file.seek(start + meta['arrays'][name]['offset'])
+            file.write(np.ascontiguousarray(arrays[name]).tobytes())
+        file.truncate(start + offset)
+    os.replace(temp, filename)
+
+
+def read_store(filename):
+    """
+    opens a pattern store file, the arrays are memory mapped read only
+    :param filename: store file (.pst)
+    :return: dictionary with the arrays (theta, phi, G and, if stored, E_Theta, E_Phi) and the header values
+    """
+    with open(filename, 'rb') as file:
+        preamble = file.read(_PREAMBLE.size)
+        if len(preamble) < _PREAMBLE.size:
+            raise ValueError('not a pattern store: ' + filename)
+        magic, version, length = _PREAMBLE.unpack(preamble)
+        if magic != MAGIC:
+            raise ValueError('not a pattern store: ' + filename)
+        if version > VERSION:
+            raise ValueError('pattern store version {} not supported: {}'.format(version, filename))
+        meta = json.loads(file.read(length).decode())
+    start = aligned(_PREAMBLE.size + length)
+    data = dict(meta['header'])
+    for name, array in meta['arrays'].items():
+        data[name] = np.memmap(filename, dtype=np.dtype(array['dtype']), mode='r', offset=start + array['offset'],
+                               shape=tuple(array['shape']))
+    return data
+
+
+def pattern_to_store(pattern_file, store_file=None, frequency=None, dtype=np.float32, fields=True):
+    """
+    converts a ffs or ffe pattern (one frequency block) to a pattern store file
+    :param pattern_file: .ffs or .ffe file, optionally compressed
+    :param store_file: output file, default the pattern file name with the .pst extension
+    :param frequency: frequency of the block to convert in multi frequency files, default the first block
+    :param dtype: float type of the stored gain, np.float32 (default) or np.float64
+    :param fields: False to store the gain only
+    :return: path of the store file
+    """
+    if store_file is None:
+        store_file = os.path.splitext(split_compression(pattern_file)[0])[0] + STORE_EXTENSION
+    index = index_pattern(pattern_file)
+    block = 0 if frequency is None else int(np.argmin(np.abs(index['frequency'] - frequency)))
+    if pattern_extension(pattern_file) == '.ffs':
+        loader = ffsLoader
+    elif pattern_extension(pattern_file) == '.ffe':
+        loader = ffeLoader
+    else:
+        raise ValueError('file extension unknown: ' + pattern_file)
+    (Phi, Theta, E_Phi, E_Theta, phiSamples, thetaSamples,
+     radiatedPower, stimulatedPower, acceptedPower) = loader(pattern_file, block, index)
+    if not (np.all(Theta == Theta[0:1, :]) and np.all(Phi == Phi[:, 0:1])):
+        raise ValueError('theta / phi samples are not a regular grid: ' + pattern_file)
+    # directive gain computed in double precision, then stored
+    G = 2 * np.pi * (np.abs(E_Theta) ** 2 + np.abs(E_Phi) ** 2) / (120 * np.pi * radiatedPower)
+    header = {'phiSamples': phiSamples, 'thetaSamples': thetaSamples, 'frequency': index['frequency'][block],
+              'radiatedPower': radiatedPower, 'stimulatedPower': stimulatedPower, 'acceptedPower': acceptedPower}
+    write_store(store_file, Theta[0, :] * np.pi / 180, Phi[:, 0] * np.pi / 180, G,
+                E_Theta if fields else None, E_Phi if fields else None, header, dtype)
+    return store_file
+
+
+# %% compact pattern class
+class CompactPattern:
+    def __init__(self, filename):
+        """
+        pattern backed by a store file, same interface of farFieldCST.Aperture for the gain
+        :param filename: store file (.pst), see pattern_to_store
+        :return:
+        """
+        data = read_store(filename)
+        self.filename = filename
+        self.theta = data.pop('theta')  # [rad]
+        self.phi = data.pop('phi')  # [rad]
+        self.G = data.pop('G')
+        self.E_Theta = data.pop('E_Theta', None)
+        self.E_Phi = data.pop('E_Phi', None)
+        self.fields = None  # interpolator layout of the fields, on request only
+        self.header = data
+        self.phiSamples = len(self.phi)
+        self.thetaSamples = len(self.theta)
+        self.frequency = data.get('frequency', 0.)
+
+    def mesh_gain_pattern(self, theta_mesh: np.ndarray, phi_mesh: np.ndarray, cubic=True, out=None):
+        """
+        retruns the gain pattern at the specified meshgrid points in spherical coordinates.
+        :param theta_mesh: Theta coordinates
+        :param phi_mesh: Phi coordinates
+        :param cubic: default True: bicubic interpolation utilised, False: linear interpolation.
+        :param out: optional C contiguous float64 output array of the mesh shape
+        :return:
+        """
+        # spherical coordinates rearranged for negative theta
+        phi_mesh = np.where(theta_mesh < 0, (phi_mesh + np.pi) % (np.pi * 2), phi_mesh)
+        theta_mesh = np.abs(theta_mesh)
+        outpattern = sphere_interp_fused(theta_mesh, phi_mesh, self.theta, self.phi, np.asarray(self.G), cubic, out)
+        return np.maximum(outpattern, 0, out=outpattern)
+
+    def grid_gain_pattern(self, theta: np.ndarray, phi: np.ndarray, cubic=True, out=None):
+        """
+        gain pattern on the rectilinear grid of a theta and a phi axis, see farFieldCST.Aperture.grid_gain_pattern
+        :param theta: 1d theta axis
+        :param phi: 1d phi axis
+        :param cubic: default True: bicubic interpolation utilised, False: linear interpolation.
+        :param out: optional C contiguous float64 (len(phi), len(theta)) output array
+        :return: (len(phi), len(theta)) gain
+        """
+        if not (uniform_axis(self.theta) and uniform_axis(self.phi)):
+            return self.mesh_gain_pattern(*np.meshgrid(theta, phi), cubic, out)
+        theta, phi = np.asarray(theta, dtype=float).reshape(-1), np.asarray(phi, dtype=float).reshape(-1)
+        G = np.asarray(self.G)
+        outpattern = sphere_interp_grid(np.abs(theta), phi, self.theta, self.phi, G, cubic, out)
+        negative = theta < 0
+        if np.any(negative):
+            # phi rotated by pi for the negative theta columns
+            outpattern[:, negative] = sphere_interp_grid(-theta[negative], (phi + np.pi) % (np.pi * 2), self.theta,
+                                                         self.phi, G, cubic)
+        return np.maximum(outpattern, 0, out=outpattern)
+
+    def mesh_field_pattern(self, theta_mesh: np.ndarray, phi_mesh: np.ndarray, cubic=True, polarization='x'):
+        """
+        complex co-polar and cross-polar fields (Ludwig 3) and gain at the specified meshgrid points, see
+        farFieldCST.Aperture.mesh_field_pattern, the store has to contain the fields
+        :param theta_mesh: Theta coordinates
+        :param phi_mesh: Phi coordinates
+        :param cubic: default True: bicubic interpolation utilised, False: linear interpolation.
+        :param polarization: 'x' or 'y', co-polar reference direction
+        :return: co, cross, gain with the shape of the meshgrid
+        """
+        if self.E_Theta is None or self.E_Phi is None:
+            raise ValueError('no fields in the store: ' + self.filename)
+        if self.fields is None:
+            # complex128 working copy, scaled so that |E|^2 is the gain
+            self.fields = field_layout(self.E_Theta, self.E_Phi,
+                                       np.sqrt(2 * np.pi / (120 * np.pi * self.header['radiatedPower'])))
+        phi_mesh = np.where(theta_mesh < 0, (phi_mesh + np.pi) % (np.pi * 2), phi_mesh)
+        theta_mesh = np.abs(theta_mesh)
+        return sphere_interp_fields(theta_mesh, phi_mesh, self.theta, self.phi, self.fields, cubic, polarization)
+
+    def max_gain(self):
+        """
+        :return: the peak (broadside) gain of pattern
+        """
+        return float(np.max(self.G))
+
+    def nbytes(self):
+        """
+        :return: bytes of the stored arrays
+        """
+        return sum(array.nbytes for array in (self.theta, self.phi, self.G, self.E_Theta, self.E_Phi)
+                   if array is not None)
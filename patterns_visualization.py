@@ -4,7 +4,7 @@
 
 # %%includes
 import numpy as np
-from farFieldCST import Aperture
+from farFieldCST import prefetch_apertures
 import matplotlib.pyplot as plt
 import matplotlib
 from radartools.utils import *
@@ -17,8 +17,8 @@ distorted_pattern = 'lyceanem/DeformedAntennav2.ffe'
 # reference_pattern = 'dummyReference.ffs'
 # distorted_pattern = 'dummyDistortedMode2.ffs' # ode 2 is mode 1 actually
 # %% load patterns
-ant_ref = Aperture(reference_pattern)
-ant_dist = Aperture(distorted_pattern)
+# both patterns load while the interpolator compiles
+ant_ref, ant_dist = [future.result() for future in prefetch_apertures([reference_pattern, distorted_pattern])]
 #%%
 fw = 3.45
 fh = fw*.7
@@ -28,16 +28,14 @@ theta = np.linspace((-90) * np.pi / 180, (90)* np.pi / 180, 2501)
 phi_E = np.array(0)
 phi_H = np.array(np.pi / 2)
 # E cut
-T, P = np.meshgrid(theta, phi_E)
-gain_r = ant_ref.mesh_gain_pattern(T, P)
-gain_d = ant_dist.mesh_gain_pattern(T, P, cubic=True) # need more samples in the pattern
+gain_r = ant_ref.grid_gain_pattern(theta, phi_E)
+gain_d = ant_dist.grid_gain_pattern(theta, phi_E, cubic=True) # need more samples in the pattern
 fig, ax = plt.subplots(1)
 ax.plot(theta * 180 / np.pi, 10*np.log10(gain_r.reshape(-1)), 'r', label='E-cut Nom.')
 ax.plot(theta * 180 / np.pi, 10*np.log10(gain_d.reshape(-1)), '--r', label='E-cut Dist.')
 # H cut
-T, P = np.meshgrid(theta, phi_H)
-gain_r = ant_ref.mesh_gain_pattern(T, P)
-gain_d = ant_dist.mesh_gain_pattern(T, P)
+gain_r = ant_ref.grid_gain_pattern(theta, phi_H)
+gain_d = ant_dist.grid_gain_pattern(theta, phi_H)
 ax.plot(theta * 180 / np.pi, 10*np.log10(gain_r.reshape(-1)), 'b', label='H-cut Nom.')
 ax.plot(theta * 180 / np.pi, 10*np.log10(gain_d.reshape(-1)), '--b', label='H-cut Dist.')
 ax.set_xlabel('$\Theta$ [deg]')
@@ -59,8 +57,8 @@ plt.show()
 # reference pattern
 phi = np.linspace(0, 2 * np.pi, 571)
 T, P = np.meshgrid(theta, phi)
-gain_r = ant_ref.mesh_gain_pattern(T, P)
-gain_d = ant_dist.mesh_gain_pattern(T, P)
+gain_r = ant_ref.grid_gain_pattern(theta, phi)
+gain_d = ant_dist.grid_gain_pattern(theta, phi)
 # %%
 fig, ax = plt.subplots(1)
 c = ax.pcolormesh(T * np.cos(P), T * np.sin(P), 10*np.log10(gain_r), cmap=plt.cm.plasma, vmin=-10, vmax=20, rasterized=True)
@@ -86,7 +86,7 @@ class RadarGeometry():
         :param z: altitude i.e. z GCS coordinate
         :return: array form of initial position
         """
-        self.S_0 = np.array([[x], [y], [z]])  # column
+        self.S_0 = np.array([[x], [y], [z]], dtype=float)  # column
         return self.S_0
 
     def get_lcs_of_point(self, point_target, t):
@@ -156,8 +156,11 @@ def cart2sph(P: np.ndarray) -> np.ndarray:
     return np.stack((r, theta, phi))
 
 
+# the meshgrid functions below are compiled on their first call and then loaded from the numba disk cache
+
+
 # polar to rectangular meshgrid
-@jit(nopython=True, parallel=True)
+@jit(nopython=True, parallel=True, cache=True)
 def meshSph2cart(r_mesh, theta_mesh, phi_mesh):
     """
 
@@ -173,15 +176,15 @@ def meshSph2cart(r_mesh, theta_mesh, phi_mesh):
     rows, columns = r_mesh.shape
     for rr in prange(rows):
         for cc in prange(columns):
-            x = r_mesh[rr, cc] * np.sin(theta_mesh[rr, cc]) * np.cos(phi_mesh[rr, cc])
-            y = r_mesh[rr, cc] * np.sin(theta_mesh[rr, cc]) * np.sin(phi_mesh[rr, cc])
-            z = r_mesh[rr, cc] * np.cos(theta_mesh[rr, cc])
+            x[rr, cc] = r_mesh[rr, cc] * np.sin(theta_mesh[rr, cc]) * np.cos(phi_mesh[rr, cc])
+            y[rr, cc] = r_mesh[rr, cc] * np.sin(theta_mesh[rr, cc]) * np.sin(phi_mesh[rr, cc])
+            z[rr, cc] = r_mesh[rr, cc] * np.cos(theta_mesh[rr, cc])
 
     return x, y, z
 
 
 # Rectangular to spherical meshgrid
-@jit(nopython=True, parallel=True)
+@jit(nopython=True, parallel=True, cache=True)
 def meshCart2sph(x_mesh, y_mesh, z_mesh):
     """
     from rec to sph
@@ -207,7 +210,7 @@ def meshCart2sph(x_mesh, y_mesh, z_mesh):
 ## cartesian changes of coordinates
 
 # fast implementation for change of coordinates
-@jit(nopython=True, parallel=True)
+@jit(nopython=True, parallel=True, cache=True)
 def mesh_lcs_to_gcs(x_mesh, y_mesh, z_mesh, Bs2c, S0):
     """
 
@@ -222,17 +225,20 @@ def mesh_lcs_to_gcs(x_mesh, y_mesh, z_mesh, Bs2c, S0):
     y = np.zeros_like(y_mesh).astype(np.float64)
     z = np.zeros_like(z_mesh).astype(np.float64)
 
+    Bs2c = np.ascontiguousarray(Bs2c)  # the basis change is often a transposed (F ordered) matrix
     rows, columns = x_mesh.shape
     for rr in prange(rows):
         for cc in prange(columns):
-            P = S0 + Bs2c @ np.array([[x_mesh[rr, cc]], [y_mesh[rr, cc]], [z_mesh[rr, cc]]])
-            x[rr, cc], y[rr, cc], z[rr, cc] = P[0], P[1], P[2]
+            P = S0 + Bs2c @ np.array([[x_mesh[rr, cc]], [y_mesh[rr, cc]], [z_mesh[rr, cc]]], dtype=np.float64)
+            x[rr, cc] = P[0, 0]
+            y[rr, cc] = P[1, 0]
+            z[rr, cc] = P[2, 0]
 
     return x, y, z
 
 
 # fast implementation for change of coordinates
-@jit(nopython=True, parallel=True)
+@jit(nopython=True, parallel=True, cache=True)
 def mesh_gcs_to_lcs(x_mesh, y_mesh, z_mesh, Bc2s, S0):
     """
 
@@ -247,6 +253,7 @@ def mesh_gcs_to_lcs(x_mesh, y_mesh, z_mesh, Bc2s, S0):
     y = np.zeros_like(y_mesh).astype(np.float64)
     z = np.zeros_like(z_mesh).astype(np.float64)
 
+    Bc2s = np.ascontiguousarray(Bc2s)  # the basis change is often a transposed (F ordered) matrix
     rows, columns = x_mesh.shape
     for rr in prange(rows):
         for cc in prange(columns):
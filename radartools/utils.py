@@ -29,8 +29,11 @@ def cart2sph(P:np.ndarray) -> np.ndarray:
     phi = np.where(r != 0, np.arctan2(P[y], P[x]), 0).astype(np.float64)
     return np.stack((r, theta, phi))
 
+# the meshgrid functions below are compiled on their first call and then loaded from the numba disk cache
+
+
 # polar to rectangular meshgrid
-@jit(nopython=True, parallel=True)
+@jit(nopython=True, parallel=True, cache=True)
 def meshSph2cart(r_mesh, theta_mesh, phi_mesh):
     """
 
@@ -53,7 +56,7 @@ def meshSph2cart(r_mesh, theta_mesh, phi_mesh):
     return x, y, z
 
 # Rectangular to spherical meshgrid
-@jit(nopython=True, parallel=True)
+@jit(nopython=True, parallel=True, cache=True)
 def meshCart2sph(x_mesh, y_mesh, z_mesh):
     """
     from rec to sph
@@ -77,7 +80,7 @@ def meshCart2sph(x_mesh, y_mesh, z_mesh):
 
 
 # fast implementation for change of coordinates
-@jit(nopython=True, parallel=True)
+@jit(nopython=True, parallel=True, cache=True)
 def mesh_lcs_to_gcs(x_mesh, y_mesh, z_mesh, Bs2c, S0):
     """
 
@@ -92,17 +95,20 @@ def mesh_lcs_to_gcs(x_mesh, y_mesh, z_mesh, Bs2c, S0):
     y = np.zeros_like(y_mesh).astype(np.float64)
     z = np.zeros_like(z_mesh).astype(np.float64)
 
+    Bs2c = np.ascontiguousarray(Bs2c)  # the basis change is often a transposed (F ordered) matrix
     rows, columns = x_mesh.shape
     for rr in prange(rows):
         for cc in prange(columns):
-            P = S0 + Bs2c @ np.array([[x_mesh[rr, cc]], [y_mesh[rr, cc]], [z_mesh[rr, cc]]])
-            x[rr, cc], y[rr, cc], z[rr, cc] = P[0], P[1], P[2]
+            P = S0 + Bs2c @ np.array([[x_mesh[rr, cc]], [y_mesh[rr, cc]], [z_mesh[rr, cc]]], dtype=np.float64)
+            x[rr, cc] = P[0, 0]
+            y[rr, cc] = P[1, 0]
+            z[rr, cc] = P[2, 0]
 
     return x, y, z
 
 
 # fast implementation for change of coordinates
-@jit(nopython=True, parallel=True)
+@jit(nopython=True, parallel=True, cache=True)
 def mesh_gcs_to_lcs(x_mesh, y_mesh, z_mesh, Bc2s, S0):
     """
 
@@ -117,6 +123,7 @@ def mesh_gcs_to_lcs(x_mesh, y_mesh, z_mesh, Bc2s, S0):
     y = np.zeros_like(y_mesh).astype(np.float64)
     z = np.zeros_like(z_mesh).astype(np.float64)
 
+    Bc2s = np.ascontiguousarray(Bc2s)  # the basis change is often a transposed (F ordered) matrix
     rows, columns = x_mesh.shape
     for rr in prange(rows):
         for cc in prange(columns):